@@ -0,0 +1,91 @@
+"""
+Benchmark: ráfaga de peticiones concurrentes al LLM sin límite (cada una en
+un hilo, como hoy) frente a AsyncLLMClient (como mucho --max-in-flight en
+curso, en orden de llegada, y los prompts idénticos simultáneos agrupados).
+
+Se lanzan --requests peticiones a la vez, con una fracción --duplicates de
+prompts repetidos, y se mide el tiempo total, la latencia por petición
+(p50/p95), las peticiones que llegan a Ollama y, con AsyncLLMClient, la
+profundidad máxima de la cola y la espera. Necesita Ollama con el modelo
+de GEMMA; el LLM se usa sin caché.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_async_llm --requests 32 --duplicates 0.5 --max-in-flight 4
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks.eval_intent_cache import messages
+from src.infrastructure.async_llm import AsyncLLMClient
+from src.infrastructure.llm_interface import GEMMA
+
+
+class CountingLLM:
+    def __init__(self, llm):
+        self.llm = llm
+        self.error_response = llm.error_response
+        self.calls = 0
+
+    def generate(self, prompt, history=None):
+        self.calls += 1
+        return self.llm.generate(prompt, history)
+
+
+def workload(n: int, duplicates: float, seed: int):
+    rng = random.Random(seed)
+    unique = list(dict.fromkeys(f"Responde en una frase: {msg}" for msg, _, _ in messages()))
+    rng.shuffle(unique)
+    n_unique = max(1, round(n * (1 - duplicates)))
+    prompts = unique[:n_unique]
+    prompts += [rng.choice(prompts) for _ in range(n - len(prompts))]
+    rng.shuffle(prompts)
+    return prompts
+
+
+async def burst(call, prompts):
+    async def timed(prompt):
+        start = time.perf_counter()
+        await call(prompt)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(p) for p in prompts))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(name, total, latencies, calls, extra=""):
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(f"{name:>16} {total:8.2f} s {statistics.median(latencies):8.2f} s {p95:8.2f} s {calls:>9}{extra}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--duplicates", type=float, default=0.5)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    prompts = workload(args.requests, args.duplicates, args.seed)
+    gemma = GEMMA()
+    # Carga el modelo en Ollama fuera de la medida
+    gemma.generate("hola")
+    print(f"{len(prompts)} peticiones simultáneas, {len(set(prompts))} prompts distintos")
+    print(f"{'variante':>16} {'total':>10} {'p50':>10} {'p95':>10} {'a Ollama':>9}")
+
+    direct = CountingLLM(gemma)
+    total, latencies = asyncio.run(burst(lambda p: asyncio.to_thread(direct.generate, p), prompts))
+    report("sin límite", total, latencies, direct.calls)
+
+    client = AsyncLLMClient(gemma, max_in_flight=args.max_in_flight)
+    total, latencies = asyncio.run(burst(client.generate, prompts))
+    stats = client.stats()
+    report("AsyncLLMClient", total, latencies, stats["upstream_calls"],
+           f"  (cola máx. {stats['max_queue_depth']}, espera p95 {stats['wait']['p95_ms']} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: buscar_beca/7 en Prolog frente al índice invertido en memoria
+(ScholarshipIndex). Comprueba además que ambos devuelven lo mismo.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_find_by_filters --kb config/becas.pl --rounds 20
+"""
+import argparse
+import itertools
+import random
+import time
+
+from src.infrastructure.prolog_connector import DEFAULT_KB_PATH, NoResultsError, PrologService
+from src.infrastructure.scholarship_index import CRITERIA, ScholarshipIndex, buscar_beca_goal
+
+
+def sample_filters(index: ScholarshipIndex, count: int, seed: int = 0) -> list:
+    """Combinaciones de filtros con cualquier subconjunto de criterios fijado."""
+    rng = random.Random(seed)
+    domains = {criterion: index.values(criterion) + [None] for criterion in CRITERIA}
+    combos = [dict(zip(CRITERIA, values)) for values in itertools.product(*domains.values())]
+    return combos if len(combos) <= count else rng.sample(combos, count)
+
+
+def prolog_search(service: PrologService, filters: dict) -> list:
+    try:
+        rows = service.query(buscar_beca_goal(filters), ["Becas"])
+    except NoResultsError:
+        return []
+    # buscar_beca/7 puede repetir una beca si hay hechos duplicados; el orden es el de beca/1
+    return list(dict.fromkeys(str(b) for b in rows[0]["Becas"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", default=DEFAULT_KB_PATH)
+    parser.add_argument("--combos", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    service = PrologService(args.kb, pool_size=1)
+    try:
+        start = time.perf_counter()
+        index = ScholarshipIndex.from_service(service)
+        print(f"índice construido ({len(index)} becas) en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        combos = sample_filters(index, args.combos)
+        mismatches = [f for f in combos if prolog_search(service, f) != index.search(f)]
+        print(f"combinaciones comprobadas: {len(combos)}  discrepancias: {len(mismatches)}")
+        for filters in mismatches[:5]:
+            print(f"  {filters}")
+
+        start = time.perf_counter()
+        for filters in combos:
+            prolog_search(service, filters)
+        prolog_us = (time.perf_counter() - start) / len(combos) * 1e6
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for filters in combos:
+                index.search(filters)
+        index_us = (time.perf_counter() - start) / (len(combos) * args.rounds) * 1e6
+
+        print(f"buscar_beca/7 (Prolog): {prolog_us:10.1f} µs/consulta")
+        print(f"ScholarshipIndex:       {index_us:10.1f} µs/consulta  (x{prolog_us / index_us:.0f})")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
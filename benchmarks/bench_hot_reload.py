@@ -0,0 +1,84 @@
+"""
+Benchmark: recarga en caliente de la KB con tráfico concurrente.
+
+Copia la KB a un directorio temporal, lanza varios hilos consultando sin parar
+y modifica el fichero varias veces con el vigilante activo. Informa de la
+latencia de cada recarga y de los errores de las consultas durante el cambio.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_hot_reload --kb config/becas.pl --reloads 5 --threads 4
+"""
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.infrastructure.prolog_connector import DEFAULT_KB_PATH, PrologConnector, PrologService
+from src.domain.entities import FilterCriteria
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", default=DEFAULT_KB_PATH)
+    parser.add_argument("--reloads", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=0.2, help="intervalo del vigilante (s)")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_reload_"))
+    kb = workdir / "becas.pl"
+    shutil.copy(args.kb, kb)
+    source = kb.read_text(encoding="utf-8")
+
+    service = PrologService(kb, pool_size=args.pool_size, snapshot_dir=workdir / ".kb_cache")
+    connector = PrologConnector(service=service)
+    service.warm_up()
+    connector.find_by_filters(FilterCriteria())
+    service.watch(args.interval)
+
+    stop = threading.Event()
+    counts = {"ok": 0, "error": 0}
+    lock = threading.Lock()
+
+    def client():
+        while not stop.is_set():
+            try:
+                service.query("setof(B, beca(B), Becas)", ["Becas"])
+                ok = True
+            except Exception:
+                ok = False
+            with lock:
+                counts["ok" if ok else "error"] += 1
+
+    clients = [threading.Thread(target=client) for _ in range(args.threads)]
+    for thread in clients:
+        thread.start()
+    try:
+        for i in range(args.reloads):
+            expected = service.stats()["reload"]["reloads"] + 1
+            kb.write_text(source + f"\nbeca(bench_reload_{i}).\n", encoding="utf-8")
+            while service.stats()["reload"]["reloads"] + service.stats()["reload"]["failures"] < expected:
+                time.sleep(0.05)
+            reload_stats = service.stats()["reload"]
+            print(f"recarga {i + 1}: {reload_stats['last_latency_s'] * 1000:8.1f} ms  "
+                  f"becas en índice: {len(connector.index)}")
+    finally:
+        stop.set()
+        for thread in clients:
+            thread.join()
+        reload_stats = service.stats()["reload"]
+        service.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"consultas: {counts['ok']} ok, {counts['error']} con error")
+    print(f"durante las recargas: {reload_stats['queries_during_reload']} consultas, "
+          f"tasa de error {reload_stats['error_rate_during_reload']:.2%}")
+    print(f"latencia máxima de recarga: {reload_stats['max_latency_s'] * 1000:.1f} ms  "
+          f"fallidas: {reload_stats['failures']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: clasificador de intenciones local (IntentModel) frente al LLM.
+
+Se entrena el modelo con una parte de las decisiones registradas por
+IntentionClassifier (--log) y, con el resto, se mide su acuerdo con el LLM
+y su latencia. Para cada umbral de confianza se informa de la fracción de
+mensajes que resuelve el modelo local, su precisión en ellos, la precisión
+total (el resto la pone el LLM) y la latencia media esperada. La latencia
+del LLM es la mediana registrada en el log (o --llm-latency si no la hay).
+
+Sin log se usan los mensajes etiquetados de benchmarks.eval_intent_cache.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_intent_model --log .intent_model/decisions.jsonl --thresholds 0.6 0.7 0.8 0.9
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from benchmarks.eval_intent_cache import messages
+from src.infrastructure.intent_model import DEFAULT_DECISION_LOG, IntentModel, read_decisions
+
+
+def load_samples(log: Path):
+    if log.exists():
+        decisions = read_decisions(log)
+        latencies = [d["latency_ms"] / 1000 for d in decisions if d.get("latency_ms")]
+        samples = [(d["message"], d.get("last_intention"), d["intention"]) for d in decisions]
+        return samples, statistics.median(latencies) if latencies else None
+    print(f"Sin {log}: se usan los mensajes etiquetados de eval_intent_cache")
+    return [(msg, previous, intent) for msg, intent, previous in messages()], None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", type=Path, default=DEFAULT_DECISION_LOG)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--test-size", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="segundos por llamada al LLM")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    samples, logged_latency = load_samples(args.log)
+    llm_latency = logged_latency or args.llm_latency
+    random.Random(args.seed).shuffle(samples)
+    n_test = max(int(len(samples) * args.test_size), 1)
+    test, train = samples[:n_test], samples[n_test:]
+
+    start = time.perf_counter()
+    model = IntentModel.train(train, seed=args.seed)
+    print(f"{len(train)} muestras de entrenamiento, {len(test)} de prueba; "
+          f"entrenado en {(time.perf_counter() - start) * 1000:.0f} ms, temperatura {model.temperature:.2f}")
+
+    predictions, timings = [], []
+    for message, previous, gold in test:
+        start = time.perf_counter()
+        intent, confidence = model.predict(message, previous)
+        timings.append(time.perf_counter() - start)
+        predictions.append((intent == gold, confidence))
+    local_latency = statistics.median(timings)
+    accuracy = sum(ok for ok, _ in predictions) / len(predictions)
+    print(f"modelo local: acuerdo con el LLM {accuracy:.1%}, latencia mediana {local_latency * 1e6:.0f} µs")
+    print(f"LLM: latencia mediana {llm_latency * 1000:.0f} ms{' (registrada)' if logged_latency else ''}")
+
+    print(f"\n{'umbral':>7} {'local':>7} {'precisión local':>16} {'precisión total':>16} {'latencia media':>15}")
+    for threshold in args.thresholds:
+        covered = [ok for ok, confidence in predictions if confidence >= threshold]
+        coverage = len(covered) / len(predictions)
+        local_accuracy = sum(covered) / len(covered) if covered else 1.0
+        # Los mensajes por debajo del umbral los decide el LLM (acuerdo 100% por definición)
+        total_accuracy = (sum(covered) + len(predictions) - len(covered)) / len(predictions)
+        mean_latency = local_latency + (1 - coverage) * llm_latency
+        print(f"{threshold:7.2f} {coverage:7.1%} {local_accuracy:16.1%} {total_accuracy:16.1%} "
+              f"{mean_latency * 1000:12.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
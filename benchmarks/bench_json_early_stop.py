@@ -0,0 +1,93 @@
+"""
+Benchmark: tokens y latencia que ahorra cortar la generación al cerrarse el
+primer objeto JSON (json_stream.generate_json) en cada método de los
+clasificadores, frente a dejar que el modelo termine por su cuenta.
+
+Para cada método se ejecutan sus turnos de ejemplo con las dos variantes y se
+informa de los tokens generados (fragmentos del stream de Ollama), la
+latencia media y el acuerdo entre los JSON extraídos. Necesita Ollama con el
+modelo de GEMMA y swipl para las opciones de la KB; el LLM se usa sin caché.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_json_early_stop --repeat 2
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.eval_intent_cache import messages
+from benchmarks.eval_joint_extraction import TURNS
+from src.infrastructure.argument_classifier import JOINT_CRITERIA, ArgumentClassifier
+from src.infrastructure.intention_classifier import IntentionClassifier
+from src.infrastructure.llm_interface import GEMMA
+
+
+class FullLLM:
+    """Sin generate_stream: generate_json espera a la respuesta completa."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.error_response = llm.error_response
+        self.tokens = 0
+
+    def generate(self, prompt, history=None):
+        chunks = list(self.llm.generate_stream(prompt, history))
+        self.tokens += len(chunks)
+        return "".join(chunks).strip()
+
+
+class EarlyStopLLM(FullLLM):
+    """Con generate_stream: generate_json corta al cerrarse el JSON."""
+
+    def generate_stream(self, prompt, history=None):
+        for chunk in self.llm.generate_stream(prompt, history):
+            self.tokens += 1
+            yield chunk
+
+
+def tasks():
+    """(método, llamada(intents, arguments)) con los turnos de ejemplo."""
+    for message, _, previous in messages()[:12]:
+        yield "classify_intention", lambda i, a, m=message, p=previous: i.classify_intention(m, last_intention=p)
+    for context, awaiting, *_ in TURNS:
+        if awaiting:
+            yield "detect_confirmation", lambda i, a, c=context: a.detect_confirmation(c)
+        else:
+            yield "classify_criterion_response", lambda i, a, c=context: a.classify_criterion_response(JOINT_CRITERIA, c)
+            yield "extract_initial_criteria", lambda i, a, c=context: a.extract_initial_criteria(c)
+        yield "extract_turn", lambda i, a, c=context, w=awaiting: a.extract_turn(c, "buscar_por_criterio", w)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    gemma = GEMMA()
+    gemma.generate("hola")  # carga el modelo en Ollama fuera de la medida
+    variants = {}
+    for name, llm in (("completa", FullLLM(gemma)), ("corte JSON", EarlyStopLLM(gemma))):
+        intents = IntentionClassifier(llm=llm, similarity_threshold=None, decision_log=None)
+        arguments = ArgumentClassifier(llm=llm)
+        results = {}
+        for _ in range(args.repeat):
+            for method, call in tasks():
+                before = llm.tokens
+                start = time.perf_counter()
+                output = call(intents, arguments)
+                elapsed = time.perf_counter() - start
+                results.setdefault(method, []).append((llm.tokens - before, elapsed, output))
+        variants[name] = results
+
+    full, early = variants["completa"], variants["corte JSON"]
+    print(f"{'método':>28} {'tokens':>13} {'ahorro':>7} {'latencia':>17} {'ahorro':>7} {'acuerdo':>8}")
+    for method in full:
+        tokens = [statistics.mean(r[0] for r in v[method]) for v in (full, early)]
+        latency = [statistics.mean(r[1] for r in v[method]) for v in (full, early)]
+        agreement = statistics.mean(a[2] == b[2] for a, b in zip(full[method], early[method]))
+        print(f"{method:>28} {tokens[0]:6.1f} → {tokens[1]:4.1f} {1 - tokens[1] / tokens[0]:7.1%} "
+              f"{latency[0]:6.2f} → {latency[1]:5.2f} s {1 - latency[1] / latency[0]:7.1%} {agreement:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
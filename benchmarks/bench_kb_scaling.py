@@ -0,0 +1,116 @@
+"""
+Benchmark de escalado: KBs sintéticas de distintos tamaños (ver kb_generator)
+y, para cada variante de las reglas (base, index_first, tabled), mide:
+
+    consult      tiempo de consultar el fuente en un worker nuevo
+    memoria      RSS del proceso swipl y bytes de las cláusulas de la KB
+    buscar_beca  latencia de findall/3 sobre buscar_beca/7 (primera llamada,
+                 que incluye la creación de índices JIT, y mediana/p95 después)
+    criterios    latencia de get_criteria (setof/3 por criterio)
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_kb_scaling --sizes 1000 10000 100000 --queries 50
+    python -m benchmarks.bench_kb_scaling --sizes 1000000 --variants base index_first
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.kb_generator import DOMAINS, VARIANTS, generate_kb
+from src.infrastructure.prolog_connector import criteria_goal
+from src.infrastructure.prolog_pool import PrologWorker
+from src.infrastructure.scholarship_index import CRITERIA, buscar_beca_goal
+
+KB_PREDICATES = ["beca/1", "organismo/2", "campo_estudio/2", "financiamiento/2", "nivel/2",
+                 "ubicacion/2", "info/2", "plazo/3", "requisito/3", "web_oficial/2"]
+
+
+def sample_filters(count: int, seed: int = 0) -> list:
+    """Filtros con uno o dos criterios fijados, más la búsqueda sin filtros."""
+    rng = random.Random(seed)
+    samples = [{}]
+    while len(samples) < count:
+        fixed = rng.sample(CRITERIA, rng.choice((1, 2)))
+        samples.append({criterion: rng.choice(DOMAINS[criterion]) for criterion in fixed})
+    return samples
+
+
+def timed(worker: PrologWorker, goal: str) -> float:
+    start = time.perf_counter()
+    worker.query(goal)
+    return time.perf_counter() - start
+
+
+def memory(worker: PrologWorker) -> tuple:
+    """(RSS del proceso swipl en MB o None, MB de cláusulas de la KB)."""
+    rows = worker.query(
+        "current_prolog_flag(pid, Pid), "
+        f"aggregate_all(sum(S), (member(P, [{', '.join(KB_PREDICATES)}]), "
+        "P = N/A, functor(H, N, A), predicate_property(H, size(S))), Bytes)"
+    )
+    pid, clause_bytes = rows[0]["Pid"], rows[0]["Bytes"]
+    rss = None
+    status = Path(f"/proc/{pid}/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1]) / 1024
+    return rss, clause_bytes / 1e6
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(kb: Path, filters: list) -> dict:
+    start = time.perf_counter()
+    worker = PrologWorker(kb.resolve().as_posix())
+    consult = time.perf_counter() - start
+    try:
+        rss, clauses = memory(worker)
+        goals = [buscar_beca_goal(f) for f in filters]
+        first = timed(worker, goals[1] if len(goals) > 1 else goals[0])
+        search = [timed(worker, goal) for goal in goals]
+        criteria = [timed(worker, criteria_goal(c)) for c in CRITERIA for _ in range(3)]
+    finally:
+        worker.stop()
+    return {
+        "consult": consult,
+        "rss": rss,
+        "clauses": clauses,
+        "first": first,
+        "p50": statistics.median(search),
+        "p95": percentile(search, 0.95),
+        "criteria": statistics.median(criteria),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    filters = sample_filters(args.queries, args.seed)
+    print(f"{'becas':>8} {'variante':<12} {'consult':>10} {'RSS':>9} {'cláusulas':>10} "
+          f"{'1ª busq.':>10} {'p50':>10} {'p95':>10} {'criterio':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for variant in args.variants:
+                kb = generate_kb(size, Path(tmp) / f"becas_{size}_{variant}.pl", args.seed, variant)
+                r = run(kb, filters)
+                rss = f"{r['rss']:7.1f}MB" if r["rss"] is not None else f"{'-':>9}"
+                print(f"{size:>8} {variant:<12} {r['consult'] * 1000:8.0f}ms {rss} {r['clauses']:8.1f}MB "
+                      f"{r['first'] * 1000:8.2f}ms {r['p50'] * 1000:8.2f}ms {r['p95'] * 1000:8.2f}ms "
+                      f"{r['criteria'] * 1000:8.2f}ms")
+                kb.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: tiempo de arranque de un worker Prolog consultando el fuente de la KB
+frente a cargar el snapshot .qlf.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_kb_startup --kb config/becas.pl --repeat 5
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.infrastructure.kb_snapshot import KBSnapshot
+from src.infrastructure.prolog_connector import DEFAULT_KB_PATH
+from src.infrastructure.prolog_pool import PrologWorker
+
+
+def time_startup(kb: str, snapshot=None) -> tuple:
+    start = time.perf_counter()
+    worker = PrologWorker(kb, snapshot=snapshot)
+    elapsed = time.perf_counter() - start
+    mode = worker.load_mode
+    worker.stop()
+    return elapsed, mode
+
+
+def report(label: str, samples: list) -> None:
+    print(
+        f"{label:<10} media {statistics.mean(samples) * 1000:9.1f} ms  "
+        f"min {min(samples) * 1000:9.1f} ms  max {max(samples) * 1000:9.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", default=DEFAULT_KB_PATH)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    kb = Path(args.kb).resolve().as_posix()
+    source = [time_startup(kb)[0] for _ in range(args.repeat)]
+    report("source", source)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        snapshot = KBSnapshot(Path(kb), cache_dir=Path(cache_dir))
+        compile_time, mode = time_startup(kb, snapshot)
+        print(f"{'compile':<10} {compile_time * 1000:9.1f} ms  ({mode})")
+        qlf = []
+        for _ in range(args.repeat):
+            elapsed, mode = time_startup(kb, snapshot)
+            assert mode == "qlf", f"se esperaba carga desde .qlf, no {mode}"
+            qlf.append(elapsed)
+        report("qlf", qlf)
+
+    print(f"speed-up medio: x{statistics.mean(source) / statistics.mean(qlf):.2f}")
+
+
+if __name__ == "__main__":
+    main()
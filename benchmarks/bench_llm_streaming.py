@@ -0,0 +1,67 @@
+"""
+Benchmark: tiempo hasta el primer token (TTFB) con LLMInterface.generate_stream
+frente a esperar la respuesta completa con generate.
+
+Para cada modelo (GEMMA, LLAMA) y pregunta general se mide, sin caché, el
+tiempo hasta el primer fragmento y hasta el último con generate_stream, y el
+tiempo de generate (que es lo que el usuario esperaba antes de ver nada).
+Necesita Ollama con los modelos de GEMMA y LLAMA.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_llm_streaming --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+from src.infrastructure.llm_interface import GEMMA, LLAMA
+from src.infrastructure.llm_response_builder import TEMPLATES
+
+QUESTIONS = [
+    "¿Qué documentos suelen pedir para solicitar una beca?",
+    "¿Puedo pedir varias becas a la vez?",
+    "¿Qué diferencia hay entre una beca y una ayuda al estudio?",
+    "¿Cuánto tarda en resolverse una convocatoria?",
+]
+
+
+def measure_stream(llm, prompt: str):
+    start = time.perf_counter()
+    first = None
+    for chunk in llm.generate_stream(prompt):
+        if first is None and chunk:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def measure_generate(llm, prompt: str) -> float:
+    start = time.perf_counter()
+    llm.generate(prompt)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    prompts = [TEMPLATES["general_qa_prompt"].format(history="", user_message=q) for q in QUESTIONS]
+    print(f"{len(prompts)} preguntas x {args.repeat}")
+    print(f"{'modelo':>8} {'TTFB stream':>12} {'total stream':>13} {'generate':>10} {'TTFB/generate':>14}")
+    for name, llm in (("gemma", GEMMA()), ("llama", LLAMA())):
+        # Primera llamada fuera de la medida: carga el modelo en Ollama
+        llm.generate(prompts[0])
+        ttfb, total, blocking = [], [], []
+        for _ in range(args.repeat):
+            for prompt in prompts:
+                first, last = measure_stream(llm, prompt)
+                ttfb.append(first if first is not None else last)
+                total.append(last)
+                blocking.append(measure_generate(llm, prompt))
+        ratio = statistics.median(ttfb) / statistics.median(blocking)
+        print(f"{name:>8} {statistics.median(ttfb):10.2f} s {statistics.median(total):11.2f} s "
+              f"{statistics.median(blocking):8.2f} s {ratio:14.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: resolución de nombres de beca con el índice de trigramas
+(NameIndex) sobre catálogos sintéticos de distintos tamaños.
+
+Las becas de config/becas.pl (con sus alias) se mezclan con becas sintéticas
+como las de benchmarks.kb_generator, y se mide la latencia de búsqueda de
+menciones típicas ("la MEC", "Erasmus"...). No necesita swipl.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_name_index --sizes 1000 10000 100000 --repeat 200
+"""
+import argparse
+import re
+import statistics
+import time
+
+from benchmarks.kb_generator import REAL_KB
+from src.infrastructure.name_index import NameIndex
+
+MENTIONS = [
+    "la MEC",
+    "Erasmus",
+    "beca de deportistas de la UPV",
+    "ayuda para el transporte",
+    "la del ministerio",
+    "beca sintetica 1234",
+]
+
+
+def real_catalog():
+    """(ids, info, alias) de la KB real, leídos del fuente."""
+    text = REAL_KB.read_text(encoding="utf-8")
+    ids = re.findall(r"^beca\((\w+)\)\.", text, flags=re.M)
+    info = dict(re.findall(r"^info\((\w+), '(.*)'\)\.", text, flags=re.M))
+    aliases = {}
+    for beca, alias in re.findall(r"^alias\((\w+), '(.*)'\)\.", text, flags=re.M):
+        aliases.setdefault(beca, []).append(alias)
+    return ids, info, aliases
+
+
+def synthetic_catalog(size: int):
+    ids, info, aliases = real_catalog()
+    for i in range(size - len(ids)):
+        beca = f"beca_sint_{i:07d}"
+        ids.append(beca)
+        info[beca] = f"Beca sintética número {i} para pruebas de rendimiento."
+    return ids, info, aliases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        ids, info, aliases = synthetic_catalog(size)
+        start = time.perf_counter()
+        index = NameIndex(ids, info, aliases)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"\n{len(index)} becas: índice construido en {build_ms:.0f} ms")
+        for mention in MENTIONS:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = index.search(mention)
+                timings.append((time.perf_counter() - start) * 1e6)
+            best = results[0][0] if results else "-"
+            print(f"  {mention!r:35} mediana {statistics.median(timings):8.1f} µs  "
+                  f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:8.1f} µs  → {best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: consultas/segundo con un proceso swipl nuevo por consulta frente al
+pool persistente de PrologService.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_prolog_pool --queries 200 --pool-size 4 --threads 4
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from swiplserver import PrologMQI
+
+from src.infrastructure.prolog_connector import DEFAULT_KB_PATH, PrologService
+
+GOAL = "setof(Type, campo_estudio(_,Type), Types)"
+
+
+def legacy_query(kb: str, goal: str):
+    """Comportamiento anterior: un PrologMQI y un consult por consulta."""
+    with PrologMQI() as mqi:
+        with mqi.create_thread() as prolog:
+            prolog.query(f"consult('{kb}')")
+            return prolog.query(goal)
+
+
+def run(label: str, fn, queries: int, threads: int) -> None:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: fn(), range(queries)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {queries:>6} consultas  {elapsed:8.2f}s  {queries / elapsed:10.1f} q/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", default=DEFAULT_KB_PATH)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    kb = Path(args.kb).resolve().as_posix()
+    if not args.skip_legacy:
+        run("legacy", lambda: legacy_query(kb, GOAL), args.queries, args.threads)
+
+    service = PrologService(args.kb, pool_size=args.pool_size)
+    try:
+        warm_start = time.perf_counter()
+        service.warm_up()
+        print(f"warm-up del pool ({args.pool_size} workers): {time.perf_counter() - warm_start:.2f}s")
+        run("pool", lambda: service.query(GOAL, ["Types"]), args.queries, args.threads)
+        print(f"estado del pool: {service.stats()}")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: tiempo de evaluación del prompt (prompt_eval_duration de Ollama)
+por llamada con la parte variable al final de los prompts y los prefijos
+precalentados, frente a la parte variable al principio (como estaba
+`{last_intention}`), que obliga a evaluar el prompt entero cada vez.
+
+Los prompts son los que construyen los clasificadores para los turnos de
+benchmarks.eval_joint_extraction; se envían a Ollama tal cual y con una
+línea variable delante. Se informa, por método, de los tokens evaluados y el
+tiempo de evaluación medios. Necesita Ollama con el modelo de GEMMA y swipl
+para las opciones de la KB.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.bench_prompt_prefix --repeat 2
+"""
+import argparse
+import statistics
+
+from benchmarks.eval_joint_extraction import TURNS
+from src.infrastructure.argument_classifier import JOINT_CRITERIA, ArgumentClassifier
+from src.infrastructure.intention_classifier import IntentionClassifier
+from src.infrastructure.llm_interface import GEMMA
+from src.infrastructure.prompt_warmup import warm_up
+
+
+class RecordingLLM:
+    error_response = "error"
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, history=None):
+        self.prompts.append(prompt)
+        return "{}"
+
+
+def classifier_prompts(intents: IntentionClassifier, arguments: ArgumentClassifier, recorder: RecordingLLM):
+    """(método, prompt) de cada llamada de los clasificadores en los turnos de ejemplo."""
+    for context, awaiting, *_ in TURNS:
+        message = context.rsplit("Usuario: ", 1)[-1]
+        intents.classify_intention(message, context, "buscar_por_criterio")
+        yield "classify_intention", recorder.prompts[-1]
+        if not awaiting:
+            arguments.classify_criterion_response(JOINT_CRITERIA, context)
+            yield "classify_criterion_response", recorder.prompts[-1]
+            arguments.extract_initial_criteria(context)
+            yield "extract_initial_criteria", recorder.prompts[-1]
+        arguments.extract_turn(context, "buscar_por_criterio", awaiting)
+        yield "extract_turn", recorder.prompts[-1]
+
+
+def prompt_eval(gemma: GEMMA, prompt: str):
+    info = gemma.llm.generate([prompt]).generations[0][0].generation_info or {}
+    return info.get("prompt_eval_count", 0), info.get("prompt_eval_duration", 0) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    recorder = RecordingLLM()
+    intents = IntentionClassifier(llm=recorder, similarity_threshold=None, decision_log=None)
+    arguments = ArgumentClassifier(llm=recorder)
+    calls = list(classifier_prompts(intents, arguments, recorder)) * args.repeat
+    gemma = GEMMA()
+
+    results = {}
+    warm_up(gemma, ["hola"])  # carga el modelo fuera de la medida
+    for n, (method, prompt) in enumerate(calls):
+        # Una línea distinta al principio invalida la caché KV de todo el prompt
+        variants = results.setdefault(method, {"variable al principio": [], "prefijo fijo": []})
+        variants["variable al principio"].append(prompt_eval(gemma, f"Turno {n}\n{prompt}"))
+    warm_up(gemma, intents.prompt_prefixes() + arguments.prompt_prefixes())
+    for method, prompt in calls:
+        results[method]["prefijo fijo"].append(prompt_eval(gemma, prompt))
+
+    print(f"{len(calls)} llamadas")
+    print(f"{'método':>28} {'variante':>22} {'tokens evaluados':>17} {'evaluación':>12}")
+    for method, variants in results.items():
+        for variant, samples in variants.items():
+            tokens = statistics.mean(t for t, _ in samples)
+            ms = statistics.mean(d for _, d in samples)
+            print(f"{method:>28} {variant:>22} {tokens:17.0f} {ms:9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
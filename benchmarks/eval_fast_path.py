@@ -0,0 +1,93 @@
+"""
+Evaluación: turnos del flujo guiado que el pre-clasificador por reglas
+(RuleBasedClassifier) resuelve sin LLM.
+
+Cada turno etiquetado lleva el estado del diálogo (campo preguntado o
+confirmación pendiente) y la respuesta correcta, o None si el turno
+necesita de verdad al LLM. Se informa del porcentaje de turnos resueltos
+por la vía rápida, su precisión, los que se resuelven mal y el tiempo de
+LLM ahorrado (--llm-latency segundos por llamada, 1-2 llamadas por turno).
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.eval_fast_path --llm-latency 0.8
+"""
+import argparse
+import statistics
+import time
+
+from src.infrastructure.rule_classifier import RuleBasedClassifier
+
+CONFIRM = "confirmacion"
+
+# (mensaje, campo preguntado o CONFIRM, resultado esperado o None si necesita LLM)
+TURNS = [
+    ("sí", CONFIRM, {"confirmation": "yes"}),
+    ("Sí, adelante", CONFIRM, None),
+    ("vale", CONFIRM, {"confirmation": "yes"}),
+    ("ok", CONFIRM, {"confirmation": "yes"}),
+    ("de acuerdo", CONFIRM, {"confirmation": "yes"}),
+    ("perfecto, gracias", CONFIRM, {"confirmation": "yes"}),
+    ("no", CONFIRM, {"confirmation": "no"}),
+    ("no, cambia el nivel a grado", CONFIRM, None),
+    ("para nada", CONFIRM, {"confirmation": "no"}),
+    ("atrás", "nivel", {"navigation": "atras"}),
+    ("vuelve atrás", "ubicacion", {"navigation": "atras"}),
+    ("salta esta pregunta", "organismo", {"navigation": "saltar_omitir"}),
+    ("cancelar", "campo_estudio", {"navigation": "cancelar"}),
+    ("posgrado", "nivel", {"criterion": {"action": "select", "field": "nivel", "value": "posgrado"}}),
+    ("un máster", "nivel", {"criterion": {"action": "select", "field": "nivel", "value": "posgrado"}}),
+    ("grado", "nivel", {"criterion": {"action": "select", "field": "nivel", "value": "grado"}}),
+    ("fp", "nivel", {"criterion": {"action": "select", "field": "nivel", "value": "postobligatoria_no_uni"}}),
+    ("voy a empezar un ciclo de grado superior", "nivel", None),
+    ("cualquiera", "campo_estudio", {"criterion": {"action": "select", "field": "campo_estudio", "value": "cualquiera"}}),
+    ("me da igual", "ubicacion", {"criterion": {"action": "select", "field": "ubicacion", "value": "cualquiera"}}),
+    ("para ingeniería", "campo_estudio", {"criterion": {"action": "select", "field": "campo_estudio", "value": "ciencias_tecnicas"}}),
+    ("medicina", "campo_estudio", {"criterion": {"action": "select", "field": "campo_estudio", "value": "salud"}}),
+    ("algo relacionado con biología marina", "campo_estudio", None),
+    ("en Valencia", "ubicacion", {"criterion": {"action": "select", "field": "ubicacion", "value": "valencia"}}),
+    ("España", "ubicacion", {"criterion": {"action": "select", "field": "ubicacion", "value": "espana"}}),
+    ("en Europa o en España", "ubicacion", None),
+    ("ministerio", "organismo", {"criterion": {"action": "select", "field": "organismo", "value": "publico_estatal"}}),
+    ("empresas", "organismo", {"criterion": {"action": "select", "field": "organismo", "value": "empresas"}}),
+    ("prefiero que sea de alguna fundación", "organismo", None),
+    ("completa", "financiamiento", {"criterion": {"action": "select", "field": "financiamiento", "value": "completa"}}),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="segundos por llamada al LLM")
+    args = parser.parse_args()
+
+    classifier = RuleBasedClassifier.from_config()
+    correct = wrong = 0
+    timings = []
+    for message, state, expected in TURNS:
+        start = time.perf_counter()
+        if state == CONFIRM:
+            result = classifier.classify(message, awaiting_confirmation=True)
+        else:
+            result = classifier.classify(message, pending_field=state)
+        timings.append((time.perf_counter() - start) * 1e6)
+        if result is None:
+            continue
+        if result == expected:
+            correct += 1
+        else:
+            wrong += 1
+            print(f"  ✗ {message!r} ({state}) → {result}, esperado {expected}")
+
+    stats = classifier.stats()
+    hits = correct + wrong
+    resolvable = sum(expected is not None for _, _, expected in TURNS)
+    print(f"{len(TURNS)} turnos, {resolvable} resolubles por reglas")
+    print(f"vía rápida: {stats['hit_rate']:.1%} de los turnos "
+          f"({hits}/{len(TURNS)}; {correct / resolvable:.1%} de los resolubles)")
+    print(f"precisión de la vía rápida: {correct / hits if hits else 1.0:.1%} ({wrong} errores)")
+    print(f"latencia mediana de la vía rápida: {statistics.median(timings):.1f} µs")
+    print(f"LLM ahorrado: {hits} a {2 * hits} llamadas, "
+          f"{hits * args.llm_latency:.1f}-{2 * hits * args.llm_latency:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
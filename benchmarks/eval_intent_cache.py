@@ -0,0 +1,109 @@
+"""
+Evaluación: precisión y latencia de la caché por similitud de intenciones
+(IntentSimilarityCache) según el umbral de similitud.
+
+Se recorre, en orden aleatorio, un conjunto de mensajes etiquetados con
+paráfrasis casi idénticas y pares parecidos con intención distinta. En cada
+fallo de caché un oráculo hace de LLM: devuelve la intención correcta y
+cuesta --llm-latency segundos. Para cada umbral se informa del porcentaje
+de aciertos de caché, la precisión de esos aciertos y la latencia media por
+mensaje (búsqueda medida + llamadas simuladas al LLM). No necesita Ollama.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.eval_intent_cache --thresholds 0.6 0.7 0.8 0.85 0.9 0.95 --rounds 5
+"""
+import argparse
+import random
+import statistics
+import time
+
+from src.infrastructure.intent_cache import IntentSimilarityCache
+
+# Grupos de paráfrasis: (intención, intención anterior, mensajes)
+LABELLED = [
+    ("buscar_por_criterio", None, [
+        "necesito una beca para mi grado", "necesito beca para el grado",
+        "necesito una beca para el grado", "Necesito una beca para mi grado.",
+        "quiero una beca", "quiero una beca por favor", "busco una beca",
+        "busco becas", "¿qué becas hay para estudiar en Francia?",
+        "que becas hay para estudiar en francia", "recomiéndame becas para un doctorado internacional",
+        "recomiendame becas para doctorado internacional", "busco una beca completa",
+    ]),
+    ("buscar_por_criterio", "buscar_por_criterio", [
+        "para ingeniería", "para ingenieria", "de ingeniería", "para medicina",
+        "para medicina por favor", "nivel máster", "nivel master", "salta esta pregunta",
+        "sáltate esta pregunta", "vuelve atrás", "volver atras",
+    ]),
+    ("explicar_termino", None, [
+        "¿qué es mérito académico?", "que es merito academico", "qué es el mérito académico",
+        "explícame qué son las becas completas", "explicame que son las becas completas",
+        "¿qué es una beca completa?", "que es una beca completa",
+        "¿qué significa convocatoria abierta?", "que significa convocatoria abierta",
+    ]),
+    ("info_beca", None, [
+        "¿qué sabes de beca_mec_general?", "que sabes de la beca mec general",
+        "info sobre beca santander", "información sobre la beca Santander",
+        "¿cuándo abre la convocatoria de la MEC?", "cuando abre la convocatoria de la mec",
+        "¿qué requisitos tiene la Erasmus Mundus?", "que requisitos tiene la erasmus mundus",
+        "dame el enlace de la beca UPV Deporte", "dame el enlace de la beca upv deporte",
+    ]),
+    ("general_qa", None, [
+        "¿qué documentos suelen pedir?", "que documentos suelen pedir",
+        "qué documentos piden normalmente", "¿cómo es el proceso en general?",
+        "como es el proceso en general", "cómo funciona el proceso de solicitud",
+        "hola", "hola!", "gracias", "muchas gracias",
+    ]),
+]
+
+
+def messages():
+    return [(msg, intent, previous) for intent, previous, msgs in LABELLED for msg in msgs]
+
+
+def evaluate(threshold: float, rounds: int, llm_latency: float, seed: int):
+    hits = correct_hits = total = 0
+    lookup_times = []
+    for r in range(rounds):
+        sample = messages()
+        random.Random(seed + r).shuffle(sample)
+        cache = IntentSimilarityCache(threshold)
+        for msg, gold, previous in sample:
+            total += 1
+            start = time.perf_counter()
+            cached = cache.lookup(msg, previous)
+            lookup_times.append(time.perf_counter() - start)
+            if cached is not None:
+                hits += 1
+                correct_hits += cached[0] == gold
+            else:
+                cache.add(msg, gold, previous)
+    misses = total - hits
+    mean_latency = statistics.mean(lookup_times) + misses * llm_latency / total
+    return {
+        "hit_rate": hits / total,
+        "hit_accuracy": correct_hits / hits if hits else 1.0,
+        "accuracy": (correct_hits + misses) / total,
+        "lookup_us": statistics.median(lookup_times) * 1e6,
+        "mean_latency_ms": mean_latency * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.85, 0.9, 0.95])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="segundos por llamada al LLM")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{len(messages())} mensajes x {args.rounds} rondas, LLM simulado de {args.llm_latency:.2f} s")
+    print(f"{'umbral':>7} {'aciertos':>9} {'precisión aciertos':>19} {'precisión total':>16} "
+          f"{'búsqueda':>11} {'latencia media':>15}")
+    for threshold in args.thresholds:
+        r = evaluate(threshold, args.rounds, args.llm_latency, args.seed)
+        print(f"{threshold:7.2f} {r['hit_rate']:9.1%} {r['hit_accuracy']:19.1%} {r['accuracy']:16.1%} "
+              f"{r['lookup_us']:8.1f} µs {r['mean_latency_ms']:12.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
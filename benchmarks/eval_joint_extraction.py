@@ -0,0 +1,112 @@
+"""
+Evaluación: extracción conjunta de intención + criterio + confirmación en
+una llamada (ArgumentClassifier.extract_turn) frente a las llamadas
+separadas (classify_intention más detect_confirmation o
+classify_criterion_response).
+
+Sobre turnos etiquetados de la búsqueda por criterios se mide, para cada
+variante, la precisión de la intención, del criterio (acción, campo y valor)
+y de la confirmación, el número de llamadas al LLM y la latencia por turno.
+Necesita Ollama con el modelo de GEMMA y swipl para las opciones de la KB;
+el LLM se usa sin caché para medir latencias reales.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.eval_joint_extraction --repeat 1
+"""
+import argparse
+import statistics
+import time
+
+from src.infrastructure.argument_classifier import ArgumentClassifier
+from src.infrastructure.intention_classifier import IntentionClassifier
+from src.infrastructure.llm_interface import GEMMA
+
+ASK_NIVEL = "Asistente: ¿Para qué nivel educativo es la beca?"
+ASK_AREA = "Asistente: ¿En qué área de estudios te interesan las becas?"
+CONFIRM = "Asistente: ¿Es todo correcto para que proceda con la búsqueda?"
+NONE = (None, None, None)
+
+# (conversación, confirmación pendiente, intención, (acción, campo, valor), confirmación)
+TURNS = [
+    (f"{ASK_NIVEL}\nUsuario: para un máster", False, "buscar_por_criterio", ("select", "nivel", "posgrado"), None),
+    (f"{ASK_NIVEL}\nUsuario: estoy en la carrera", False, "buscar_por_criterio", ("select", "nivel", "grado"), None),
+    (f"{ASK_AREA}\nUsuario: algo de ingeniería", False, "buscar_por_criterio",
+     ("select", "campo_estudio", "ciencias_tecnicas"), None),
+    (f"{ASK_AREA}\nUsuario: me da igual el área", False, "buscar_por_criterio",
+     ("select", "campo_estudio", "cualquiera"), None),
+    (f"{ASK_AREA}\nUsuario: cambia el nivel a grado", False, "buscar_por_criterio", ("modify", "nivel", "grado"), None),
+    (f"{ASK_AREA}\nUsuario: ¿qué es una beca completa?", False, "explicar_termino", NONE, None),
+    (f"{ASK_NIVEL}\nUsuario: ¿cuándo abre la convocatoria de la MEC?", False, "info_beca", NONE, None),
+    (f"{ASK_NIVEL}\nUsuario: ¿qué documentos suelen pedir?", False, "general_qa", NONE, None),
+    (f"{CONFIRM}\nUsuario: sí, adelante con la búsqueda", True, "buscar_por_criterio", NONE, "yes"),
+    (f"{CONFIRM}\nUsuario: todo correcto, busca", True, "buscar_por_criterio", NONE, "yes"),
+    (f"{CONFIRM}\nUsuario: no, cambia el organismo a estatal", True, "buscar_por_criterio",
+     ("modify", "organismo", "publico_estatal"), "no"),
+    (f"{CONFIRM}\nUsuario: no, mejor para posgrado", True, "buscar_por_criterio", ("modify", "nivel", "posgrado"), "no"),
+]
+
+
+def separate(intents: IntentionClassifier, arguments: ArgumentClassifier, context: str, awaiting: bool):
+    message = context.rsplit("Usuario: ", 1)[-1]
+    intention = intents.classify_intention(message, context=context, last_intention="buscar_por_criterio")["intention"]
+    confirmation = None
+    if awaiting:
+        confirmation = arguments.detect_confirmation(context)["confirmation"]
+        criterion = arguments.extract_initial_criteria(context) if confirmation == "no" else dict.fromkeys(("action", "field", "value"))
+    else:
+        criterion = arguments.classify_criterion_response(
+            available_options=["campo_estudio", "nivel", "financiamiento", "organismo", "ubicacion"], context=context
+        )
+    return intention, criterion, confirmation
+
+
+def joint(arguments: ArgumentClassifier, context: str, awaiting: bool):
+    turn = arguments.extract_turn(context, last_intention="buscar_por_criterio", awaiting_confirmation=awaiting)
+    return turn["intention"], turn["criterion"], turn["confirmation"]
+
+
+class CountingLLM:
+    def __init__(self, llm):
+        self.llm = llm
+        self.error_response = llm.error_response
+        self.calls = 0
+
+    def generate(self, prompt, history=None):
+        self.calls += 1
+        return self.llm.generate(prompt, history)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    llm = CountingLLM(GEMMA())
+    arguments = ArgumentClassifier(llm=llm)
+    intents = IntentionClassifier(llm=llm, similarity_threshold=None, decision_log=None)
+    variants = {
+        "separadas": lambda context, awaiting: separate(intents, arguments, context, awaiting),
+        "conjunta": lambda context, awaiting: joint(arguments, context, awaiting),
+    }
+
+    print(f"{len(TURNS)} turnos x {args.repeat}")
+    print(f"{'variante':>10} {'intención':>10} {'criterio':>9} {'confirmación':>13} {'llamadas/turno':>15} {'latencia/turno':>15}")
+    for name, run in variants.items():
+        ok_intent = ok_criterion = ok_confirmation = 0
+        timings = []
+        llm.calls = 0
+        for _ in range(args.repeat):
+            for context, awaiting, intention, criterion, confirmation in TURNS:
+                start = time.perf_counter()
+                got_intent, got_criterion, got_confirmation = run(context, awaiting)
+                timings.append(time.perf_counter() - start)
+                ok_intent += got_intent == intention
+                ok_criterion += tuple(got_criterion.get(k) for k in ("action", "field", "value")) == criterion
+                ok_confirmation += got_confirmation == confirmation
+        total = len(TURNS) * args.repeat
+        print(f"{name:>10} {ok_intent / total:10.1%} {ok_criterion / total:9.1%} {ok_confirmation / total:13.1%} "
+              f"{llm.calls / total:15.2f} {statistics.mean(timings):12.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Evaluación: salida estructurada de los clasificadores. Por tarea se mide la
+tasa de primeras respuestas ilegibles o fuera de esquema, la de llamadas
+que acaban sin JSON válido (el clasificador cae a general_qa / todo null) y
+la latencia media, en tres variantes: texto libre sin reparación, modo JSON
+de Ollama sin reparación y modo JSON con reparaciones (StructuredOutput).
+
+Usa los turnos de benchmarks.bench_json_early_stop. Necesita Ollama con el
+modelo de GEMMA y swipl para las opciones de la KB; el LLM se usa sin caché.
+
+Uso (desde la raíz del repo, con `pip install -e .`):
+    python -m benchmarks.eval_structured_output --repeat 2 --max-repairs 2
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.bench_json_early_stop import tasks
+from src.infrastructure.argument_classifier import ArgumentClassifier
+from src.infrastructure.intention_classifier import IntentionClassifier
+from src.infrastructure.llm_interface import GEMMA
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--max-repairs", type=int, default=2)
+    args = parser.parse_args()
+
+    variants = [
+        ("texto libre", False, 0),
+        ("modo JSON", True, 0),
+        ("JSON + reparación", True, args.max_repairs),
+    ]
+    print(f"{'tarea':>28} {'variante':>18} {'fallo 1ª resp.':>15} {'sin JSON válido':>16} {'latencia':>10}")
+    for name, json_mode, max_repairs in variants:
+        llm = GEMMA(json_mode=json_mode)
+        intents = IntentionClassifier(llm=llm, similarity_threshold=None, decision_log=None)
+        arguments = ArgumentClassifier(llm=llm)
+        for classifier in (intents, arguments):
+            classifier.structured.max_repairs = max_repairs
+        timings = {}
+        for _ in range(args.repeat):
+            for method, call in tasks():
+                start = time.perf_counter()
+                call(intents, arguments)
+                timings.setdefault(method, []).append(time.perf_counter() - start)
+        stats = {**intents.structured.stats(), **arguments.structured.stats()}
+        for method, task in stats.items():
+            print(f"{method:>28} {name:>18} {task['parse_failure_rate']:15.1%} {task['failure_rate']:16.1%} "
+                  f"{statistics.mean(timings[method]):8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Generador de KBs sintéticas con el mismo esquema que config/becas.pl
+(beca/1, criterios, info/2, plazo/3, requisito/3, web_oficial/2) y los mismos
+dominios de valores, para medir cómo escala el sistema con miles de becas.
+
+Las reglas de consulta (buscar_beca/7...) se copian de la KB real, así que los
+resultados son comparables. Con `--variant` se generan alternativas de esas
+reglas para comparar estrategias de indexación:
+
+    base          reglas tal cual (beca/1 primero, indexación JIT por la beca)
+    index_first   empieza por el criterio fijado más selectivo, de modo que la
+                  indexación JIT de SWI-Prolog actúa sobre el segundo argumento
+    tabled        base + `:- table buscar_beca/7` (tabling de las respuestas)
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.kb_generator --size 10000 --out /tmp/becas_10k.pl
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import Iterator, Optional
+
+REAL_KB = Path("config/becas.pl")
+
+# Dominios de valores documentados en config/becas.pl
+DOMAINS = {
+    "organismo": ["publico_estatal", "publico_local", "privado", "internacional", "otros"],
+    "campo_estudio": ["ciencias_tecnicas", "ciencias_sociales", "arte_humanidades", "salud", "otros"],
+    "financiamiento": ["completa", "parcial", "ayuda_transporte", "otros"],
+    "nivel": ["postobligatoria_no_uni", "grado", "posgrado", "otros"],
+    "ubicacion": ["espana", "valencia", "europa"],
+}
+REQUIREMENT_TYPES = ["nota_media", "nacionalidad", "idioma", "residencia_requerida", "otros"]
+
+VARIANTS = ("base", "index_first", "tabled")
+
+RULES_MARKER = "% 7. CONSULTAS"
+
+INDEX_FIRST_RULE = """
+% Variante generada: se empieza por el criterio fijado para aprovechar la
+% indexación JIT sobre el segundo argumento de los hechos de criterio.
+buscar_beca(OrgInput, AreaInput, FinInput, NivInput, UbiInput, Beca, Info) :-
+    (   nonvar(OrgInput)  -> organismo(Beca, OrgInput)
+    ;   nonvar(AreaInput) -> campo_estudio(Beca, AreaInput)
+    ;   nonvar(UbiInput)  -> ubicacion(Beca, UbiInput)
+    ;   nonvar(FinInput)  -> financiamiento(Beca, FinInput)
+    ;   nonvar(NivInput)  -> nivel(Beca, NivInput)
+    ;   true
+    ),
+    beca(Beca),
+    ( var(OrgInput)  -> true ; organismo(Beca, OrgInput) ),
+    ( var(AreaInput) -> true ; campo_estudio(Beca, AreaInput) ),
+    ( var(FinInput)  -> true ; financiamiento(Beca, FinInput) ),
+    ( var(NivInput)  -> true ; nivel(Beca, NivInput) ),
+    ( var(UbiInput)  -> true ; ubicacion(Beca, UbiInput) ),
+    info(Beca, Info).
+"""
+
+
+def _rules(source: Path, variant: str) -> str:
+    text = source.read_text(encoding="utf-8")
+    start = text.find(RULES_MARKER)
+    if start < 0:
+        raise ValueError(f"No se encuentra la sección de consultas en {source}")
+    # Desde el inicio de la línea de '%%%' que abre la sección
+    rules = text[text.rfind("\n%%%", 0, start) + 1:]
+    if variant == "index_first":
+        head = rules.find("buscar_beca(")
+        rules = rules[:head] + INDEX_FIRST_RULE.lstrip("\n")
+    elif variant == "tabled":
+        rules = ":- table buscar_beca/7.\n\n" + rules
+    elif variant != "base":
+        raise ValueError(f"Variante desconocida: {variant}")
+    return rules
+
+
+def _scholarship(i: int, rng: random.Random) -> Iterator[str]:
+    beca = f"beca_sint_{i:07d}"
+    yield f"beca({beca})."
+    for criterion in ("organismo", "campo_estudio", "financiamiento", "ubicacion"):
+        yield f"{criterion}({beca}, {rng.choice(DOMAINS[criterion])})."
+    # Como en la KB real, algunas becas valen para más de un nivel
+    for level in rng.sample(DOMAINS["nivel"], rng.choice((1, 1, 2))):
+        yield f"nivel({beca}, {level})."
+    yield f"info({beca}, 'Beca sintética número {i} para pruebas de rendimiento.')."
+    if rng.random() < 0.5:
+        yield f"plazo({beca}, apertura, 'Septiembre (aproximado)')."
+        yield f"plazo({beca}, cierre, 'Octubre (aproximado)')."
+    for kind in rng.sample(REQUIREMENT_TYPES, rng.randint(0, 2)):
+        yield f"requisito({beca}, {kind}, 'Requisito sintético {kind}')."
+    yield f"web_oficial({beca}, 'https://example.org/becas/{i}')."
+
+
+def generate_kb(size: int, out: Path, seed: int = 0, variant: str = "base",
+                source: Optional[Path] = None) -> Path:
+    """
+    Escribe en `out` una KB con `size` becas sintéticas y las reglas de la KB real.
+    Mismo `seed` → mismo fichero.
+    """
+    rules = _rules(source or REAL_KB, variant)
+    rng = random.Random(seed)
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        f.write(f"% KB sintética: {size} becas (seed={seed}, variante={variant})\n")
+        f.write(":- encoding(utf8).\n")
+        f.write(":- dynamic beca/1, organismo/2, campo_estudio/2, financiamiento/2, nivel/2,\n")
+        f.write("           ubicacion/2, info/2, plazo/3, requisito/3, web_oficial/2.\n")
+        # Los hechos de cada beca se escriben juntos: hace falta discontiguous
+        f.write(":- discontiguous beca/1, organismo/2, campo_estudio/2, financiamiento/2, nivel/2,\n")
+        f.write("           ubicacion/2, info/2, plazo/3, requisito/3, web_oficial/2.\n\n")
+        for i in range(size):
+            f.write("\n".join(_scholarship(i, rng)))
+            f.write("\n")
+        f.write("\n")
+        f.write(rules)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, required=True)
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variant", choices=VARIANTS, default="base")
+    parser.add_argument("--source", type=Path, default=REAL_KB, help="KB de la que copiar las reglas")
+    args = parser.parse_args()
+    path = generate_kb(args.size, args.out, args.seed, args.variant, args.source)
+    print(f"{path}: {args.size} becas ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@
            nivel/2,
            ubicacion/2,
            info/2,
+           alias/2,
            plazo/3,
            requisito/3,
            web_oficial/2.
@@ -94,6 +95,15 @@ info(beca_fp_valencia, 'Beca de apoyo económico para estudiantes de Formación
 info(beca_erasmus_master, 'Beca europea para cursar másteres conjuntos internacionales con alta calidad académica.').
 info(beca_gv_transporte, 'Ayuda económica para estudiantes con residencia familiar alejada del campus en la Comunidad Valenciana.').
 
+% 3.1 Nombres con los que los usuarios se refieren a cada beca
+alias(beca_mec_general, 'MEC').
+alias(beca_mec_general, 'beca general del ministerio').
+alias(beca_upv_deporte, 'beca deportistas UPV').
+alias(beca_fp_valencia, 'beca FP').
+alias(beca_erasmus_master, 'Erasmus Mundus').
+alias(beca_gv_transporte, 'ayuda al transporte GVA').
+alias(beca_gv_transporte, 'Generalitat transporte').
+
 %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 % 4. PLAZOS
 %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
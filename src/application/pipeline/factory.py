@@ -6,6 +6,8 @@ from src.intention_classifier import IntentionClassifier
 from src.logic_manager import LogicManager
 from src.application.pipeline.handlers import (
     PreprocessHandler,
+    FastPathHandler,
+    JointTurnHandler,
     IntentHandler,
     FlowHandler,
     GenerationHandler,
@@ -31,6 +33,8 @@ def build_pipeline(model_path: str, kb_path: str):
     gen        = GenerationHandler(llm)
     flow       = FlowHandler(logic, intent_map, next_handler=gen)
     intent     = IntentHandler(classifier, next_handler=flow)
-    preprocess = PreprocessHandler(next_handler=intent)
+    joint      = JointTurnHandler(next_handler=intent)
+    fast_path  = FastPathHandler(next_handler=joint)
+    preprocess = PreprocessHandler(next_handler=fast_path)
 
     return preprocess
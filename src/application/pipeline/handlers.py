@@ -1,11 +1,14 @@
 import re
 from typing import Optional
-from src.application.pipeline.interfaces import IHandler, HandlerContext
+from src.application.pipeline.interfaces import BuscarPorCriterioDTO, IHandler, HandlerContext
 from src.domain.entities import DialogAct
 from src.domain.interfaces import IntentClassifierService, ArgumentClassifierService
 from src.infrastructure.intention_classifier import IntentionClassifier
+from src.infrastructure.intent_model import FallbackIntentClassifier
 from src.infrastructure.argument_classifier import ArgumentClassifier
-from src.infrastructure.llm_response_builder import TemplateResponseBuilder
+from src.domain.interfaces import LLMInterface
+from src.infrastructure.llm_response_builder import ANY_OPTION, FIELD_TO_CRITERION, TEMPLATES, TemplateResponseBuilder
+from src.infrastructure.rule_classifier import RuleBasedClassifier
 
 
 class PreprocessHandler(IHandler):
@@ -57,27 +60,42 @@ class HistoryHandler(IHandler):
 class CriteriaSearchHandler(IHandler):
     def __init__(
         self,
-        classifier: ArgumentClassifierService = ArgumentClassifier(),
+        classifier: ArgumentClassifierService = None,
         next_handler: Optional[IHandler] = None,
         responder: "TemplateResponseBuilder" = None,
     ):
-        self.classifier = classifier
+        self.classifier = classifier or ArgumentClassifier()
         self.next = next_handler
-        self.responder = responder or TemplateResponseBuilder()
+        # Mismo repositorio que el clasificador para podar opciones sin resultados
+        self.responder = responder or TemplateResponseBuilder(
+            repository=getattr(self.classifier, "repository", None)
+        )
         
 
     # ---------- 1) Punto de entrada ----------
     def handle(self, ctx: HandlerContext) -> HandlerContext:
         if ctx.last_intention != "buscar_por_criterio":
             return self.next.handle(ctx) if self.next else ctx
+
+        # Turno ya interpretado por FastPathHandler (sin LLM) o JointTurnHandler (una llamada)
+        turn = ctx.raw_intent_payload.get("fast_path") or ctx.raw_intent_payload.get("turn") or {}
+        if turn.get("navigation") and ctx.filter_criteria:
+            acts = self.navigate(turn["navigation"], ctx)
+            if acts:
+                ctx.response_message = self.responder.render(acts=acts, ctx=ctx)
+                return ctx
+            return self.next.handle(ctx) if self.next else ctx
         
         # Caso 1: El empieza la búsqueda por criterios
-        elif not ctx.filter_criteria:
+        if not ctx.filter_criteria:
             # Si no hay criterios, inicializamos uno nuevo
-            ctx.filter_criteria = ctx.filter_criteria.create_empty()
-            result = self.classifier.extract_initial_criteria(
-                context=ctx.last_interaction()
-            )
+            ctx.filter_criteria = BuscarPorCriterioDTO.create_empty()
+            if "criterion" in turn:
+                result = turn["criterion"]
+            else:
+                result = self.classifier.extract_initial_criteria(
+                    context=ctx.last_interaction()
+                )
             acts: list[DialogAct] = []
             acts.append(DialogAct(type="start_criteria_search", field=None, old=None, new=None))
             if all(result.get(k) is not None for k in ("action", "field", "value")):
@@ -91,16 +109,22 @@ class CriteriaSearchHandler(IHandler):
         # Caso 2: El usuario ha respondido todos los criterios y se le pregunta si confirma la búsqueda
         elif ctx.filter_criteria and ctx.filter_criteria.is_complete():
             # Si ya hay criterios y están completos, no hacemos nada
-            result = self.classifier.detect_confirmation(
-                context=ctx.last_interaction()
-            )
+            if "confirmation" in turn:
+                result = turn
+            else:
+                result = self.classifier.detect_confirmation(
+                    context=ctx.last_interaction()
+                )
             acts: list[DialogAct] = []
             confirmation = result.get("confirmation")
             if confirmation == 'no':
                 acts.append(DialogAct(type="reject_search", field=None, old=None, new=None))
-                result = self.classifier.extract_initial_criteria(
-                    context=ctx.last_interaction()
-                )
+                if "criterion" in turn:
+                    result = turn["criterion"]
+                else:
+                    result = self.classifier.extract_initial_criteria(
+                        context=ctx.last_interaction()
+                    )
                 
                 if all(result.get(k) is not None for k in ("action", "field", "value")):
                     if act := ctx.filter_criteria.apply(result):
@@ -113,7 +137,10 @@ class CriteriaSearchHandler(IHandler):
             
         # Caso 3: El usuario ha respondido a un criterio pendiente    
         elif ctx.filter_criteria and ctx.filter_criteria.has_pending_criteria():
-            result = self.classifier.classify_criterion_response(
+            if "criterion" in turn:
+                result = turn["criterion"]
+            else:
+                result = self.classifier.classify_criterion_response(
                     available_options=ctx.filter_criteria.active_fields,
                     context=ctx.last_interaction()
                 )
@@ -139,17 +166,112 @@ class CriteriaSearchHandler(IHandler):
 
         return self.next.handle(ctx) if self.next else ctx
 
+    # ---------- 2) Navegación del flujo guiado ----------
+    def navigate(self, navigation: str, ctx: HandlerContext) -> list[DialogAct]:
+        """
+        Aplica un comando de navegación (claves de NAVIGATION_LEXICON):
+        "atras" borra el último criterio respondido, "saltar_omitir" da el
+        pendiente por "cualquiera" y "cancelar" descarta la búsqueda.
+        Devuelve los actos a mostrar (vacío si no había nada que hacer).
+        """
+        if navigation == "cancelar":
+            ctx.filter_criteria = None
+            return [DialogAct(type="cancel_search")]
+
+        acts: list[DialogAct] = []
+        if navigation == "atras":
+            if act := ctx.filter_criteria.clear_last():
+                acts.append(act)
+        elif navigation == "saltar_omitir":
+            pending = ctx.filter_criteria.next_pending()
+            if pending is not None:
+                ctx.filter_criteria.apply(
+                    {"action": "select", "field": FIELD_TO_CRITERION[pending], "value": ANY_OPTION}
+                )
+                acts.append(DialogAct(type="skip_field", field=FIELD_TO_CRITERION[pending], new=ANY_OPTION))
+
+        if acts and ctx.filter_criteria.has_pending_criteria():
+            acts.append(DialogAct(type="ask_field", field=ctx.filter_criteria.next_pending()))
+        return acts
+
     
+class FastPathHandler(IHandler):
+    """
+    Resuelve sin LLM los turnos triviales de la búsqueda por criterios
+    ("sí", "atrás", "cualquiera", "posgrado"). Si el RuleBasedClassifier
+    está seguro, fija la intención y deja su resultado en
+    raw_intent_payload["fast_path"]; si no, el turno sigue igual hacia el LLM.
+    """
+
+    def __init__(self, classifier: RuleBasedClassifier = None, next_handler: IHandler = None):
+        self.classifier = classifier or RuleBasedClassifier.from_config()
+        self.next = next_handler
+
+    def handle(self, ctx: HandlerContext) -> HandlerContext:
+        if ctx.last_intention == "buscar_por_criterio" and ctx.filter_criteria:
+            result = self.classifier.classify(
+                ctx.normalized_text,
+                pending_field=FIELD_TO_CRITERION.get(ctx.filter_criteria.next_pending()),
+                awaiting_confirmation=ctx.filter_criteria.is_complete(),
+            )
+            if result is not None:
+                ctx.intention = "buscar_por_criterio"
+                ctx.raw_intent_payload = {
+                    "intention": ctx.intention,
+                    "navigation": result.get("navigation"),
+                    "fast_path": result,
+                }
+
+        if self.next:
+            return self.next.handle(ctx)
+        return ctx
+
+
+class JointTurnHandler(IHandler):
+    """
+    En la búsqueda por criterios, obtiene intención, criterio y confirmación
+    con una sola llamada al LLM (ArgumentClassifier.extract_turn) en lugar de
+    classify_intention más la llamada de CriteriaSearchHandler. Deja el
+    resultado en raw_intent_payload["turn"]; si el modelo no devuelve una
+    intención válida, IntentHandler la clasifica como siempre.
+    """
+
+    def __init__(self, classifier: ArgumentClassifier = None, next_handler: IHandler = None):
+        self.classifier = classifier or ArgumentClassifier()
+        self.next = next_handler
+
+    def handle(self, ctx: HandlerContext) -> HandlerContext:
+        if ctx.last_intention == "buscar_por_criterio" and ctx.intention is None:
+            # Solo los criterios que BuscarPorCriterioDTO.apply sabe guardar
+            criteria = ctx.filter_criteria or BuscarPorCriterioDTO()
+            result = self.classifier.extract_turn(
+                context=ctx.last_interaction(),
+                last_intention=ctx.last_intention,
+                awaiting_confirmation=bool(ctx.filter_criteria) and ctx.filter_criteria.is_complete(),
+                criteria_names=criteria.criteria_names(),
+            )
+            if result["intention"] is not None:
+                ctx.intention = result["intention"]
+                ctx.raw_intent_payload = {"intention": ctx.intention, "navigation": None, "turn": result}
+
+        if self.next:
+            return self.next.handle(ctx)
+        return ctx
+
+
 class IntentHandler(IHandler):
-    def __init__(self, classifier: IntentClassifierService = IntentionClassifier(), search_by_criteria: IHandler = None):
-        self.classifier = classifier
+    # Modelo local entrenado (.intent_model/model.npz) y, si no está seguro, el LLM
+    def __init__(self, classifier: IntentClassifierService = None, next_handler: IHandler = None):
+        self.classifier = classifier or FallbackIntentClassifier.from_model_file(IntentionClassifier.from_config())
         self.next = next_handler
 
     def handle(self, ctx: HandlerContext) -> HandlerContext:
         history_snippet = ctx.last_interaction          
             
-        intent_result = self.classifier.classify_intention(message = ctx.normalized_text, context=history_snippet, last_intention=ctx.last_intention)
-        ctx.intention = intent_result.get("intention")
+        # Si FastPathHandler ya resolvió el turno, no se llama al LLM
+        if ctx.intention is None:
+            intent_result = self.classifier.classify_intention(message = ctx.normalized_text, context=history_snippet, last_intention=ctx.last_intention)
+            ctx.intention = intent_result.get("intention")
 
         # 2. Pasar al siguiente handler
         if self.next:
@@ -159,4 +281,31 @@ class IntentHandler(IHandler):
 
     
 class FlowHandler(IHandler): pass
-class GenerationHandler(IHandler): pass
+
+
+class GenerationHandler(IHandler):
+    """
+    Genera la respuesta libre (general_qa) con el LLM. No espera a la
+    respuesta completa: deja en ctx.response_stream el iterador de
+    generate_stream para que la API reenvíe los tokens según llegan.
+    """
+
+    ROLES = {"user": "Usuario", "assistant": "Asistente"}
+
+    def __init__(self, llm: LLMInterface, next_handler: IHandler = None):
+        self.llm = llm
+        self.next = next_handler
+
+    def handle(self, ctx: HandlerContext) -> HandlerContext:
+        if ctx.intention == "general_qa" and ctx.response_message is None:
+            history = "\n".join(
+                f"{self.ROLES.get(m['role'], m['role'])}: {m['content']}" for m in ctx.history
+            )
+            prompt = TEMPLATES["general_qa_prompt"].format(
+                history=history, user_message=ctx.normalized_text or ctx.raw_text
+            )
+            ctx.response_stream = self.llm.generate_stream(prompt)
+
+        if self.next:
+            return self.next.handle(ctx)
+        return ctx
@@ -1,7 +1,7 @@
 # application/pipeline/interfaces.py
 
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List, Protocol
+from typing import Optional, Dict, Any, Iterator, List, Protocol
 from domain.entities import DialogAct, FilterCriteria
 
 @dataclass
@@ -14,6 +14,14 @@ class IntentResultDTO:
     
 @dataclass
 class BuscarPorCriterioDTO:
+    # Criterio de la KB → campo del DTO (financiamiento no se pregunta)
+    FIELD_MAP = {
+        "campo_estudio": "area",
+        "nivel": "education_level",
+        "ubicacion": "location",
+        "organismo": "organization",
+    }
+
     active_fields: Optional[List[str]] = field(default_factory=list)
     area: Optional[str] = None
     organization: Optional[str] = None
@@ -84,21 +92,37 @@ class BuscarPorCriterioDTO:
         else:
             return None
     
+    def criteria_names(self) -> List[str]:
+        """
+        Criterios que se pueden rellenar en este turno: los activos o, si no
+        hay, todos los que tienen campo en el DTO.
+        """
+        return [c for c in (self.active_fields or self.FIELD_MAP) if c in self.FIELD_MAP]
+
+    def clear_last(self) -> Optional[DialogAct]:
+        """
+        Borra el último criterio respondido (en el orden en que se preguntan)
+        para volver a preguntarlo. Devuelve None si no había ninguno.
+        """
+        for criterion, parsed_field in reversed(list(self.FIELD_MAP.items())):
+            old = getattr(self, parsed_field)
+            if old is not None:
+                setattr(self, parsed_field, None)
+                return DialogAct("clear_field", criterion, old, None)
+        return None
+
     def apply(self, result: Dict[str, Any]):
         """
         Aplica los resultados de la clasificación a los campos correspondientes.
+        Los criterios sin campo en el DTO se ignoran (devuelve None).
         """
-        FIELD_MAP = {
-            "campo_estudio": "area",
-            "nivel": "education_level",
-            "ubicacion": "location",
-            "organismo": "organization"
-        }
         action = result.get("action")
         field = result.get("field")
         value = result.get("value")
         
-        parsed_field = FIELD_MAP.get(field)
+        parsed_field = self.FIELD_MAP.get(field)
+        if parsed_field is None:
+            return None
         if action == "modify":
             old = getattr(self, parsed_field, None)
             setattr(self, parsed_field, value)
@@ -123,6 +147,7 @@ class HandlerContext:
     suggestions: List[str] = field(default_factory=list)
     response_payload: Any = None      # datos crudos (lista de becas, estructura de confirmación…)
     response_message: Optional[str] = None  # texto final para el usuario
+    response_stream: Optional[Iterator[str]] = None  # texto final por fragmentos, según lo genera el LLM
     
     error: Optional[str] = None
     
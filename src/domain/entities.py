@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import random
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 @dataclass
 class Scholarship:
@@ -11,6 +11,27 @@ class Scholarship:
     def is_full_financing(self) -> bool:
         return self.financing.lower() in ("completa","total")
 
+@dataclass
+class ScholarshipPage:
+    items: List[Scholarship] = field(default_factory=list)
+    offset: int = 0
+    limit: int = 0
+    next_offset: Optional[int] = None   # None si no hay más resultados
+    kb_version: Optional[str] = None    # el orden solo es estable dentro de una versión
+
+@dataclass
+class ScholarshipRecord:
+    """
+    Todos los hechos de una beca en la KB, para darla de alta o modificarla.
+    """
+    code: str
+    info: str
+    criteria: Dict[str, List[str]] = field(default_factory=dict)     # predicado → valores (nivel admite varios)
+    requirements: Dict[str, str] = field(default_factory=dict)       # requisito/3
+    deadlines: Dict[str, str] = field(default_factory=dict)          # plazo/3: apertura, cierre
+    website: Optional[str] = None                                     # web_oficial/2
+    aliases: List[str] = field(default_factory=list)                  # alias/2
+
 @dataclass
 class FilterCriteria:
     question: Optional[str]=None
@@ -20,6 +41,7 @@ class FilterCriteria:
     area: Optional[str]=None
     education_level: Optional[str]=None
     location: Optional[str]=None
+    financing: Optional[str]=None
     def is_complete(self) -> bool:
         return all([self.area, self.organization, self.education_level, self.location])
     def random_incomplete_criterion(self) -> Optional[str]:
@@ -33,7 +55,7 @@ class FilterCriteria:
                 return field
         return None
     def replace_cualquiera_with_none(self) -> None:
-        for f in ['organization', 'area', 'education_level', 'location']:
+        for f in ['organization', 'area', 'education_level', 'location', 'financing']:
             val = getattr(self, f)
             if isinstance(val, str) and val.strip().lower() == 'cualquiera':
                 setattr(self, f, None)    
@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
-from domain.entities import Scholarship, FilterCriteria
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from domain.entities import Scholarship, ScholarshipPage, ScholarshipRecord, FilterCriteria
 
 class ScholarshipRepository(ABC):
     @abstractmethod
-    def find_by_name(self, name: str) -> Scholarship: ...
+    def find_by_name(self, name: str) -> List[Scholarship]: ...
     @abstractmethod
     def find_by_filters(self, criteria: FilterCriteria) -> List[Scholarship]: ...
     @abstractmethod
@@ -12,7 +12,41 @@ class ScholarshipRepository(ABC):
     @abstractmethod
     def get_all_criteria(self, var) -> List[str]:
         ...
-        
+    @abstractmethod
+    def facet_counts(
+        self, criteria: FilterCriteria, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, int]]: ...
+
+
+class ScholarshipWriter(ABC):
+    @abstractmethod
+    def add_scholarship(self, record: ScholarshipRecord) -> str: ...
+    @abstractmethod
+    def update_scholarship(self, record: ScholarshipRecord) -> str: ...
+    @abstractmethod
+    def retract_scholarship(self, code: str) -> str: ...
+
+
+class AsyncScholarshipRepository(ABC):
+    @abstractmethod
+    async def get_criteria(self, criterion: str) -> List[str]: ...
+    @abstractmethod
+    async def get_all_scholarship_names(self) -> List[str]: ...
+    @abstractmethod
+    async def find_by_filters(self, criteria: FilterCriteria) -> List[Scholarship]: ...
+    @abstractmethod
+    async def find_page(self, criteria: FilterCriteria, offset: int, limit: int) -> ScholarshipPage: ...
+    @abstractmethod
+    async def facet_counts(
+        self, criteria: FilterCriteria, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, int]]: ...
+
+
+class AsyncLLMInterface(ABC):
+    error_response: str
+
+    @abstractmethod
+    async def generate(self, prompt: str, history: List[Tuple[str, str]] = None) -> str: ...
 
 
 class IntentClassifierService(ABC):
@@ -29,6 +63,24 @@ class ArgumentClassifierService(ABC):
     @abstractmethod
     def classify_(self, text: dict) -> dict: ...
     
+class LLMStreamError(RuntimeError):
+    """El modelo falló después de enviar parte de la respuesta."""
+    pass
+
 class LLMInterface(ABC):
+    # Respuesta que devuelven las implementaciones cuando falla el modelo
+    error_response = "Lo siento, tuve un problema al procesar tu solicitud con la IA."
+
     @abstractmethod
     def generate(self, prompt: str, history: List[Tuple[str, str]] = None) -> str: ...
+
+    def generate_stream(self, prompt: str, history: List[Tuple[str, str]] = None) -> Iterator[str]:
+        """
+        Fragmentos de la respuesta según se generan. Por defecto, la respuesta
+        completa de `generate` en un solo fragmento.
+
+        Si el modelo falla antes del primer fragmento se devuelve
+        error_response; si falla después, se lanza LLMStreamError para que
+        quien consume no dé por buena una respuesta cortada.
+        """
+        yield self.generate(prompt, history)
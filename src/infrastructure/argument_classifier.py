@@ -5,15 +5,63 @@ import logging
 
 from src.domain.interfaces import LLMInterface, ScholarshipRepository
 from src.infrastructure.llm_interface import GEMMA
+from src.infrastructure.json_stream import CONVERSATION_STOPS
+from src.infrastructure.llm_cache import CachedLLM, DEFAULT_LLM_CACHE_DB
 from src.infrastructure.prolog_connector import PrologConnector
+from src.infrastructure.prompt_warmup import static_prefix
+from src.infrastructure.query_cache import CachedScholarshipRepository
+from src.infrastructure.structured_output import NULLS, StructuredOutput
 
 
 logger = logging.getLogger(__name__)
 
+VALID_INTENTS = {"buscar_por_criterio", "info_beca", "explicar_termino", "general_qa"}
+# Criterios de la tabla del prompt conjunto
+JOINT_CRITERIA = ["campo_estudio", "nivel", "financiamiento", "organismo", "ubicacion"]
+# Tope de tokens y secuencias de parada por tarea; la generación acaba al cerrarse el JSON
+JSON_LIMITS = {
+    "criterion": {"max_tokens": 80, "stop": CONVERSATION_STOPS},
+    "turn": {"max_tokens": 120, "stop": CONVERSATION_STOPS},
+    "confirmation": {"max_tokens": 40, "stop": CONVERSATION_STOPS},
+}
+# Esquemas de salida por tarea: si la respuesta no los cumple, StructuredOutput pide repararla
+CRITERION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"enum": ["select", "modify", *NULLS]},
+        "field": {"enum": [*JOINT_CRITERIA, *NULLS]},
+        "value": {"type": ["string", "null"]},
+    },
+    "required": ["action", "field", "value"],
+}
+TURN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intention": {"enum": sorted(VALID_INTENTS)},
+        **CRITERION_SCHEMA["properties"],
+        "confirmation": {"enum": ["yes", "no", *NULLS]},
+    },
+    "required": ["intention", "action", "field", "value"],
+}
+
+def turn_schema(criteria_names: List[str]) -> Dict[str, Any]:
+    """
+    TURN_SCHEMA con `field` limitado a los criterios de la tabla del prompt.
+    """
+    properties = {**TURN_SCHEMA["properties"], "field": {"enum": [*criteria_names, *NULLS]}}
+    return {**TURN_SCHEMA, "properties": properties}
+CONFIRMATION_SCHEMA = {
+    "type": "object",
+    "properties": {"confirmation": {"enum": ["yes", "no", *NULLS]}},
+    "required": ["confirmation"],
+}
+
 class ArgumentClassifier():
-    def __init__(self, llm : LLMInterface = GEMMA(), repository: ScholarshipRepository = PrologConnector()):
-        self.llm = llm
-        self.repository = repository
+    def __init__(self, llm : LLMInterface = None, repository: ScholarshipRepository = None):
+        self.llm = llm or CachedLLM(GEMMA(json_mode=True), db_path=DEFAULT_LLM_CACHE_DB)
+        self.repository = repository or CachedScholarshipRepository(PrologConnector())
+        # JSON validado por tarea, con reintentos de reparación y métricas de fallos
+        self.structured = StructuredOutput(self.llm)
         self.posibles_tipos_beca_criterio = []   
         # if self.prolog_connector:
         #     try:
@@ -106,15 +154,7 @@ JSON de salida:
     "value":  "ID_OPCION_VALIDA_O_NULL"
 }}
 --------------------------------------------------------------------
-### 2 · Tabla de criterios y valores permitidos
-| field            | valores válidos (ID exacto)                              |
-{criteria_table}
-|------------------|----------------------------------------------------------|
-Si el `value` propuesto **no** aparece en la columna del `field` elegido,
-responde con los tres `null`.
---------------------------------------------------------------------
-
-### 3 · Reglas de interpretación
+### 2 · Reglas de interpretación
 
 1. **Selección de criterio**
     - Si el usuario **elige** claramente una de las opciones (nombre    
@@ -125,7 +165,7 @@ responde con los tres `null`.
         devuelve todo `null`.
 --------------------------------------------------------------------
 
-### 4 · Check-list antes de responder 
+### 3 · Check-list antes de responder 
 
 1. ¿`action` ∈ {{ select, null}}?  
 2. Si `action` ≠ null:  
@@ -133,7 +173,7 @@ responde con los tres `null`.
    - ¿`value` está en la columna correcta?  
 3. Si falla cualquier punto → devuelve los tres `null`.
 --------------------------------------------------------------------
-### 5 · Ejemplos de uso
+### 4 · Ejemplos de uso
 **Ejemplo A — Selección**
 Mensaje:
 Usuario: Quiero buscar un beca para mi grado
@@ -155,6 +195,13 @@ Usuario: Quiero buscar un beca
     "value": null
 }}
 --------------------------------------------------------------------
+### 5 · Tabla de criterios y valores permitidos
+| field            | valores válidos (ID exacto)                              |
+{criteria_table}
+|------------------|----------------------------------------------------------|
+Si el `value` propuesto **no** aparece en la columna del `field` elegido,
+responde con los tres `null`.
+--------------------------------------------------------------------
 Mensaje del usuario:
 \"\"\"\n
 {context}
@@ -176,17 +223,7 @@ JSON de salida:
 
 
 --------------------------------------------------------------------
-### 2 · Tabla de criterios y valores permitidos
-
-| field            | valores válidos (ID exacto)                              |
-|------------------|----------------------------------------------------------|
-{criteria_table}
-
-Si el `value` propuesto **no** aparece en la columna del `field` elegido,
-responde con los tres `null`.
-
---------------------------------------------------------------------
-### 3 · Reglas de interpretación
+### 2 · Reglas de interpretación
 
 1. **Pregunta**  
    - Si el mensaje acaba en “?” o empieza por “qué”, “cómo”, “cuándo”,  
@@ -211,7 +248,7 @@ responde con los tres `null`.
      desambigue claramente.
 
 --------------------------------------------------------------------
-### 4 · Detección de frases de CAMBIO
+### 3 · Detección de frases de CAMBIO
 
 Patrones típicos → acción **modificar**  
 • “cambia … a …” · “cambia … por …”  
@@ -220,7 +257,7 @@ El valor que sigue a “a/por” es el **nuevo** `value`.
 Nunca devuelvas el valor antiguo.
 
 --------------------------------------------------------------------
-### 5 · Check-list antes de responder 
+### 4 · Check-list antes de responder 
 
 1. ¿`action` ∈ {{modify, select, null}}?  
 2. Si `action` ≠ null:  
@@ -229,7 +266,7 @@ Nunca devuelvas el valor antiguo.
 3. Si falla cualquier punto → devuelve los tres `null`.
 
 --------------------------------------------------------------------
-### 6 · Ejemplos de uso
+### 5 · Ejemplos de uso
 
 **Ejemplo A — Selección**
 
@@ -297,6 +334,16 @@ json
   "value": null
 }}
 
+--------------------------------------------------------------------
+### 6 · Tabla de criterios y valores permitidos
+
+| field            | valores válidos (ID exacto)                              |
+|------------------|----------------------------------------------------------|
+{criteria_table}
+
+Si el `value` propuesto **no** aparece en la columna del `field` elegido,
+responde con los tres `null`.
+
 --------------------------------------------------------------------
 Mensaje del usuario:
 \"\"\"\n
@@ -310,6 +357,72 @@ JSON de salida:
 
 
 
+        # Intención + criterio + confirmación en una sola llamada (extract_turn)
+        self.joint_turn = """
+Analiza el último mensaje del usuario en una búsqueda guiada de becas y
+devuelve en un único JSON su intención, el criterio que elige o cambia y,
+si se le ha pedido confirmar la búsqueda, si confirma.
+
+### 1 · Plantilla de salida (OBLIGATORIA)
+{{
+  "intention": "buscar_por_criterio | info_beca | explicar_termino | general_qa",
+  "action": "select | modify | null",
+  "field": "criterio_o_null",
+  "value": "ID_OPCION_VALIDA_O_NULL",
+  "confirmation": "yes | no | null"
+}}
+--------------------------------------------------------------------
+### 2 · Intenciones
+- `buscar_por_criterio`: busca becas, responde a la pregunta de un criterio o lo cambia.
+- `info_beca`: pregunta por una beca concreta (plazos, requisitos, enlace).
+- `explicar_termino`: pide la definición de un término ("¿qué es mérito académico?").
+- `general_qa`: dudas generales sobre el proceso, sin buscar becas.
+--------------------------------------------------------------------
+### 3 · Criterios (tabla de valores permitidos en la sección 6)
+- Si el usuario **elige** una opción ⇒ `"action": "select"`, `"field"` y `"value"` de la tabla.
+- Si quiere **cambiar** un valor ya elegido ("cambia … a …") ⇒ `"action": "modify"` con el valor nuevo.
+- “otro” en el sentido de “lo que sea” es `"cualquiera"`.
+- Si es una pregunta, no menciona valores de la tabla o el valor no está en
+  la columna de su `field` ⇒ `action`, `field` y `value` a `null`.
+--------------------------------------------------------------------
+### 4 · Confirmación
+- Si se ha pedido confirmar la búsqueda: `"yes"` si el usuario acepta, `"no"` si rechaza o quiere cambiar algo.
+- Si no se ha pedido o no está claro: `null`.
+--------------------------------------------------------------------
+### 5 · Ejemplos
+Asistente: ¿Para qué nivel educativo es la beca?
+Usuario: para un máster
+{{"intention": "buscar_por_criterio", "action": "select", "field": "nivel", "value": "posgrado", "confirmation": null}}
+
+Asistente: ¿Es todo correcto para que proceda con la búsqueda?
+Usuario: no, cambia el organismo a estatal
+{{"intention": "buscar_por_criterio", "action": "modify", "field": "organismo", "value": "publico_estatal", "confirmation": "no"}}
+
+Usuario: ¿qué es una beca completa?
+{{"intention": "explicar_termino", "action": null, "field": null, "value": null, "confirmation": null}}
+--------------------------------------------------------------------
+### 6 · Tabla de criterios y valores permitidos
+| field            | valores válidos (ID exacto)                              |
+|------------------|----------------------------------------------------------|
+{criteria_table}
+--------------------------------------------------------------------
+Intención anterior: {last_intention}
+¿Se ha pedido confirmar la búsqueda?: {awaiting_confirmation}
+Conversación:
+\"\"\"
+{context}
+\"\"\"
+
+JSON de salida:
+"""
+
+    def prompt_prefixes(self) -> List[str]:
+        """
+        Parte fija de los prompts, para precalentarla en Ollama al arrancar.
+        """
+        templates = [self.criterion_response, self.initial_criteria, self.joint_turn, self.interpret_confirmation]
+        return [static_prefix(t) for t in templates]
+
     def _extract_json(self, text: str, key: str = None) -> Optional[Any]:
         """
         Extrae el primer bloque JSON bien formado del texto.
@@ -347,19 +460,23 @@ JSON de salida:
         except json.JSONDecodeError:
             logger.error(f"JSON decoding failed: {json_str}")
             return None
-    def build_criteria_table(self,criteria_names: list[str]) -> str:
+    def build_criteria_table(self,criteria_names: list[str], options: Optional[Dict[str, List[str]]] = None) -> str:
         """
         Devuelve las filas Markdown:
         | **organismo** | internacional · publico_estatal · publico_local |
+        Si ya se tienen las opciones de cada criterio, se pasan en `options`.
         """
-        rows = []
-        for crit in criteria_names:
+        # Una sola consulta a Prolog para todos los criterios de la tabla
+        if options is None:
             try:
-                opts = self.repository.get_criteria(crit)
+                options = self.repository.get_criteria_many(list(criteria_names))
             except Exception as e:
-                logger.warning(f"No se pudieron obtener opciones de {crit}: {e}")
-                opts = []
+                logger.warning(f"No se pudieron obtener opciones de {criteria_names}: {e}")
+                options = {}
 
+        rows = []
+        for crit in criteria_names:
+            opts = options.get(crit, [])
             opts_md = " · ".join(opts) if opts else "(sin opciones)"
             rows.append(f"| **{crit}** | {opts_md} |")
 
@@ -371,10 +488,10 @@ JSON de salida:
             criteria_table=available_options,
             context=context or "",
         )
-        raw_response = self.llm.generate(prompt)
-        extracted = self._extract_json(raw_response)
-        if not isinstance(extracted, dict):
-            logger.error(f"No se extrajo JSON válido del LLM. Raw: {raw_response}")
+        extracted = self.structured.generate(
+            "classify_criterion_response", prompt, CRITERION_SCHEMA, **JSON_LIMITS["criterion"]
+        )
+        if extracted is None:
             return {"action": None, "field": None, "value": None}
 
         result = {k: (None if extracted.get(k) in [None, "null"] else extracted.get(k))
@@ -392,17 +509,67 @@ JSON de salida:
             criteria_table=available_options,
             context=context or "",
         )
-        raw_response = self.llm.generate(prompt)
-        extracted = self._extract_json(raw_response)
-
-        if not isinstance(extracted, dict):
-            logger.error(f"No se extrajo JSON válido del LLM. Raw: {raw_response}")
+        extracted = self.structured.generate(
+            "extract_initial_criteria", prompt, CRITERION_SCHEMA, **JSON_LIMITS["criterion"]
+        )
+        if extracted is None:
             return {"action": None, "field": None, "value": None}
 
         result = {k: (None if extracted.get(k) in [None, "null"] else extracted.get(k))
                   for k in ["action", "field", "value"]}
         return result
 
+    def extract_turn(
+        self,
+        context: Optional[str] = None,
+        last_intention: Optional[str] = None,
+        awaiting_confirmation: bool = False,
+        criteria_names: List[str] = JOINT_CRITERIA,
+    ) -> dict:
+        """
+        Una sola llamada al LLM para un turno de la búsqueda por criterios, en
+        lugar de classify_intention + extract_initial_criteria /
+        classify_criterion_response / detect_confirmation.
+        Devuelve {"intention", "criterion": {"action", "field", "value"}, "confirmation"};
+        "intention" es None si el modelo no devolvió una intención válida.
+        """
+        try:
+            options = self.repository.get_criteria_many(list(criteria_names))
+        except Exception as e:
+            logger.warning(f"No se pudieron obtener opciones de {criteria_names}: {e}")
+            options = {}
+        prompt = self.joint_turn.format(
+            criteria_table=self.build_criteria_table(criteria_names, options),
+            context=context or "",
+            last_intention=last_intention,
+            awaiting_confirmation="sí" if awaiting_confirmation else "no",
+        )
+        extracted = self.structured.generate(
+            "extract_turn", prompt, turn_schema(list(criteria_names)), **JSON_LIMITS["turn"]
+        ) or {}
+
+        def clean(key):
+            value = extracted.get(key)
+            return None if value in (None, "null", "") else value
+
+        intention = clean("intention")
+        if intention not in VALID_INTENTS:
+            intention = None
+
+        criterion = {k: clean(k) for k in ("action", "field", "value")}
+        if (criterion["action"] not in ("select", "modify")
+                or criterion["field"] not in criteria_names
+                or criterion["value"] not in options.get(criterion["field"], [])):
+            if criterion["action"] is not None:
+                logger.warning(f"Criterio no válido en la respuesta conjunta: {criterion}")
+            criterion = {"action": None, "field": None, "value": None}
+
+        confirmation = clean("confirmation") if awaiting_confirmation else None
+        if confirmation not in ("yes", "no"):
+            confirmation = None
+
+        return {"intention": intention, "criterion": criterion, "confirmation": confirmation}
+
     def detect_confirmation(self, context: str) -> dict:
         """
         Usa el LLM para interpretar si el usuario confirma ("si") o niega ("no").
@@ -413,11 +580,10 @@ JSON de salida:
             context=context or "",
         )
 
-        raw_response = self.llm.generate(prompt)
-        extracted_data = self._extract_json(raw_response)
-        
-        if not isinstance(extracted_data, dict):
-            logger.warning(f"Confirmación no es objeto JSON: {extracted_data!r}")
+        extracted_data = self.structured.generate(
+            "detect_confirmation", prompt, CONFIRMATION_SCHEMA, **JSON_LIMITS["confirmation"]
+        )
+        if extracted_data is None:
             return {"confirmation": None}
         
         conf = extracted_data.get("confirmation")
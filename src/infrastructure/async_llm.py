@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from domain.interfaces import AsyncLLMInterface, LLMInterface
+from infrastructure.llm_cache import generation_options, prompt_key
+from infrastructure.prolog_metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Peticiones simultáneas a Ollama (OLLAMA_NUM_PARALLEL por defecto es 4)
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+class FairLimiter:
+    """
+    Semáforo asyncio estrictamente FIFO: al liberar un hueco se entrega al
+    primero de la cola, sin que una petición recién llegada se lo adelante.
+    Guarda la profundidad de la cola y el tiempo de espera de cada petición.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("El límite de peticiones en curso debe ser al menos 1")
+        self.limit = limit
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.wait = LatencyHistogram()
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        start = time.perf_counter()
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.cancelled():
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                else:
+                    # Se canceló justo después de recibir el hueco: se pasa al siguiente
+                    self.release()
+                raise
+        self.wait.observe(time.perf_counter() - start)
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # El hueco pasa directamente al siguiente: in_flight no cambia
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    async def __aenter__(self) -> "FairLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+
+class AsyncLLMClient(AsyncLLMInterface):
+    """
+    Cliente asyncio de un LLMInterface (GEMMA, LLAMA) para la carga
+    concurrente: como mucho `max_in_flight` peticiones a Ollama a la vez, en
+    orden de llegada, y las llamadas simultáneas con el mismo prompt
+    (mismo modelo, opciones e historial) comparten una sola petición.
+
+    Usa `ainvoke` del cliente de LangChain si lo tiene; si no, `generate` en
+    un hilo.
+    """
+
+    def __init__(self, llm: LLMInterface, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.llm = llm
+        self.error_response = llm.error_response
+        self.options = generation_options(llm)
+        self.limiter = FairLimiter(max_in_flight)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.latency = LatencyHistogram()
+
+    async def generate(self, prompt: str, history: Optional[List[Tuple[str, str]]] = None) -> str:
+        self.requests += 1
+        key = prompt_key(self.options, prompt, history)
+        task = self._pending.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._limited(prompt, history))
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield: si un llamante se cancela, la petición sigue para los demás
+        return await asyncio.shield(task)
+
+    async def _limited(self, prompt: str, history: Optional[List[Tuple[str, str]]]) -> str:
+        async with self.limiter:
+            self.upstream_calls += 1
+            start = time.perf_counter()
+            try:
+                return await self._upstream(prompt, history)
+            finally:
+                self.latency.observe(time.perf_counter() - start)
+
+    async def _upstream(self, prompt: str, history: Optional[List[Tuple[str, str]]]) -> str:
+        client = getattr(self.llm, "llm", None)
+        if not hasattr(client, "ainvoke"):
+            return await asyncio.to_thread(self.llm.generate, prompt, history)
+        logger.debug(f"LLM prompt (async): {prompt}")
+        try:
+            response = await client.ainvoke(prompt)
+            return response.strip()
+        except Exception as e:
+            logger.error(f"Error generando texto en AsyncLLMClient: {e}")
+            return self.error_response
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if self._pending.get(key) is task:
+            del self._pending[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.options.get("model"),
+            "max_in_flight": self.limiter.limit,
+            "in_flight": self.limiter.in_flight,
+            "queue_depth": self.limiter.queue_depth,
+            "max_queue_depth": self.limiter.max_queue_depth,
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "wait": self.limiter.wait.as_dict(),
+            "latency": self.latency.as_dict(),
+        }
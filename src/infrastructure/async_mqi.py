@@ -0,0 +1,344 @@
+import asyncio
+import json
+import logging
+import secrets
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from swiplserver import (
+    PrologConnectionFailedError,
+    PrologError,
+    PrologLaunchError,
+    PrologNoQueryError,
+    PrologQueryCancelledError,
+    PrologQueryTimeoutError,
+    PrologResultNotAvailableError,
+    prolog_args,
+    prolog_name,
+)
+
+from infrastructure.kb_snapshot import KBSnapshot
+from infrastructure.prolog_pool import PoolClosedError
+
+logger = logging.getLogger(__name__)
+
+_CONNECT_RETRIES = 3
+# Espera máxima (s) a que el MQI confirme el "close" de la conexión
+CLOSE_TIMEOUT = 1.0
+
+_EXCEPTIONS = {
+    "connection_failed": PrologConnectionFailedError,
+    "time_limit_exceeded": PrologQueryTimeoutError,
+    "no_query": PrologNoQueryError,
+    "cancel_goal": PrologQueryCancelledError,
+    "result_not_available": PrologResultNotAvailableError,
+}
+
+
+def parse_answer(answer: dict) -> Any:
+    """
+    Traduce una respuesta JSON del MQI al mismo formato que PrologThread.query
+    de swiplserver (False, True, lista de dicts o None) o lanza su excepción.
+    """
+    if prolog_name(answer) == "exception":
+        reason = answer["args"][0]
+        if reason == "no_more_results":
+            return None
+        if not isinstance(reason, str):
+            raise PrologError(answer)
+        raise _EXCEPTIONS.get(reason, PrologError)(answer)
+    if prolog_name(answer) == "false":
+        return False
+    if prolog_name(answer) == "true":
+        solutions = []
+        for solution in prolog_args(answer)[0]:
+            if not solution:
+                solutions.append(True)
+            else:
+                solutions.append({prolog_args(b)[0]: prolog_args(b)[1] for b in solution})
+        return True if solutions == [True] else solutions
+    return answer
+
+
+class AsyncPrologThread:
+    """
+    Cliente asyncio del protocolo MQI de SWI-Prolog sobre un socket TCP local.
+
+    Los mensajes tienen el formato `<bytes>.\\n<texto>.\\n`; el servidor puede
+    intercalar latidos (".") mientras una consulta sigue en marcha.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        # Como en PrologThread: si el servidor ya no responde, close() solo cierra el socket
+        self.connection_failed = False
+
+    @classmethod
+    async def connect(cls, port: int, password: str, host: str = "127.0.0.1") -> "AsyncPrologThread":
+        for attempt in range(_CONNECT_RETRIES):
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                break
+            except ConnectionRefusedError:
+                # El MQI puede tardar un instante en empezar a escuchar
+                if attempt == _CONNECT_RETRIES - 1:
+                    raise
+                await asyncio.sleep(1)
+        thread = cls(reader, writer)
+        await thread._send(password)
+        answer = json.loads(await thread._receive())
+        if prolog_name(answer) != "true":
+            raise PrologLaunchError(f"Failed to accept password: {answer}")
+        return thread
+
+    async def query(self, goal: str, timeout: Optional[float] = None) -> Any:
+        goal = goal.strip().rstrip("\n.")
+        timeout_str = "_" if timeout is None else str(timeout)
+        await self._send(f"run(({goal}), {timeout_str})")
+        return parse_answer(json.loads(await self._receive()))
+
+    async def iter_query(self, goal: str, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        Soluciones del goal de una en una (run_async sin findall), igual que
+        PrologWorker.iter_query. Si se cierra antes del final, cancela la consulta.
+        """
+        goal = goal.strip().rstrip("\n.")
+        timeout_str = "_" if timeout is None else str(timeout)
+        await self._send(f"run_async(({goal}), {timeout_str}, false)")
+        parse_answer(json.loads(await self._receive()))
+        finished = False
+        try:
+            while True:
+                try:
+                    answer = await self._async_result()
+                except PrologError:
+                    finished = True
+                    raise
+                if answer is None:
+                    finished = True
+                    return
+                if answer is False:
+                    continue
+                yield answer[0] if isinstance(answer, list) else answer
+        finally:
+            if not finished:
+                await self._cancel_async()
+
+    async def _async_result(self) -> Any:
+        await self._send("async_result(-1)")
+        return parse_answer(json.loads(await self._receive()))
+
+    async def _cancel_async(self) -> None:
+        try:
+            await self._send("cancel_async")
+            parse_answer(json.loads(await self._receive()))
+        except PrologError:
+            # La consulta ya había terminado
+            pass
+        try:
+            while await self._async_result() is not None:
+                pass
+        except PrologError:
+            pass
+
+    async def close(self, timeout: float = CLOSE_TIMEOUT) -> None:
+        if not self.connection_failed:
+            try:
+                await self._send("close")
+                await asyncio.wait_for(self._receive(), timeout)
+            except Exception as e:
+                logger.debug(f"Error al cerrar la conexión MQI: {e}")
+        self._writer.close()
+        try:
+            await asyncio.wait_for(self._writer.wait_closed(), timeout)
+        except Exception:
+            pass
+
+    async def halt_server(self) -> None:
+        await self._send("quit")
+        await self._receive()
+
+    async def _send(self, value: str) -> None:
+        value = value.strip().rstrip("\n.") + ".\n"
+        data = value.encode("utf-8")
+        self._writer.write(f"{len(data)}.\n".encode("utf-8") + data)
+        await self._writer.drain()
+
+    async def _receive(self) -> str:
+        header = await self._reader.readuntil(b".\n")
+        length = int(header[:-2].lstrip(b"."))
+        body = await self._reader.readexactly(length)
+        return body.decode("utf-8")[:-2]
+
+
+class AsyncPrologWorker:
+    """
+    Proceso swipl con el MQI arrancado y la KB cargada, manejado sin bloquear el event loop.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process, thread: AsyncPrologThread):
+        self._process = process
+        self._thread = thread
+        self._drain = asyncio.ensure_future(self._drain_stdout())
+        self.load_mode = "source"
+        self.journal_seq = 0
+
+    @classmethod
+    async def start(cls, kb_path: str, snapshot: Optional[KBSnapshot] = None) -> "AsyncPrologWorker":
+        password = secrets.token_urlsafe(16)
+        process = await asyncio.create_subprocess_exec(
+            "swipl", "--quiet", "-g", "mqi_start", "-t", "halt", "--",
+            "--write_connection_values=true", f"--password={password}",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            port_line = await process.stdout.readline()
+            await process.stdout.readline()  # el MQI repite la contraseña
+            if not port_line:
+                raise PrologLaunchError("no port found in stdout")
+            thread = await AsyncPrologThread.connect(int(port_line.decode().strip()), password)
+        except BaseException:
+            process.kill()
+            raise
+        worker = cls(process, thread)
+        try:
+            await worker._load_kb(kb_path, snapshot)
+        except BaseException:
+            await worker.stop()
+            raise
+        return worker
+
+    async def query(self, goal: str, timeout: Optional[float] = None) -> Any:
+        return await self._thread.query(goal, timeout)
+
+    def iter_query(self, goal: str, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        return self._thread.iter_query(goal, timeout)
+
+    async def stop(self) -> None:
+        """
+        Termina el proceso swipl y cierra la conexión, como PrologWorker.stop.
+
+        El proceso se mata primero y sin despedirse por el socket: si está
+        colgado (p. ej. tras cancelar una consulta por timeout), ni "quit" ni
+        "close" tendrían respuesta y el hueco del pool quedaría ocupado.
+        """
+        self._thread.connection_failed = True
+        if self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        await self._thread.close()
+        self._drain.cancel()
+
+    async def _load_kb(self, kb_path: str, snapshot: Optional[KBSnapshot]) -> None:
+        # La compilación del .qlf la hacen los workers síncronos; aquí solo se
+        # aprovecha si ya está al día.
+        if snapshot is not None and snapshot.is_current():
+            try:
+                await self.query(f"load_files('{snapshot.qlf_path().as_posix()}', [])")
+                self.load_mode = "qlf"
+                return
+            except PrologError as e:
+                logger.warning(f"No se pudo cargar el snapshot de la KB: {e}")
+        await self.query(f"consult('{kb_path}')")
+
+    async def _drain_stdout(self) -> None:
+        # Evita que swipl se bloquee si la KB escribe por salida estándar
+        while await self._process.stdout.read(4096):
+            pass
+
+
+class AsyncPrologPool:
+    """
+    Pool asíncrono de AsyncPrologWorker con concurrencia acotada a `size`.
+
+    La cola contiene workers libres o huecos (None) para lanzar uno nuevo, así
+    que las peticiones esperan en orden de llegada sin ocupar ningún hilo.
+    """
+
+    def __init__(self, factory: Callable[[], Awaitable[AsyncPrologWorker]], size: int):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self._factory = factory
+        self.size = size
+        self._slots: Optional[asyncio.Queue] = None
+        self._closed = False
+        self.recycled = 0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[AsyncPrologWorker]:
+        worker = await self._checkout()
+        try:
+            yield worker
+        except PrologError as e:
+            if isinstance(e, PrologConnectionFailedError):
+                await self._discard(worker)
+            else:
+                self._release(worker)
+            raise
+        except GeneratorExit:
+            # Se cerró un generador asíncrono que tenía el worker prestado
+            self._release(worker)
+            raise
+        except BaseException:
+            await self._discard(worker)
+            raise
+        else:
+            self._release(worker)
+
+    async def close(self) -> None:
+        """
+        Detiene los workers libres; los prestados se detienen al devolverse.
+        Quien esté esperando un worker recibe PoolClosedError.
+        """
+        self._closed = True
+        if self._slots is None:
+            return
+        while not self._slots.empty():
+            worker = self._slots.get_nowait()
+            if worker is not None:
+                await worker.stop()
+        # Despierta al primero que espera; este despierta al siguiente
+        self._slots.put_nowait(None)
+
+    def stats(self) -> dict:
+        slots = self._queue()
+        return {"size": self.size, "available": slots.qsize(), "recycled": self.recycled}
+
+    def _queue(self) -> asyncio.Queue:
+        # La cola se crea dentro del event loop que la va a usar
+        if self._slots is None:
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(None)
+        return self._slots
+
+    async def _checkout(self) -> AsyncPrologWorker:
+        if self._closed:
+            raise PoolClosedError("El pool de Prolog está cerrado")
+        slot = await self._queue().get()
+        if self._closed:
+            self._queue().put_nowait(None)
+            if slot is not None:
+                await slot.stop()
+            raise PoolClosedError("El pool de Prolog está cerrado")
+        if slot is not None:
+            return slot
+        try:
+            return await self._factory()
+        except BaseException:
+            self._queue().put_nowait(None)
+            raise
+
+    def _release(self, worker: AsyncPrologWorker) -> None:
+        if self._closed:
+            asyncio.ensure_future(worker.stop())
+            return
+        self._queue().put_nowait(worker)
+
+    async def _discard(self, worker: AsyncPrologWorker) -> None:
+        if not self._closed:
+            self.recycled += 1
+            self._queue().put_nowait(None)
+        await worker.stop()
@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from domain.entities import FilterCriteria, Scholarship, ScholarshipPage
+from domain.interfaces import AsyncScholarshipRepository
+from infrastructure.async_mqi import AsyncPrologPool, AsyncPrologWorker
+from infrastructure.kb_journal import KBJournal, replay_goal
+from infrastructure.kb_reload import DEFAULT_WATCH_INTERVAL, AsyncKBWatcher, ReloadStats
+from infrastructure.kb_snapshot import KBSnapshot, kb_hash
+from infrastructure.prolog_connector import (
+    DEFAULT_KB_PATH,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_QUERY_TIMEOUT,
+    KB_CHECK_GOAL,
+    GoalResult,
+    NoResultsError,
+    PrologConnectorError,
+    batch_goal,
+    batch_template,
+    criteria_goal,
+    criteria_values,
+    filter_rows,
+    page_of,
+    measured,
+    parse_batch,
+    query_outcome,
+    scholarship_from_row,
+    translate_error,
+)
+from infrastructure.prolog_metrics import DEFAULT_SLOW_QUERY_THRESHOLD, PrologMetrics, goal_template
+from infrastructure.prolog_pool import DEFAULT_POOL_SIZE, HUNG_WORKER_GRACE, PoolClosedError
+from infrastructure.scholarship_index import (
+    INDEX_GOALS,
+    PAGE_VARS,
+    ScholarshipIndex,
+    buscar_beca_page_goal,
+    criteria_to_filters,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPrologService:
+    """
+    Equivalente asíncrono de PrologService: las consultas viajan por sockets
+    asyncio a un pool de procesos swipl, con como mucho `max_concurrency`
+    consultas en curso a la vez. Los plazos funcionan como en PrologService: si
+    el worker no contesta tras el margen de gracia, se descarta. La KB se
+    recarga en caliente igual que en PrologService (`reload`, `watch`).
+    """
+
+    def __init__(
+        self,
+        kb_path: Path = DEFAULT_KB_PATH,
+        max_concurrency: int = DEFAULT_POOL_SIZE,
+        use_snapshot: bool = True,
+        snapshot_dir: Optional[Path] = None,
+        query_timeout: Optional[float] = DEFAULT_QUERY_TIMEOUT,
+        slow_query_threshold: Optional[float] = DEFAULT_SLOW_QUERY_THRESHOLD,
+    ):
+        self.kb_path = Path(kb_path)
+        if not self.kb_path.exists():
+            raise FileNotFoundError(f"KB not found at: {self.kb_path}")
+        self.path_str = self.kb_path.resolve().as_posix()
+        self.snapshot = KBSnapshot(self.kb_path, snapshot_dir) if use_snapshot else None
+        self.kb_version = kb_hash(self.kb_path)
+        # Cambios en tiempo de ejecución hechos con PrologService.apply
+        self.journal = KBJournal.for_kb(self.kb_path)
+        self.query_timeout = query_timeout
+        self.metrics = PrologMetrics(slow_query_threshold)
+        self.max_concurrency = max_concurrency
+        self.reload_stats = ReloadStats()
+        self._reload_lock = asyncio.Lock()
+        self._watcher: Optional[AsyncKBWatcher] = None
+        self._pool = self._create_pool()
+
+    def _create_pool(self) -> AsyncPrologPool:
+        return AsyncPrologPool(factory=self._create_worker, size=self.max_concurrency)
+
+    async def _create_worker(self) -> AsyncPrologWorker:
+        start = time.perf_counter()
+        worker = await AsyncPrologWorker.start(self.path_str, snapshot=self.snapshot)
+        try:
+            worker.journal_seq = self.journal.base_seq
+            await self._sync(worker)
+        except BaseException:
+            await worker.stop()
+            raise
+        self.metrics.record_load(worker.load_mode, time.perf_counter() - start)
+        return worker
+
+    async def _sync(self, worker: AsyncPrologWorker, timeout: Optional[float] = None) -> None:
+        entries = self.journal.since(worker.journal_seq)
+        if entries:
+            await worker.query(replay_goal(entries), timeout)
+            worker.journal_seq = entries[-1].seq
+
+    @property
+    def version(self) -> str:
+        """
+        Igual que PrologService.version: hash del .pl y última transacción del diario.
+        """
+        seq = self.journal.seq
+        return f"{self.kb_version}+{seq}" if seq else self.kb_version
+
+    async def query(self, goal: str, vars: List[str], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Igual que PrologService.query, pero sin bloquear el event loop. Para
+        cancelar la consulta basta con cancelar la tarea que la espera.
+        """
+        with measured(self.metrics, goal):
+            raw = await self._run(goal, timeout)
+            return filter_rows(goal, raw, vars)
+
+    async def iter_query(self, goal: str, vars: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Igual que PrologService.iter_query: soluciones de una en una.
+        """
+        with measured(self.metrics, goal):
+            try:
+                while True:
+                    pool = self._pool
+                    try:
+                        async with pool.acquire() as worker:
+                            await self._sync(worker, self.query_timeout)
+                            async for answer in worker.iter_query(goal, self.query_timeout):
+                                if not isinstance(answer, dict):
+                                    continue
+                                entry = {v: answer[v] for v in vars if v in answer}
+                                if entry:
+                                    yield entry
+                        return
+                    except PoolClosedError:
+                        # Una recarga cerró el pool antes de prestarnos un worker
+                        if pool is self._pool:
+                            raise
+            except Exception as e:
+                raise translate_error(e) from e
+
+    async def query_many(
+        self, goals: List[Tuple[str, List[str]]], timeout: Optional[float] = None
+    ) -> List[GoalResult]:
+        """
+        Igual que PrologService.query_many: un único viaje para todo el lote.
+        """
+        if not goals:
+            return []
+        goal = batch_goal([goal for goal, _ in goals])
+        with measured(self.metrics, goal, batch_template(goals)):
+            raw = await self._run(goal, timeout)
+            results = parse_batch(goals, raw)
+        for result in results:
+            if not result.ok:
+                self.metrics.count(goal_template(result.goal), query_outcome(result.error))
+        return results
+
+    async def _run(self, goal: str, timeout: Optional[float] = None) -> Any:
+        timeout = self.query_timeout if timeout is None else timeout
+        failed = True
+        try:
+            if timeout is None:
+                raw = await self._run_in_pool(goal, None)
+            else:
+                # El plazo de Prolog aborta el goal; el de asyncio cubre la espera
+                # por un worker y los procesos colgados (el worker se descarta)
+                raw = await asyncio.wait_for(self._run_in_pool(goal, timeout), timeout + HUNG_WORKER_GRACE)
+            failed = False
+            return raw
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise translate_error(e) from e
+        finally:
+            self.reload_stats.record_query(failed)
+
+    async def _run_in_pool(self, goal: str, timeout: Optional[float]) -> Any:
+        while True:
+            pool = self._pool
+            try:
+                async with pool.acquire() as worker:
+                    await self._sync(worker, timeout)
+                    return await worker.query(goal, timeout)
+            except PoolClosedError:
+                # Si una recarga sustituyó el pool mientras esperábamos un
+                # worker, reintentamos en el nuevo
+                if pool is self._pool:
+                    raise
+
+    async def reload(self) -> bool:
+        """
+        Igual que PrologService.reload: arranca un pool nuevo con la versión
+        actual del fichero, lo valida y lo sustituye por el anterior. Las
+        consultas en curso terminan en los workers antiguos.
+        Returns:
+            True si se cambió de versión; False si la KB no había cambiado o si
+            la nueva no es válida (se sigue sirviendo la anterior).
+        """
+        async with self._reload_lock:
+            new_kb_version = kb_hash(self.kb_path)
+            if new_kb_version == self.kb_version:
+                return False
+            started = time.perf_counter()
+            self.reload_stats.begin()
+            new_pool = self._create_pool()
+            try:
+                async with new_pool.acquire() as worker:
+                    ok = await worker.query(KB_CHECK_GOAL)
+                if ok is not True:
+                    raise PrologConnectorError("La KB no define beca/1 o buscar_beca/7")
+            except Exception as e:
+                await new_pool.close()
+                self.reload_stats.end(time.perf_counter() - started, failed=True)
+                logger.error(f"Recarga de la KB descartada ({new_kb_version[:12]}): {e}")
+                return False
+
+            old_pool, old_version = self._pool, self.version
+            self._pool, self.kb_version = new_pool, new_kb_version
+            await old_pool.close()
+            latency = time.perf_counter() - started
+            self.reload_stats.end(latency)
+            logger.info(f"KB recargada {old_version[:12]} -> {self.version[:12]} en {latency:.3f}s")
+            return True
+
+    def watch(self, interval: float = DEFAULT_WATCH_INTERVAL) -> AsyncKBWatcher:
+        """
+        Vigila el fichero de la KB desde el event loop y la recarga al cambiar.
+        """
+        if self._watcher is None:
+            self._watcher = AsyncKBWatcher(self, interval).start()
+        return self._watcher
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._pool.stats()
+        stats["kb_version"] = self.version
+        stats["reload"] = self.reload_stats.as_dict()
+        stats["queries"] = self.metrics.snapshot()
+        return stats
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            await self._watcher.stop()
+            self._watcher = None
+        await self._pool.close()
+
+
+class AsyncPrologConnector(AsyncScholarshipRepository):
+    """
+    Implementación de AsyncScholarshipRepository usando AsyncPrologService.
+    """
+
+    def __init__(self, service: Optional[AsyncPrologService] = None, kb_path: Path = DEFAULT_KB_PATH):
+        self.service = service or AsyncPrologService(kb_path)
+        self._index: Optional[ScholarshipIndex] = None
+        self._index_version: Optional[str] = None
+        self._index_lock = asyncio.Lock()
+
+    async def get_index(self) -> ScholarshipIndex:
+        """
+        Índice invertido de criterios, construido la primera vez que se necesita
+        y actualizado cuando cambia la versión de la KB (p. ej. tras una escritura).
+        """
+        if self._index is None or self._index_version != self.service.version:
+            async with self._index_lock:
+                version = self.service.version
+                if self._index is None or self._index_version != version:
+                    results = [r.unwrap() for r in await self.service.query_many(INDEX_GOALS)]
+                    if self._index is None:
+                        self._index = ScholarshipIndex.from_results(results)
+                    else:
+                        self._index, _ = self._index.updated(results)
+                    self._index_version = version
+        return self._index
+
+    async def get_criteria(self, criterion: str) -> List[str]:
+        rows = await self.service.query(criteria_goal(criterion), ["Types"])
+        return criteria_values(rows)
+
+    async def get_criteria_many(self, criteria: List[str]) -> Dict[str, List[str]]:
+        """
+        Igual que PrologConnector.get_criteria_many: los criterios sin valores
+        (o con error) se omiten del resultado, y los errores se registran.
+        """
+        results = await self.service.query_many([(criteria_goal(c), ["Types"]) for c in criteria])
+        values = {}
+        for criterion, result in zip(criteria, results):
+            if result.ok:
+                values[criterion] = criteria_values(result.rows)
+            elif not isinstance(result.error, NoResultsError):
+                logger.warning(f"No se pudieron obtener opciones de {criterion}: {result.error}")
+        return values
+
+    async def get_all_scholarship_names(self) -> List[str]:
+        rows = await self.service.query("setof(Name, beca(Name), Names)", ["Names"])
+        return sorted(rows[0]["Names"])
+
+    async def find_by_filters(self, criteria: FilterCriteria) -> List[Scholarship]:
+        index = await self.get_index()
+        return index.find(criteria)
+
+    async def facet_counts(
+        self, criteria: FilterCriteria, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        index = await self.get_index()
+        return index.facets(criteria_to_filters(criteria), fields)
+
+    async def iter_by_filters(
+        self, criteria: FilterCriteria, offset: int = 0, limit: Optional[int] = None
+    ) -> AsyncIterator[Scholarship]:
+        goal = buscar_beca_page_goal(criteria_to_filters(criteria), offset, limit)
+        async for row in self.service.iter_query(goal, PAGE_VARS):
+            yield scholarship_from_row(row)
+
+    async def find_page(
+        self, criteria: FilterCriteria, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE
+    ) -> ScholarshipPage:
+        items = [s async for s in self.iter_by_filters(criteria, offset, limit + 1)]
+        return page_of(items, offset, limit, self.service.version)
+
+    async def close(self) -> None:
+        await self.service.close()
@@ -0,0 +1,185 @@
+import logging
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from infrastructure.name_index import normalize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.85
+DEFAULT_INTENT_CACHE_SIZE = 2048
+# Dimensión de los vectores (hashing trick): no hace falta un vocabulario fijo
+DEFAULT_VECTOR_DIM = 1 << 11
+NGRAM_SIZES = (2, 3, 4)
+
+
+def char_ngrams(text: str, sizes: Tuple[int, ...] = NGRAM_SIZES) -> List[str]:
+    """
+    N-gramas de caracteres del texto normalizado, con un espacio de relleno
+    a cada lado para que cuenten los comienzos y finales de palabra.
+    """
+    padded = f" {normalize(text)} "
+    return [padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1)]
+
+
+def hashed_tf(text: str, dim: int = DEFAULT_VECTOR_DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Frecuencias de los n-gramas de `text` en un vector de `dim` columnas
+    (hashing trick), en forma dispersa: (columnas, valores).
+    """
+    columns = np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) % dim for gram in char_ngrams(text)), dtype=np.int64
+    )
+    columns, counts = np.unique(columns, return_counts=True)
+    # TF sublineal: un n-grama repetido no domina el vector
+    return columns, np.log1p(counts).astype(np.float32)
+
+
+class IntentSimilarityCache:
+    """
+    Caché por vecino más próximo de las decisiones de intención del LLM.
+
+    Cada mensaje ya clasificado se guarda como vector TF-IDF de n-gramas de
+    caracteres (normalizado a norma 1) junto con la intención anterior de la
+    conversación y la intención que devolvió el modelo. Un mensaje nuevo con
+    la misma intención anterior y similitud coseno >= `threshold` con alguno
+    guardado reutiliza esa decisión sin llamar al LLM.
+
+    Los IDF se recalculan, y los vectores guardados con ellos, cada vez que el
+    número de entradas se duplica. Con la caché llena se reemplaza la entrada
+    que lleva más tiempo sin acertar.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        maxsize: int = DEFAULT_INTENT_CACHE_SIZE,
+        dim: int = DEFAULT_VECTOR_DIM,
+    ):
+        if maxsize < 1:
+            raise ValueError("El tamaño de la caché debe ser al menos 1")
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.dim = dim
+        # TF de cada entrada en forma dispersa (columnas, valores), para recalcular los IDF
+        self._tf: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._idf = np.ones(dim, dtype=np.float32)
+        self._fitted_at = 0
+        self._rows: Dict[Tuple[str, Optional[str]], int] = {}
+        self._texts: List[str] = []
+        self._previous: List[Optional[str]] = []
+        self._intents: List[str] = []
+        self._last_used: List[int] = []
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _vector(self, tf: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        columns, values = tf
+        vector = np.zeros(self.dim, dtype=np.float32)
+        vector[columns] = values * self._idf[columns]
+        return self._unit(vector)
+
+    @staticmethod
+    def _unit(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _refit(self) -> None:
+        size = len(self._intents)
+        self._idf = (np.log((1 + size) / (1 + self._df)) + 1).astype(np.float32)
+        for row, tf in enumerate(self._tf):
+            self._vectors[row] = self._vector(tf)
+        self._fitted_at = size
+
+    # ------------------------------------------------------------------
+    def lookup(self, text: str, previous_intent: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """
+        (intención, similitud) de la entrada más parecida con la misma
+        intención anterior, o None si ninguna llega al umbral.
+        """
+        tf = hashed_tf(text, self.dim)
+        with self._lock:
+            size = len(self._intents)
+            if size:
+                query = self._vector(tf)
+                scores = self._vectors[:size] @ query
+                same_context = np.fromiter(
+                    (p == previous_intent for p in self._previous), dtype=bool, count=size
+                )
+                scores[~same_context] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    self._clock += 1
+                    self._last_used[best] = self._clock
+                    return self._intents[best], float(scores[best])
+            self.misses += 1
+            return None
+
+    def add(self, text: str, intent: str, previous_intent: Optional[str] = None) -> None:
+        """
+        Guarda la intención que devolvió el modelo para `text`.
+        """
+        key = normalize(text)
+        tf = hashed_tf(text, self.dim)
+        with self._lock:
+            self._clock += 1
+            row = self._rows.get((key, previous_intent))
+            if row is not None:
+                self._intents[row] = intent
+                self._last_used[row] = self._clock
+                return
+            if len(self._intents) < self.maxsize:
+                row = len(self._intents)
+                self._tf.append(tf)
+                self._texts.append(key)
+                self._previous.append(previous_intent)
+                self._intents.append(intent)
+                self._last_used.append(self._clock)
+            else:
+                row = min(range(self.maxsize), key=self._last_used.__getitem__)
+                self._df[self._tf[row][0]] -= 1
+                del self._rows[(self._texts[row], self._previous[row])]
+                self._tf[row] = tf
+                self._texts[row], self._previous[row], self._intents[row] = key, previous_intent, intent
+                self._last_used[row] = self._clock
+            self._rows[(key, previous_intent)] = row
+            self._df[tf[0]] += 1
+            if len(self._intents) >= 2 * self._fitted_at:
+                self._refit()
+            else:
+                self._vectors[row] = self._vector(tf)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._df[:] = 0
+            self._idf[:] = 1
+            self._fitted_at = 0
+            self._tf.clear()
+            self._rows.clear()
+            self._texts.clear()
+            self._previous.clear()
+            self._intents.clear()
+            self._last_used.clear()
+
+    def __len__(self) -> int:
+        return len(self._intents)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._intents),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,351 @@
+"""
+Clasificador de intenciones local (regresión logística multinomial en NumPy)
+entrenado con las decisiones que registra IntentionClassifier.
+
+Entrenamiento (desde la raíz del repo, con `pip install -e .`):
+    python -m infrastructure.intent_model --log .intent_model/decisions.jsonl --out .intent_model/model.npz
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from domain.interfaces import IntentClassifierService
+from infrastructure.intent_cache import DEFAULT_VECTOR_DIM, hashed_tf
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTENT_MODEL = Path(".intent_model") / "model.npz"
+DEFAULT_DECISION_LOG = Path(".intent_model") / "decisions.jsonl"
+DEFAULT_CONFIDENCE_THRESHOLD = 0.8
+MIN_TRAINING_SAMPLES = 20
+
+# (mensaje, intención anterior, intención)
+Sample = Tuple[str, Optional[str], str]
+
+
+def log_decision(
+    path: Path,
+    message: str,
+    intention: str,
+    last_intention: Optional[str] = None,
+    latency_ms: Optional[float] = None,
+) -> None:
+    """
+    Añade una decisión del LLM al registro JSONL con el que se entrena el modelo.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "at": time.time(),
+        "message": message,
+        "last_intention": last_intention,
+        "intention": intention,
+        "latency_ms": latency_ms,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def read_decisions(path: Path) -> List[Dict[str, Any]]:
+    """
+    Decisiones registradas con log_decision; las líneas corruptas se ignoran.
+    """
+    decisions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and entry.get("message") and entry.get("intention"):
+                decisions.append(entry)
+    return decisions
+
+
+def features(message: str, last_intention: Optional[str], dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    N-gramas de caracteres del mensaje más una columna para la intención anterior.
+    """
+    columns, values = hashed_tf(message, dim)
+    previous = zlib.crc32(f"previa:{last_intention}".encode("utf-8")) % dim
+    return np.append(columns, previous), np.append(values, np.float32(1.0))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class IntentModel:
+    """
+    Regresión logística multinomial sobre vectores TF-IDF de n-gramas de
+    caracteres (mismo hashing que IntentSimilarityCache).
+
+    Las probabilidades se calibran con temperature scaling sobre una parte
+    de los datos reservada al entrenar, así que la confianza de `predict` se
+    puede comparar directamente con un umbral.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        weights: np.ndarray,
+        bias: np.ndarray,
+        idf: np.ndarray,
+        temperature: float = 1.0,
+        metrics: Optional[Dict[str, float]] = None,
+    ):
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+        self.dim = len(idf)
+        self.temperature = temperature
+        self.metrics = metrics or {}
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def train(
+        cls,
+        samples: Sequence[Sample],
+        dim: int = DEFAULT_VECTOR_DIM,
+        epochs: int = 30,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        holdout: float = 0.2,
+        seed: int = 0,
+    ) -> "IntentModel":
+        """
+        Entrena con descenso por gradiente en mini-lotes (con momento) y
+        calibra la temperatura con el `holdout` de las muestras.
+        """
+        if len(samples) < MIN_TRAINING_SAMPLES:
+            raise ValueError(f"Hacen falta al menos {MIN_TRAINING_SAMPLES} muestras, hay {len(samples)}")
+        labels = sorted({intent for _, _, intent in samples})
+        if len(labels) < 2:
+            raise ValueError("Hacen falta muestras de al menos dos intenciones")
+        label_ids = {label: i for i, label in enumerate(labels)}
+
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(samples))
+        n_holdout = int(len(samples) * holdout) if len(samples) * holdout >= 10 else 0
+        held = [samples[i] for i in order[:n_holdout]]
+        train = [samples[i] for i in order[n_holdout:]]
+
+        rows = [features(message, previous, dim) for message, previous, _ in train]
+        y = np.array([label_ids[intent] for _, _, intent in train])
+        df = np.zeros(dim, dtype=np.float32)
+        for columns, _ in rows:
+            df[np.unique(columns)] += 1
+        idf = (np.log((1 + len(rows)) / (1 + df)) + 1).astype(np.float32)
+
+        model = cls(labels, np.zeros((dim, len(labels)), dtype=np.float32),
+                    np.zeros(len(labels), dtype=np.float32), idf)
+        # Las filas se densifican por lotes: la matriz completa no cabría en memoria con logs grandes
+        targets = np.eye(len(labels), dtype=np.float32)[y]
+        velocity_w = np.zeros_like(model.weights)
+        velocity_b = np.zeros_like(model.bias)
+        batch_size = 64
+        for _ in range(epochs):
+            shuffled = rng.permutation(len(rows))
+            for start in range(0, len(rows), batch_size):
+                batch = shuffled[start:start + batch_size]
+                xb, tb = model._matrix([rows[i] for i in batch]), targets[batch]
+                error = (_softmax(xb @ model.weights + model.bias) - tb) / len(batch)
+                velocity_w = 0.9 * velocity_w - learning_rate * (xb.T @ error + l2 * model.weights)
+                velocity_b = 0.9 * velocity_b - learning_rate * error.sum(axis=0)
+                model.weights += velocity_w
+                model.bias += velocity_b
+
+        model.metrics["train_samples"] = len(train)
+        model.metrics["train_accuracy"] = float(np.mean(model._row_logits(rows).argmax(axis=1) == y))
+        if held:
+            model._calibrate(held)
+        return model
+
+    def _matrix(self, rows: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        X = np.zeros((len(rows), self.dim), dtype=np.float32)
+        for i, (columns, values) in enumerate(rows):
+            np.add.at(X[i], columns, values * self.idf[columns])
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        return X / np.maximum(norms, 1e-12)
+
+    def _logits(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.weights + self.bias
+
+    def _row_logits(self, rows: Sequence[Tuple[np.ndarray, np.ndarray]], chunk: int = 1024) -> np.ndarray:
+        return np.concatenate([
+            self._logits(self._matrix(rows[start:start + chunk])) for start in range(0, len(rows), chunk)
+        ])
+
+    def _calibrate(self, held: Sequence[Sample]) -> None:
+        """
+        Temperatura que minimiza la log-verosimilitud negativa en `held`.
+        """
+        label_ids = {label: i for i, label in enumerate(self.labels)}
+        known = [s for s in held if s[2] in label_ids]
+        if not known:
+            return
+        logits = self._row_logits([features(m, p, self.dim) for m, p, _ in known])
+        y = np.array([label_ids[intent] for _, _, intent in known])
+
+        def nll(temperature: float) -> float:
+            probs = _softmax(logits / temperature)
+            return float(-np.mean(np.log(probs[np.arange(len(y)), y] + 1e-12)))
+
+        self.temperature = min(np.exp(np.linspace(np.log(0.05), np.log(5.0), 61)), key=nll)
+        probs = _softmax(logits / self.temperature)
+        self.metrics.update({
+            "holdout_samples": len(known),
+            "holdout_accuracy": float(np.mean(probs.argmax(axis=1) == y)),
+            "holdout_nll": nll(self.temperature),
+            "temperature": float(self.temperature),
+        })
+
+    # ------------------------------------------------------------------
+    def predict_proba(self, message: str, last_intention: Optional[str] = None) -> Dict[str, float]:
+        X = self._matrix([features(message, last_intention, self.dim)])
+        probs = _softmax(self._logits(X)[0] / self.temperature)
+        return dict(zip(self.labels, probs.tolist()))
+
+    def predict(self, message: str, last_intention: Optional[str] = None) -> Tuple[str, float]:
+        """
+        (intención más probable, confianza calibrada).
+        """
+        probs = self.predict_proba(message, last_intention)
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                labels=np.array(self.labels),
+                weights=self.weights,
+                bias=self.bias,
+                idf=self.idf,
+                temperature=np.float32(self.temperature),
+                metrics=np.array(json.dumps(self.metrics)),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                labels=[str(label) for label in data["labels"]],
+                weights=data["weights"],
+                bias=data["bias"],
+                idf=data["idf"],
+                temperature=float(data["temperature"]),
+                metrics=json.loads(str(data["metrics"])),
+            )
+
+
+class LocalIntentClassifier(IntentClassifierService):
+    """
+    IntentClassifierService con el IntentModel entrenado: milisegundos en CPU
+    y, además de la intención, su confianza calibrada.
+    """
+
+    def __init__(self, model: IntentModel):
+        self.model = model
+
+    @classmethod
+    def from_file(cls, path: Path = DEFAULT_INTENT_MODEL) -> "LocalIntentClassifier":
+        return cls(IntentModel.load(path))
+
+    def classify_intention(self, message: str, context: str = None, last_intention: str = None) -> dict:
+        intent, confidence = self.model.predict(message, last_intention)
+        return {"intention": intent, "navigation": None, "confidence": confidence}
+
+
+class FallbackIntentClassifier(IntentClassifierService):
+    """
+    Usa primero el clasificador local y, si su confianza no llega a
+    `threshold` (o no hay modelo entrenado), el clasificador con LLM.
+    """
+
+    def __init__(
+        self,
+        fallback: IntentClassifierService,
+        local: Optional[LocalIntentClassifier] = None,
+        threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+    ):
+        self.fallback = fallback
+        self.local = local
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.local_answers = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_model_file(
+        cls,
+        fallback: IntentClassifierService,
+        path: Path = DEFAULT_INTENT_MODEL,
+        threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+    ) -> "FallbackIntentClassifier":
+        local = None
+        if Path(path).exists():
+            try:
+                local = LocalIntentClassifier.from_file(path)
+                logger.info(f"Modelo de intenciones local cargado de {path}: {local.model.metrics}")
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"No se pudo cargar el modelo de intenciones {path}: {e}")
+        else:
+            logger.info(f"Sin modelo de intenciones en {path}: se usa solo el LLM")
+        return cls(fallback, local, threshold)
+
+    def classify_intention(self, message: str, context: str = None, last_intention: str = None) -> dict:
+        if self.local is not None:
+            result = self.local.classify_intention(message, context, last_intention)
+            if result["confidence"] >= self.threshold:
+                with self._lock:
+                    self.local_answers += 1
+                return result
+        with self._lock:
+            self.fallbacks += 1
+        return self.fallback.classify_intention(message, context=context, last_intention=last_intention)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.local_answers + self.fallbacks
+            return {
+                "threshold": self.threshold,
+                "local_answers": self.local_answers,
+                "fallbacks": self.fallbacks,
+                "local_rate": self.local_answers / total if total else 0.0,
+            }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", type=Path, default=DEFAULT_DECISION_LOG, help="decisiones registradas (JSONL)")
+    parser.add_argument("--out", type=Path, default=DEFAULT_INTENT_MODEL)
+    parser.add_argument("--dim", type=int, default=DEFAULT_VECTOR_DIM)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+
+    decisions = read_decisions(args.log)
+    samples = [(d["message"], d.get("last_intention"), d["intention"]) for d in decisions]
+    model = IntentModel.train(samples, dim=args.dim, epochs=args.epochs, holdout=args.holdout)
+    model.save(args.out)
+    print(f"{len(samples)} decisiones, intenciones: {', '.join(model.labels)}")
+    for name, value in model.metrics.items():
+        print(f"  {name}: {value:.4g}" if isinstance(value, float) else f"  {name}: {value}")
+    print(f"Modelo guardado en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
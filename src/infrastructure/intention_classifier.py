@@ -1,19 +1,50 @@
 import json
 import re
+import time
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 import logging
 
 from src.domain.interfaces import LLMInterface, IntentClassifierService
 from src.infrastructure.llm_interface import GEMMA
+from src.infrastructure.json_stream import CONVERSATION_STOPS
+from src.infrastructure.llm_cache import CachedLLM, DEFAULT_LLM_CACHE_DB
+from src.infrastructure.prompt_warmup import static_prefix
+from src.infrastructure.intent_cache import DEFAULT_SIMILARITY_THRESHOLD, IntentSimilarityCache
+from src.infrastructure.intent_model import log_decision
+from src.infrastructure.rule_classifier import DEFAULT_FLOW_CONFIG
+from src.infrastructure.structured_output import StructuredOutput
 
 logger = logging.getLogger(__name__)
 
+# Tope de tokens de classify_intention; la generación acaba al cerrarse el JSON
+INTENT_MAX_TOKENS = 40
+# Esquema de la salida; si no se cumple, StructuredOutput pide repararla
+INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {"intention": {"enum": ["buscar_por_criterio", "info_beca", "explicar_termino", "general_qa"]}},
+    "required": ["intention"],
+}
+
 class IntentionClassifier(IntentClassifierService):
-    def __init__(self, llm : LLMInterface = GEMMA()):
-        self.llm = llm
+    def __init__(
+        self,
+        llm : LLMInterface = None,
+        similarity_threshold: Optional[float] = DEFAULT_SIMILARITY_THRESHOLD,
+        decision_log: Optional[Path] = None,
+    ):
+        self.llm = llm or CachedLLM(GEMMA(json_mode=True), db_path=DEFAULT_LLM_CACHE_DB)
+        # JSON validado contra INTENT_SCHEMA, con reintentos de reparación y métricas de fallos
+        self.structured = StructuredOutput(self.llm)
+        # Registro de las decisiones del LLM para entrenar el modelo local (None, por
+        # defecto, lo desactiva: guarda los mensajes de los usuarios)
+        self.decision_log = decision_log
+        # Decisiones anteriores del LLM para mensajes casi idénticos (None la desactiva)
+        self.similarity_cache = (
+            IntentSimilarityCache(similarity_threshold) if similarity_threshold is not None else None
+        )
         self.intent_prompt = """
 Analiza el contexto de conversacion y el siguiente mensaje del usuario y clasifícalo **estrictamente en UNA** de las siguientes intenciones.  
-Intención anterior: {last_intention}
 ---  
 1. `info_beca`: el usuario menciona explícitamente el nombre o identificador de una beca (propio o inferido), pide plazos, requisitos, enlaces o información detallada sobre esa beca en particular.  
    - **Ejemplos**:  
@@ -51,6 +82,8 @@ Devuelve **EXCLUSIVAMENTE** un objeto JSON válido con la estructura: `{{ "inten
 
 
 
+Intención anterior: {last_intention}
+
 Contexto Previo de la conversación:
 \"\"\"{context}\"\"\"
 
@@ -98,19 +131,53 @@ JSON de salida:
             return None
           
           
+    @classmethod
+    def from_config(cls, config_path: Path = DEFAULT_FLOW_CONFIG, **kwargs) -> "IntentionClassifier":
+        """
+        Clasificador con el registro de decisiones de `decision_log` en
+        config/flow_config.json (sin la clave o a null, no se registra nada).
+        """
+        with open(config_path, "r", encoding="utf-8") as f:
+            decision_log = json.load(f).get("decision_log")
+        return cls(decision_log=Path(decision_log) if decision_log else None, **kwargs)
+
+    def prompt_prefixes(self) -> List[str]:
+        """
+        Parte fija de los prompts, para precalentarla en Ollama al arrancar.
+        """
+        return [static_prefix(self.intent_prompt)]
+
     def classify_intention(self, message: str, context: str = None, last_intention: str = None) -> dict:
         """
         Clasificación principal. Ahora puede tomar contexto del flujo guiado.
+        Si un mensaje casi idéntico ya se clasificó con la misma intención
+        anterior, se reutiliza esa decisión sin llamar al LLM.
         """
+        if self.similarity_cache is not None:
+            cached = self.similarity_cache.lookup(message, last_intention)
+            if cached is not None:
+                logger.debug(f"Intención {cached[0]} reutilizada (similitud {cached[1]:.2f}) para: {message}")
+                return {"intention": cached[0], "navigation": None}
+
         prompt = self.intent_prompt.format(message=message, context=context, last_intention=last_intention)
-        resp = self.llm.generate(prompt)
-        intent_data = self._extract_json(resp) # Obtener el dict completo
-        intent = intent_data.get("intention") if isinstance(intent_data, dict) else None
-        
-        valid_intents = {"buscar_por_criterio", "info_beca", "explicar_termino", "general_qa"}
-        if intent not in valid_intents:
-            logger.warning(f"Intent classification failed or returned invalid intent. Raw LLM resp: '{resp}'. Extracted: '{intent_data}'. Falling back to general_qa.")
+        start = time.perf_counter()
+        intent_data = self.structured.generate(
+            "classify_intention", prompt, INTENT_SCHEMA, max_tokens=INTENT_MAX_TOKENS, stop=CONVERSATION_STOPS
+        )
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        if intent_data is None:
+            logger.warning("Intent classification failed after repair retries. Falling back to general_qa.")
             intent = "general_qa" # Fallback
+        else:
+            intent = intent_data["intention"]
+            if self.similarity_cache is not None:
+                self.similarity_cache.add(message, intent, last_intention)
+            if self.decision_log is not None:
+                try:
+                    log_decision(self.decision_log, message, intent, last_intention, latency_ms)
+                except OSError as e:
+                    logger.warning(f"No se pudo registrar la decisión en {self.decision_log}: {e}")
 
         return {"intention": intent , "navigation": None}
 
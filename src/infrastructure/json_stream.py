@@ -0,0 +1,122 @@
+import logging
+from typing import Iterable, Optional
+
+from domain.interfaces import LLMInterface
+
+logger = logging.getLogger(__name__)
+
+# El modelo a veces sigue la conversación por su cuenta tras (o en vez de) el JSON
+CONVERSATION_STOPS = ("\nUsuario:", "\nAsistente:")
+
+
+class JsonObjectReader:
+    """
+    Lee por fragmentos la salida del LLM y detecta cuándo se cierra el primer
+    objeto JSON (llaves equilibradas, sin contar las que van dentro de
+    cadenas). Cada fragmento se recorre una sola vez.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    @property
+    def in_object(self) -> bool:
+        return self.start is not None and self.end is None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Añade un fragmento; devuelve True en cuanto el primer objeto está cerrado.
+        """
+        if self.done:
+            return True
+        self.text += chunk
+        for i in range(self._pos, len(self.text)):
+            c = self.text[i]
+            if self.start is None:
+                if c == "{":
+                    self.start, self._depth = i, 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == "{":
+                self._depth += 1
+            elif c == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = i + 1
+                    self._pos = self.end
+                    return True
+        self._pos = len(self.text)
+        return False
+
+    def object(self) -> Optional[str]:
+        return self.text[self.start:self.end] if self.done else None
+
+
+def generate_json(
+    llm: LLMInterface,
+    prompt: str,
+    max_tokens: Optional[int] = None,
+    stop: Iterable[str] = (),
+) -> str:
+    """
+    Genera con `llm` solo hasta que se cierra el primer objeto JSON y corta
+    ahí el stream (LangChain cierra la petición y Ollama deja de generar).
+    Devuelve el texto hasta la llave de cierre inclusive.
+
+    También se corta al recibir `max_tokens` fragmentos (Ollama envía uno por
+    token) o al aparecer fuera del objeto una de las secuencias de `stop`. En
+    esos casos se devuelve el texto recibido hasta entonces, sin la secuencia.
+
+    Si `llm` sabe cachear la salida estructurada (CachedLLM) lo hace él; si no
+    tiene generate_stream, se usa generate y solo se recorta el texto.
+    """
+    if hasattr(llm, "generate_json"):
+        return llm.generate_json(prompt, max_tokens=max_tokens, stop=stop)
+
+    stop = tuple(stop)
+    reader = JsonObjectReader()
+    stream = getattr(llm, "generate_stream", None)
+    if stream is None:
+        reader.feed(llm.generate(prompt))
+        return reader.text[:reader.end] if reader.done else _cut_at_stop(reader.text, stop)
+
+    chunks = stream(prompt)
+    try:
+        for n, chunk in enumerate(chunks, start=1):
+            if reader.feed(chunk):
+                return reader.text[:reader.end]
+            if stop and not reader.in_object:
+                cut = _cut_at_stop(reader.text, stop)
+                if len(cut) < len(reader.text):
+                    logger.debug(f"Generación cortada por secuencia de parada: {reader.text!r}")
+                    return cut
+            if max_tokens is not None and n >= max_tokens:
+                logger.warning(f"Generación cortada a {max_tokens} tokens sin JSON completo: {reader.text!r}")
+                break
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+    return reader.text
+
+
+def _cut_at_stop(text: str, stop: Iterable[str]) -> str:
+    cuts = [i for i in (text.find(s) for s in stop) if i != -1]
+    return text[:min(cuts)] if cuts else text
@@ -0,0 +1,354 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from domain.entities import ScholarshipRecord
+from infrastructure.scholarship_index import CRITERIA
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+DEFAULT_COMPACT_EVERY = 500
+
+# Cabecera de la sección de reglas de becas.pl: los hechos nuevos van antes
+RULES_MARKER = "% 7. CONSULTAS"
+
+# Predicados con los hechos de una beca (primer argumento = id) y su aridad
+FACT_ARITY = {
+    "beca": 1,
+    **{criterion: 2 for criterion in CRITERIA},
+    "info": 2,
+    "alias": 2,
+    "plazo": 3,
+    "requisito": 3,
+    "web_oficial": 2,
+}
+
+_ATOM = re.compile(r"^[a-z][a-zA-Z0-9_]*$")
+_FACT_LINE = re.compile(r"^(\w+)\(\s*(\w+)\s*[,)]")
+
+
+def quote(value: str) -> str:
+    """
+    Átomo Prolog: tal cual si es un átomo simple, entre comillas si no.
+    """
+    value = str(value)
+    if _ATOM.match(value):
+        return value
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
+    return f"'{escaped}'"
+
+
+def validate_code(code: str) -> str:
+    if not isinstance(code, str) or not _ATOM.match(code):
+        raise ValueError(f"Id de beca no válido (debe ser un átomo Prolog en minúsculas): {code!r}")
+    return code
+
+
+# ----------------------------------------------------------------------
+# Operaciones
+# ----------------------------------------------------------------------
+def upsert_op(record: ScholarshipRecord) -> Dict[str, Any]:
+    validate_code(record.code)
+    unknown = set(record.criteria) - set(CRITERIA)
+    if unknown:
+        raise ValueError(f"Criterios desconocidos: {', '.join(sorted(unknown))}")
+    return {"op": "upsert", "scholarship": asdict(record)}
+
+
+def retract_op(code: str) -> Dict[str, Any]:
+    return {"op": "retract", "code": validate_code(code)}
+
+
+def op_code(op: Dict[str, Any]) -> str:
+    return op["scholarship"]["code"] if op["op"] == "upsert" else op["code"]
+
+
+def record_facts(record: ScholarshipRecord) -> List[Tuple[str, str]]:
+    """
+    Hechos (predicado, término) de una beca, en el orden de las secciones de becas.pl.
+    """
+    code = record.code
+    facts = [("beca", f"beca({code})")]
+    for criterion in CRITERIA:
+        for value in record.criteria.get(criterion, []):
+            facts.append((criterion, f"{criterion}({code}, {quote(value)})"))
+    facts.append(("info", f"info({code}, {quote(record.info)})"))
+    facts += [("alias", f"alias({code}, {quote(alias)})") for alias in record.aliases]
+    facts += [("plazo", f"plazo({code}, {quote(k)}, {quote(v)})") for k, v in record.deadlines.items()]
+    facts += [("requisito", f"requisito({code}, {quote(k)}, {quote(v)})") for k, v in record.requirements.items()]
+    if record.website:
+        facts.append(("web_oficial", f"web_oficial({code}, {quote(record.website)})"))
+    return facts
+
+
+def _retract_goals(code: str, keep_beca: bool = False) -> List[str]:
+    return [
+        f"retractall({predicate}({', '.join([code] + ['_'] * (arity - 1))}))"
+        for predicate, arity in FACT_ARITY.items()
+        if not (keep_beca and predicate == "beca")
+    ]
+
+
+def op_goal(op: Dict[str, Any]) -> str:
+    """
+    Goal Prolog de una operación. Es idempotente: aplicarla dos veces deja la
+    KB igual que aplicarla una, así que reaplicar el diario es siempre seguro.
+    """
+    if op["op"] == "retract":
+        return ", ".join(_retract_goals(op["code"]))
+    record = ScholarshipRecord(**op["scholarship"])
+    # beca/1 se conserva si ya existía, para no alterar el orden de las becas
+    goals = [f"(beca({record.code}) -> true ; assertz(beca({record.code})))"]
+    goals += _retract_goals(record.code, keep_beca=True)
+    goals += [f"assertz({term})" for predicate, term in record_facts(record) if predicate != "beca"]
+    return ", ".join(goals)
+
+
+def ops_goal(ops: List[Dict[str, Any]]) -> str:
+    """
+    Las operaciones de una transacción como un único goal: o se aplican todas o ninguna.
+    """
+    return f"transaction(({', '.join(op_goal(op) for op in ops)}))"
+
+
+@dataclass
+class JournalEntry:
+    seq: int
+    at: float
+    ops: List[Dict[str, Any]]
+
+
+def replay_goal(entries: Iterable[JournalEntry]) -> str:
+    """
+    Goal que aplica varias entradas del diario en un único viaje a Prolog.
+    """
+    return ", ".join(ops_goal(entry.ops) for entry in entries)
+
+
+# ----------------------------------------------------------------------
+# Diario
+# ----------------------------------------------------------------------
+class KBJournal:
+    """
+    Diario de solo escritura (JSON lines) con los cambios hechos en la KB en
+    tiempo de ejecución, junto a becas.pl (`becas.pl.journal`).
+
+    La primera línea es una cabecera con el número de secuencia que ya está
+    incluido en el .pl (`base_seq`); cada línea siguiente es una transacción.
+    Al compactar, los cambios se vuelcan en el .pl y el diario vuelve a empezar.
+    Si otro proceso escribe en el mismo diario, sus entradas se leen al
+    consultar `since` (basta con comparar el tamaño del fichero).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.base_seq = 0
+        self.kb_hash: Optional[str] = None
+        self._entries: List[JournalEntry] = []
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.Lock()
+        with self._lock:
+            self._refresh()
+
+    @classmethod
+    def for_kb(cls, kb_path: Path) -> "KBJournal":
+        kb_path = Path(kb_path)
+        return cls(kb_path.with_name(kb_path.name + JOURNAL_SUFFIX))
+
+    @property
+    def seq(self) -> int:
+        """
+        Número de secuencia de la última transacción.
+        """
+        with self._lock:
+            self._refresh()
+            return self._entries[-1].seq if self._entries else self.base_seq
+
+    def pending(self) -> int:
+        """
+        Transacciones del diario que aún no están en el .pl.
+        """
+        return self.seq - self.base_seq
+
+    def since(self, seq: int) -> List[JournalEntry]:
+        """
+        Transacciones posteriores a `seq`, en orden.
+        """
+        with self._lock:
+            self._refresh()
+            if not self._entries:
+                return []
+            start = max(seq + 1 - self._entries[0].seq, 0)
+            return self._entries[start:]
+
+    def append(self, ops: List[Dict[str, Any]], kb_hash: Optional[str] = None) -> JournalEntry:
+        """
+        Añade una transacción y la lleva a disco (fsync) antes de devolverla.
+        """
+        with self._lock:
+            self._refresh()
+            last = self._entries[-1].seq if self._entries else self.base_seq
+            entry = JournalEntry(seq=last + 1, at=time.time(), ops=ops)
+            if not self.path.exists():
+                self.kb_hash = kb_hash
+                self._write(self.path, [])
+            elif self.path.stat().st_size > self._offset:
+                # Restos de una escritura interrumpida
+                os.truncate(self.path, self._offset)
+            line = json.dumps(asdict(entry), ensure_ascii=False) + "\n"
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._entries.append(entry)
+            self._offset = self.path.stat().st_size
+            return entry
+
+    def rotate(self, seq: int, kb_hash: str) -> None:
+        """
+        Marca como incluidas en el .pl las transacciones hasta `seq`: el fichero
+        se reescribe (de forma atómica) solo con las posteriores. En memoria se
+        conservan hasta `forget`, por si algún worker aún no las ha aplicado.
+        """
+        with self._lock:
+            self._refresh()
+            self.base_seq, self.kb_hash = seq, kb_hash
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            self._write(tmp, [e for e in self._entries if e.seq > seq])
+            os.replace(tmp, self.path)
+            stat = self.path.stat()
+            self._offset, self._inode = stat.st_size, stat.st_ino
+
+    def forget(self, seq: int) -> None:
+        with self._lock:
+            self._entries = [e for e in self._entries if e.seq > seq]
+
+    def __len__(self) -> int:
+        return self.pending()
+
+    # ------------------------------------------------------------------
+    def _write(self, path: Path, entries: List[JournalEntry]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps({"base_seq": self.base_seq, "kb_hash": self.kb_hash}) + "\n")
+            for entry in entries:
+                fh.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        stat = path.stat()
+        self._offset, self._inode = stat.st_size, stat.st_ino
+
+    def _refresh(self) -> None:
+        # Lee lo que se haya añadido al fichero desde la última vez
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Fichero nuevo (o compactado por otro proceso): se relee entero
+            self._offset, self._inode = 0, stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as fh:
+            fh.seek(self._offset)
+            data = fh.read()
+        complete, _, partial = data.rpartition(b"\n")
+        lines = complete.decode("utf-8").split("\n") if complete else []
+        if self._offset == 0:
+            header = json.loads(lines.pop(0)) if lines else {}
+            self.base_seq = header.get("base_seq", 0)
+            self.kb_hash = header.get("kb_hash")
+            self._entries = [e for e in self._entries if e.seq <= self.base_seq]
+        for line in lines:
+            if not line.strip():
+                continue
+            entry = JournalEntry(**json.loads(line))
+            if entry.seq > (self._entries[-1].seq if self._entries else self.base_seq):
+                self._entries.append(entry)
+        if partial:
+            # Escritura a medias (p. ej. una caída): se ignora hasta que se complete
+            logger.warning(f"Línea incompleta al final del diario {self.path}")
+        self._offset += len(complete) + 1 if complete else 0
+
+
+# ----------------------------------------------------------------------
+# Compactación
+# ----------------------------------------------------------------------
+def final_state(entries: Iterable[JournalEntry]) -> Dict[str, Optional[ScholarshipRecord]]:
+    """
+    Estado final de cada beca tocada por las entradas (None = retirada).
+    """
+    state: Dict[str, Optional[ScholarshipRecord]] = {}
+    for entry in entries:
+        for op in entry.ops:
+            if op["op"] == "upsert":
+                state[op_code(op)] = ScholarshipRecord(**op["scholarship"])
+            else:
+                state[op_code(op)] = None
+    return state
+
+
+def compact_source(text: str, entries: Iterable[JournalEntry]) -> str:
+    """
+    Aplica las entradas del diario al fuente de la KB conservando su estructura:
+    se quitan las líneas de hechos de las becas afectadas y los hechos nuevos se
+    insertan tras el último hecho del mismo predicado (o antes de la sección de
+    reglas si no hay ninguno). Supone un hecho por línea, como en becas.pl.
+    """
+    state = final_state(entries)
+    lines = text.split("\n")
+
+    kept_becas = set()
+    last_line: Dict[str, int] = {}
+    removed = set()
+    for i, line in enumerate(lines):
+        match = _FACT_LINE.match(line)
+        if not match or match.group(1) not in FACT_ARITY:
+            continue
+        predicate, code = match.groups()
+        last_line[predicate] = i
+        if code not in state:
+            continue
+        if predicate == "beca" and state[code] is not None:
+            kept_becas.add(code)
+        else:
+            removed.add(i)
+
+    pending: Dict[str, List[str]] = {}
+    for code, record in state.items():
+        if record is None:
+            continue
+        for predicate, term in record_facts(record):
+            if predicate == "beca" and code in kept_becas:
+                continue
+            pending.setdefault(predicate, []).append(term + ".")
+
+    # Los predicados sin ningún hecho en el fuente van antes de la sección de reglas
+    rules_at = len(lines)
+    for i, line in enumerate(lines):
+        if RULES_MARKER in line:
+            rules_at = i - 1 if i > 0 and lines[i - 1].startswith("%%%") else i
+            break
+    orphan = [term for predicate in FACT_ARITY if predicate not in last_line for term in pending.get(predicate, [])]
+    after = {}
+    for predicate, i in last_line.items():
+        after.setdefault(i, []).extend(pending.get(predicate, []))
+
+    out = []
+    for i, line in enumerate(lines):
+        if i == rules_at and orphan:
+            out += orphan + [""]
+        if i not in removed:
+            out.append(line)
+        out += after.get(i, [])
+    if rules_at == len(lines) and orphan:
+        out += orphan
+    return "\n".join(out)
@@ -0,0 +1,172 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Iterator, List, Mapping, Optional, TypeVar
+
+from infrastructure.kb_snapshot import kb_hash
+from infrastructure.prolog_connector import DEFAULT_KB_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANTS_CONFIG = "config/tenants.json"
+DEFAULT_TENANT = "default"
+
+T = TypeVar("T")
+
+
+class UnknownTenantError(KeyError):
+    """El tenant pedido no tiene ninguna KB registrada."""
+    pass
+
+
+class _Group(Generic[T]):
+    """
+    Tenants cuyas KBs tienen exactamente el mismo contenido: comparten un
+    único repositorio (pool de workers, índices y cachés).
+    """
+
+    def __init__(self, version: str, kb_path: Path):
+        self.version = version
+        self.kb_path = kb_path
+        self.tenants: List[str] = []
+        self.instance: Optional[T] = None
+
+
+class KBRegistry(Generic[T]):
+    """
+    Registro de bases de conocimiento por tenant (institución o región).
+
+    Cada KB se sirve con su propio repositorio, creado con `factory(kb_path)`
+    la primera vez que se pide (p. ej. un PrologConnector con su pool, su
+    índice y su caché). Los tenants cuyas KBs son idénticas (mismo hash del
+    contenido, aunque estén en ficheros distintos) comparten el repositorio y,
+    con él, los procesos swipl y la memoria. Las escrituras en tiempo de
+    ejecución de un tenant compartido van al fichero del primero del grupo.
+    """
+
+    def __init__(
+        self,
+        kbs: Mapping[str, Path],
+        factory: Callable[[Path], T],
+        default: Optional[str] = DEFAULT_TENANT,
+    ):
+        if not kbs:
+            raise ValueError("El registro necesita al menos una KB")
+        self.factory = factory
+        self.default = default if default in kbs else None
+        self._paths: Dict[str, Path] = {}
+        self._groups: List[_Group[T]] = []
+        self._tenant_group: Dict[str, _Group[T]] = {}
+        self._lock = threading.Lock()
+        for tenant, kb_path in kbs.items():
+            self._register(tenant, Path(kb_path))
+
+    @classmethod
+    def from_config(
+        cls,
+        factory: Callable[[Path], T],
+        config_path: Path = DEFAULT_TENANTS_CONFIG,
+    ) -> "KBRegistry[T]":
+        """
+        Registro a partir de un JSON {"default": tenant, "tenants": {tenant: ruta}}.
+        Sin fichero de configuración, un único tenant con DEFAULT_KB_PATH.
+        """
+        config_path = Path(config_path)
+        if not config_path.exists():
+            logger.info(f"Sin {config_path}: se usa solo {DEFAULT_KB_PATH}")
+            return cls({DEFAULT_TENANT: Path(DEFAULT_KB_PATH)}, factory)
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config["tenants"], factory, config.get("default", DEFAULT_TENANT))
+
+    def _register(self, tenant: str, kb_path: Path) -> None:
+        if not kb_path.exists():
+            raise FileNotFoundError(f"KB not found for tenant {tenant}: {kb_path}")
+        version = kb_hash(kb_path)
+        group = next((g for g in self._groups if g.version == version), None)
+        if group is None:
+            group = _Group(version, kb_path)
+            self._groups.append(group)
+        else:
+            logger.info(f"El tenant {tenant} comparte KB con {', '.join(group.tenants)}")
+        group.tenants.append(tenant)
+        self._paths[tenant] = kb_path
+        self._tenant_group[tenant] = group
+
+    # ------------------------------------------------------------------
+    def get(self, tenant: Optional[str] = None) -> T:
+        """
+        Repositorio de la KB del tenant (o del tenant por defecto si es None).
+        Raises:
+            UnknownTenantError: si el tenant no está registrado.
+        """
+        key = tenant or self.default
+        group = self._tenant_group.get(key) if key is not None else None
+        if group is None:
+            raise UnknownTenantError(f"Tenant desconocido: {tenant}")
+        if group.instance is None:
+            with self._lock:
+                if group.instance is None:
+                    group.instance = self.factory(group.kb_path)
+                    logger.info(f"KB {group.kb_path} cargada para {', '.join(group.tenants)}")
+        return group.instance
+
+    def tenants(self) -> List[str]:
+        return list(self._paths)
+
+    def instances(self) -> Iterator[T]:
+        """
+        Repositorios ya creados (uno por grupo de KBs idénticas).
+        """
+        for group in list(self._groups):
+            if group.instance is not None:
+                yield group.instance
+
+    def regroup(self) -> List[str]:
+        """
+        Tras editar los ficheros, separa los tenants cuya KB ya no coincide con
+        la del primero de su grupo (tendrán repositorio propio en el siguiente `get`).
+        Returns:
+            tenants que han cambiado de grupo.
+        """
+        moved = []
+        hashes: Dict[Path, str] = {}
+
+        def current(path: Path) -> str:
+            if path not in hashes:
+                hashes[path] = kb_hash(path)
+            return hashes[path]
+
+        with self._lock:
+            for tenant, kb_path in self._paths.items():
+                group = self._tenant_group[tenant]
+                if kb_path == group.kb_path or current(kb_path) == current(group.kb_path):
+                    continue
+                group.tenants.remove(tenant)
+                new_group = _Group(current(kb_path), kb_path)
+                new_group.tenants.append(tenant)
+                self._groups.append(new_group)
+                self._tenant_group[tenant] = new_group
+                moved.append(tenant)
+        for tenant in moved:
+            logger.info(f"El tenant {tenant} pasa a tener KB propia")
+        return moved
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Grupos de tenants con KBs idénticas y si su repositorio ya está cargado.
+        """
+        return {
+            "default": self.default,
+            "groups": [
+                {
+                    "tenants": list(group.tenants),
+                    "kb_path": str(group.kb_path),
+                    "kb_version": group.version,
+                    "loaded": group.instance is not None,
+                }
+                for group in self._groups
+                if group.tenants
+            ],
+        }
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+from infrastructure.kb_snapshot import KBVersionTracker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCH_INTERVAL = 2.0
+
+
+class ReloadStats:
+    """
+    Métricas de las recargas en caliente de la KB: latencia de cada recarga y
+    tasa de error de las consultas atendidas mientras había una en curso.
+    """
+
+    def __init__(self, history: int = 50):
+        self._lock = threading.Lock()
+        self._active = False
+        self.reloads = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=history)
+        self.queries_during_reload = 0
+        self.errors_during_reload = 0
+
+    def begin(self) -> None:
+        with self._lock:
+            self._active = True
+
+    def end(self, latency: float, failed: bool = False) -> None:
+        with self._lock:
+            self._active = False
+            if failed:
+                self.failures += 1
+            else:
+                self.reloads += 1
+                self.latencies.append(latency)
+
+    def record_query(self, failed: bool) -> None:
+        if not self._active:
+            return
+        with self._lock:
+            self.queries_during_reload += 1
+            if failed:
+                self.errors_during_reload += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self.latencies)
+            queries = self.queries_during_reload
+            return {
+                "reloads": self.reloads,
+                "failures": self.failures,
+                "last_latency_s": latencies[-1] if latencies else None,
+                "max_latency_s": max(latencies) if latencies else None,
+                "queries_during_reload": queries,
+                "errors_during_reload": self.errors_during_reload,
+                "error_rate_during_reload": self.errors_during_reload / queries if queries else 0.0,
+            }
+
+
+class KBWatcher:
+    """
+    Hilo en segundo plano que vigila el fichero de la KB y pide a PrologService
+    una recarga cuando cambia su contenido.
+    """
+
+    def __init__(self, service, interval: float = DEFAULT_WATCH_INTERVAL):
+        self.service = service
+        self.interval = interval
+        self._tracker = KBVersionTracker(service.kb_path)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "KBWatcher":
+        self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if self._tracker.current() != self.service.kb_version:
+                    self.service.reload()
+            except FileNotFoundError:
+                # Editores que reescriben el fichero lo borran un instante
+                continue
+            except Exception as e:
+                logger.error(f"Error vigilando la KB: {e}")
+
+
+class AsyncKBWatcher:
+    """
+    Equivalente de KBWatcher para AsyncPrologService: una tarea del event
+    loop (en lugar de un hilo) que vigila el fichero y espera a `reload`.
+    """
+
+    def __init__(self, service, interval: float = DEFAULT_WATCH_INTERVAL):
+        self.service = service
+        self.interval = interval
+        self._tracker = KBVersionTracker(service.kb_path)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> "AsyncKBWatcher":
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="kb-watcher")
+        return self
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self._tracker.current() != self.service.kb_version:
+                    await self.service.reload()
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.error(f"Error vigilando la KB: {e}")
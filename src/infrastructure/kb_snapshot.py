@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR_NAME = ".kb_cache"
+
+
+def kb_hash(kb_path: Path) -> str:
+    """
+    Hash SHA-256 del contenido del fichero de la KB.
+    """
+    digest = hashlib.sha256()
+    with open(kb_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class KBSnapshot:
+    """
+    Versión precompilada (.qlf) de la KB, identificada por el hash del fuente.
+
+    El primer worker que arranca con una KB nueva la compila con `qcompile/1`;
+    el resto (y los siguientes arranques) cargan el .qlf directamente. Si el
+    .qlf no corresponde al fuente actual o falla la carga, se consulta el fuente.
+    """
+
+    def __init__(self, kb_path: Path, cache_dir: Optional[Path] = None):
+        self.kb_path = Path(kb_path).resolve()
+        self.cache_dir = Path(cache_dir) if cache_dir else self.kb_path.parent / SNAPSHOT_DIR_NAME
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        return kb_hash(self.kb_path)
+
+    def qlf_path(self, version: Optional[str] = None) -> Path:
+        version = version or self.version
+        return self.cache_dir / f"{self.kb_path.stem}.{version[:16]}.qlf"
+
+    def is_current(self) -> bool:
+        return self.qlf_path().exists()
+
+    def load_into(self, prolog_thread) -> str:
+        """
+        Carga la KB en el hilo Prolog dado.
+
+        Returns:
+            "qlf" si se cargó el snapshot, "compiled" si se acaba de generar
+            y "source" si se consultó el fuente.
+        """
+        version = self.version
+        qlf = self.qlf_path(version)
+        if not qlf.exists():
+            with self._lock:
+                if not qlf.exists():
+                    return self._compile(prolog_thread, version) or self._consult_source(prolog_thread)
+        try:
+            prolog_thread.query(f"load_files('{qlf.as_posix()}', [])")
+            return "qlf"
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el snapshot {qlf}: {e}. Se consulta el fuente.")
+            return self._consult_source(prolog_thread)
+
+    def _compile(self, prolog_thread, version: str) -> Optional[str]:
+        """
+        Compila una copia del fuente con el hash en el nombre y deja el .qlf
+        resultante en su ruta definitiva. `qcompile/1` también carga la KB en
+        el hilo, así que no hace falta un consult adicional.
+
+        Returns:
+            "compiled" si la KB quedó cargada por `qcompile/1`, None si no.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.kb_path.stem}.{version[:16]}"
+        tmp_source = self.cache_dir / f"{stem}.{os.getpid()}.pl"
+        tmp_qlf = tmp_source.with_suffix(".qlf")
+        loaded = False
+        try:
+            shutil.copyfile(self.kb_path, tmp_source)
+            prolog_thread.query(f"qcompile('{tmp_source.as_posix()}')")
+            loaded = True
+            os.replace(tmp_qlf, self.qlf_path(version))
+        except Exception as e:
+            logger.warning(f"No se pudo compilar la KB a .qlf: {e}")
+            return "compiled" if loaded else None
+        finally:
+            tmp_source.unlink(missing_ok=True)
+            tmp_qlf.unlink(missing_ok=True)
+        self._prune(keep=self.qlf_path(version))
+        logger.info(f"Snapshot de la KB generado en {self.qlf_path(version)}")
+        return "compiled"
+
+    def _consult_source(self, prolog_thread) -> str:
+        prolog_thread.query(f"consult('{self.kb_path.as_posix()}')")
+        return "source"
+
+    def _prune(self, keep: Path) -> None:
+        for old in self.cache_dir.glob(f"{self.kb_path.stem}.*.qlf"):
+            if old != keep:
+                old.unlink(missing_ok=True)
+
+
+class KBVersionTracker:
+    """
+    Versión actual de la KB (hash del contenido) sin releer el fichero en cada
+    consulta: solo se recalcula el hash cuando cambian mtime o tamaño.
+    """
+
+    def __init__(self, kb_path: Path):
+        self.kb_path = Path(kb_path)
+        self._stat = None
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> str:
+        stat = self.kb_path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key != self._stat:
+                self._version = kb_hash(self.kb_path)
+                self._stat = key
+            return self._version
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from domain.interfaces import LLMInterface
+from infrastructure.json_stream import generate_json
+from infrastructure.query_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_CACHE_SIZE = 1024
+DEFAULT_LLM_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_LLM_CACHE_DB = Path(".llm_cache") / "responses.sqlite3"
+
+# Por encima de esta temperatura la salida no es reproducible y no se cachea
+DEFAULT_MAX_TEMPERATURE = 0.2
+
+# Opciones del cliente (OllamaLLM) que cambian la respuesta del modelo
+OPTION_FIELDS = (
+    "model", "temperature", "top_k", "top_p", "num_predict", "num_ctx",
+    "repeat_penalty", "seed", "stop", "format", "mirostat", "tfs_z",
+)
+
+
+def generation_options(llm: LLMInterface) -> Dict[str, Any]:
+    """
+    Modelo y opciones de generación de `llm` (o del cliente que envuelve en `llm.llm`).
+    """
+    client = getattr(llm, "llm", llm)
+    options = {}
+    for name in OPTION_FIELDS:
+        value = getattr(client, name, None)
+        if value is not None:
+            options[name] = value
+    return options
+
+
+def prompt_key(
+    options: Dict[str, Any], prompt: str, history: Optional[List[Tuple[str, str]]] = None
+) -> str:
+    """
+    Hash de (modelo, opciones, prompt, historial): dos llamadas con la misma
+    clave producen la misma respuesta con un modelo determinista.
+    """
+    payload = json.dumps(
+        {"options": options, "prompt": prompt, "history": history or []},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteResponseStore:
+    """
+    Respuestas del LLM en SQLite, para que la caché sobreviva a los reinicios
+    y se comparta entre procesos (workers de uvicorn). La base se abre al
+    primer uso.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_LLM_CACHE_DB):
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """
+        (respuesta, instante en que se guardó) o None.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT response, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, response: str, stored_at: float, model: Optional[str] = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, stored_at) VALUES (?, ?, ?, ?)",
+                (key, model, response, stored_at),
+            )
+            conn.commit()
+
+    def purge(self, older_than: float) -> int:
+        """
+        Borra las respuestas guardadas antes de `older_than`. Devuelve cuántas.
+        """
+        with self._lock:
+            conn = self._connection()
+            deleted = conn.execute("DELETE FROM responses WHERE stored_at < ?", (older_than,)).rowcount
+            conn.commit()
+            return deleted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedLLM(LLMInterface):
+    """
+    Caché de respuestas delante de un LLMInterface (GEMMA, LLAMA).
+
+    La clave es el hash del modelo, las opciones de generación, el prompt y
+    el historial. Hay dos niveles: una LRU en memoria y, opcionalmente, una
+    base SQLite (`db_path`) que sobrevive a los reinicios. Las respuestas
+    caducan a los `ttl` segundos.
+
+    Solo se cachean los modelos deterministas (temperatura <= `max_temperature`,
+    como los clasificadores); con uno más creativo, cada llamada va al modelo.
+    Tampoco se guarda la respuesta de error del modelo (`error_response`).
+    """
+
+    def __init__(
+        self,
+        llm: LLMInterface,
+        maxsize: int = DEFAULT_LLM_CACHE_SIZE,
+        ttl: float = DEFAULT_LLM_CACHE_TTL,
+        db_path: Optional[Path] = None,
+        max_temperature: float = DEFAULT_MAX_TEMPERATURE,
+    ):
+        self.llm = llm
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize)
+        self.store = SQLiteResponseStore(db_path) if db_path is not None else None
+        self.options = generation_options(llm)
+        self.error_response = llm.error_response
+        temperature = self.options.get("temperature")
+        self.enabled = temperature is not None and temperature <= max_temperature
+        if not self.enabled:
+            logger.info(
+                f"Caché desactivada para {self.options.get('model', type(llm).__name__)}: "
+                f"temperatura {temperature} > {max_temperature}"
+            )
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, history: Optional[List[Tuple[str, str]]] = None) -> str:
+        if not self.enabled:
+            self._count("bypassed")
+            return self.llm.generate(prompt, history)
+
+        key = prompt_key(self.options, prompt, history)
+        now = time.time()
+        cached = self._lookup(key, now)
+        if cached is not None:
+            return cached
+
+        self._count("misses")
+        response = self.llm.generate(prompt, history)
+        self._store(key, response, now)
+        return response
+
+    def generate_stream(self, prompt: str, history: Optional[List[Tuple[str, str]]] = None) -> Iterator[str]:
+        """
+        Un acierto se devuelve en un solo fragmento; un fallo se reenvía según
+        llega y se guarda solo si el LLM la termina sin error (LLMStreamError)
+        y el cliente la consume completa.
+        """
+        if not self.enabled:
+            self._count("bypassed")
+            yield from self.llm.generate_stream(prompt, history)
+            return
+
+        key = prompt_key(self.options, prompt, history)
+        now = time.time()
+        cached = self._lookup(key, now)
+        if cached is not None:
+            yield cached
+            return
+
+        self._count("misses")
+        chunks = []
+        finished = False
+        try:
+            for chunk in self.llm.generate_stream(prompt, history):
+                chunks.append(chunk)
+                yield chunk
+            finished = True
+        finally:
+            # Cortada por el LLM o abandonada por el cliente: no se guarda
+            if finished:
+                self._store(key, "".join(chunks).strip(), now)
+
+    def generate_json(self, prompt: str, max_tokens: Optional[int] = None, stop: Iterable[str] = ()) -> str:
+        """
+        Como json_stream.generate_json, con caché propia: la salida cortada tras
+        el primer objeto JSON no es la respuesta completa de `generate`.
+        """
+        if not self.enabled:
+            self._count("bypassed")
+            return generate_json(self.llm, prompt, max_tokens=max_tokens, stop=stop)
+
+        stop = list(stop)
+        key = prompt_key({**self.options, "until": "json", "max_tokens": max_tokens, "stop": stop}, prompt)
+        now = time.time()
+        cached = self._lookup(key, now)
+        if cached is not None:
+            return cached
+
+        self._count("misses")
+        response = generate_json(self.llm, prompt, max_tokens=max_tokens, stop=stop)
+        self._store(key, response, now)
+        return response
+
+    def _store(self, key: str, response: str, now: float) -> None:
+        if not response or response == self.error_response:
+            return
+        self.memory.put(key, (response, now))
+        if self.store is not None:
+            try:
+                self.store.put(key, response, now, self.options.get("model"))
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo guardar la respuesta del LLM en {self.store.db_path}: {e}")
+
+    def _lookup(self, key: str, now: float) -> Optional[str]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            response, stored_at = entry
+            if now - stored_at < self.ttl:
+                self._count("memory_hits")
+                return response
+            self.memory.discard(key)
+        if self.store is not None:
+            try:
+                entry = self.store.get(key) or entry
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo leer la caché del LLM en {self.store.db_path}: {e}")
+        if entry is None:
+            return None
+        response, stored_at = entry
+        if now - stored_at >= self.ttl:
+            self._count("expired")
+            return None
+        self.memory.put(key, (response, stored_at))
+        self._count("disk_hits")
+        return response
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def purge_expired(self) -> int:
+        """
+        Borra de SQLite las respuestas caducadas. Devuelve cuántas.
+        """
+        if self.store is None:
+            return 0
+        return self.store.purge(time.time() - self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "model": self.options.get("model"),
+                "enabled": self.enabled,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "bypassed": self.bypassed,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_size": len(self.memory),
+            }
@@ -1,19 +1,26 @@
-from domain.interfaces import IntentClassifierService, LLMInterface
+from domain.interfaces import IntentClassifierService, LLMInterface, LLMStreamError
 from domain.entities import FilterCriteria
 from langchain_ollama.llms import OllamaLLM
-from typing import Optional, List, Tuple
+from typing import Iterator, Optional, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tiempo que Ollama mantiene el modelo cargado tras la última petición (por
+# defecto 5 min). Al descargarlo se pierde la caché KV de los prefijos de los prompts.
+OLLAMA_KEEP_ALIVE = "1h"
+
 # Tanto llama3.2:3b y gemma3:4b funcionan correctamente. Sin embargo, llama3.2:3b es más rápido y consume menos recursos.
 # gemma3:4b es más preciso y tiene un mejor rendimiento en tareas complejas.
 class GEMMA(LLMInterface):
-    def __init__(self):
+    def __init__(self, json_mode: bool = False):
         self.llm = OllamaLLM(
             model="gemma3:4b",  # Asegúrate que este es el nombre correcto en tu Ollama
             temperature=0.1,   # Un poco de temperatura para respuestas más naturales
-            max_tokens=25
+            max_tokens=25,
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            # Con json_mode Ollama restringe la salida a JSON (clasificadores)
+            format="json" if json_mode else "",
         )
         
     def generate(self, prompt: str, history: Optional[List[Tuple[str, str]]] = None) -> str:
@@ -29,14 +36,37 @@ class GEMMA(LLMInterface):
             return response.strip() 
         except Exception as e:
             logger.error(f"Error generando texto en LLMInterface: {e}")
-            return "Lo siento, tuve un problema al procesar tu solicitud con la IA."
+            return self.error_response
+
+    def generate_stream(self, prompt: str, history: Optional[List[Tuple[str, str]]] = None) -> Iterator[str]:
+        """
+        Igual que generate, pero devuelve los tokens según los produce Ollama.
+        """
+        logger.debug(f"LLM prompt (stream): {prompt}")
+
+        started = False
+        try:
+            for chunk in self.llm.stream(prompt):
+                if not started:
+                    # Como generate (strip), sin espacios al principio
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                    started = True
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error generando texto en LLMInterface: {e}")
+            if started:
+                raise LLMStreamError(f"Generación interrumpida: {e}") from e
+            yield self.error_response
         
 class LLAMA(LLMInterface):
     def __init__(self):
         self.llm = OllamaLLM(
             model="llama3.2",  # Asegúrate que este es el nombre correcto en tu Ollama
             temperature=0.3,   # Un poco de temperatura para respuestas más naturales
-            max_tokens=1
+            max_tokens=1,
+            keep_alive=OLLAMA_KEEP_ALIVE,
         )
         
     def generate(self, prompt: str, history: Optional[List[Tuple[str, str]]] = None) -> str:
@@ -52,4 +82,26 @@ class LLAMA(LLMInterface):
             return response.strip() 
         except Exception as e:
             logger.error(f"Error generando texto en LLMInterface: {e}")
-            return "Lo siento, tuve un problema al procesar tu solicitud con la IA."
\ No newline at end of file
+            return self.error_response
+
+    def generate_stream(self, prompt: str, history: Optional[List[Tuple[str, str]]] = None) -> Iterator[str]:
+        """
+        Igual que generate, pero devuelve los tokens según los produce Ollama.
+        """
+        logger.debug(f"LLM prompt (stream): {prompt}")
+
+        started = False
+        try:
+            for chunk in self.llm.stream(prompt):
+                if not started:
+                    # Como generate (strip), sin espacios al principio
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                    started = True
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error generando texto en LLMInterface: {e}")
+            if started:
+                raise LLMStreamError(f"Generación interrumpida: {e}") from e
+            yield self.error_response
\ No newline at end of file
@@ -1,9 +1,13 @@
+import logging
 import pathlib
 from domain.entities import DialogAct
 import json
-from typing import List
+from typing import List, Optional
+from src.domain.interfaces import ScholarshipRepository
 from src.infrastructure.llm_interface import LLAMA
 
+logger = logging.getLogger(__name__)
+
 
 SYSTEM_PROMPT = """Parafrasea **cada una** de las frases que te paso; no cambies su significado.
 
@@ -23,6 +27,18 @@ PROMPT_PATH = pathlib.Path("config/flow_config.json")
 with PROMPT_PATH.open(encoding="utf-8") as fh:
     TEMPLATES = json.load(fh)
 
+ANY_OPTION = "cualquiera"
+# Cajón de sastre: cubre los valores de la KB que no salen entre las opciones
+OTHER_OPTION = "otros"
+
+# Campo de BuscarPorCriterioDTO → clave de ask_field (predicado de la KB)
+FIELD_TO_CRITERION = {
+    "area": "campo_estudio",
+    "education_level": "nivel",
+    "location": "ubicacion",
+    "organization": "organismo",
+}
+
 
 class LLMResponseBuilder:
     """
@@ -77,14 +93,19 @@ class LLMResponseBuilder:
 class TemplateResponseBuilder:
     """
     Builder de NLG que usa LLAMA (LangChain-Ollama) en vez de OpenAI.
+
+    Si se le pasa un repositorio, al preguntar por un criterio solo ofrece las
+    opciones que aún tienen becas según los criterios ya elegidos.
     """
 
     def __init__(
         self,
         llama_client: LLAMA | None = None,
+        repository: Optional[ScholarshipRepository] = None,
     ):
         # Si no se inyecta nada, creamos uno con la config por defecto
         self.llm = llama_client or LLAMA()
+        self.repository = repository
 
     # ------------------------------------------------------------------
     def render(self, acts: list[DialogAct], ctx) -> str:
@@ -95,12 +116,44 @@ class TemplateResponseBuilder:
               sample = f"Genial, seleccionamos {self._pretty(a.field)}: {a.new}. "
           elif a.type == "modify_field":
               sample = f"Vale, cambiamos {self._pretty(a.field)} de {a.old} a {a.new}. "
+          elif a.type == "clear_field":
+              sample = f"Vale, volvemos atrás: borramos {self._pretty(a.field)} ({a.old}). "
+          elif a.type == "skip_field":
+              sample = f"De acuerdo, nos saltamos {self._pretty(a.field)}: vale {a.new}. "
+          elif a.type == "cancel_search":
+              sample = "Vale, cancelamos la búsqueda. Cuando quieras, empezamos otra. "
           elif a.type == "ask_field":
-              dict = TEMPLATES.get(a.type, {}).get(a.field, {})
-              sample = f"{dict.get('prompt', '')} {self._prety_options(dict.get('options', []))}."
+              criterion = FIELD_TO_CRITERION.get(a.field, a.field)
+              dict = TEMPLATES.get(a.type, {}).get(criterion, {})
+              options = self._available_options(criterion, dict.get('options', []), ctx)
+              sample = f"{dict.get('prompt', '')} {self._prety_options(options)}."
+          else:
+              logger.warning(f"Acto sin plantilla: {a.type}")
+              continue
           template_snippets += f"{sample} \n"
 
         return template_snippets.strip()
+
+    def _available_options(self, criterion: str, options: list[str], ctx) -> list[str]:
+        """
+        Quita de `options` los valores que no darían ninguna beca con los
+        criterios ya elegidos ("cualquiera" se mantiene siempre). "otros" se
+        mantiene si queda alguna beca con un valor que no está entre las
+        opciones listadas.
+        """
+        criteria = getattr(ctx, "filter_criteria", None)
+        if self.repository is None or criteria is None:
+            return options
+        try:
+            counts = self.repository.facet_counts(criteria.to_domain(), [criterion]).get(criterion, {})
+        except Exception as e:
+            logger.warning(f"No se pudieron calcular las opciones disponibles de {criterion}: {e}")
+            return options
+        others = any(n > 0 for value, n in counts.items() if value not in options)
+        return [
+            o for o in options
+            if o == ANY_OPTION or counts.get(o, 0) > 0 or (o == OTHER_OPTION and others)
+        ]
       
       # Helper privado para nombres “bonitos”
     def _pretty(self,field: str) -> str:
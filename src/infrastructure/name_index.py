@@ -0,0 +1,223 @@
+import logging
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from infrastructure.scholarship_index import iter_bits
+
+logger = logging.getLogger(__name__)
+
+# Alias de las becas (alias/2 es opcional en la KB: sin él, lista vacía)
+ALIAS_GOAL = ("findall(B-A, (current_predicate(alias/2), alias(B, A)), Pairs)", ["Pairs"])
+
+DEFAULT_NAME_LIMIT = 5
+DEFAULT_MIN_SCORE = 0.4
+MAX_CANDIDATES = 256
+
+# Peso de los trigramas del nombre (id y alias) frente a los de info/2
+NAME_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+# Palabras que no ayudan a distinguir una beca de otra
+STOPWORDS = frozenset({
+    "a", "al", "beca", "becas", "con", "de", "del", "el", "en", "la", "las",
+    "lo", "los", "para", "por", "sobre", "un", "una", "y",
+})
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Minúsculas, sin tildes y con cualquier separador (espacios, `_`, signos)
+    convertido en un espacio.
+    """
+    text = unicodedata.normalize("NFKD", str(text).lower()).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def words(text: str) -> List[str]:
+    """
+    Palabras normalizadas sin STOPWORDS (todas, si no queda ninguna).
+    """
+    all_words = normalize(text).split()
+    return [w for w in all_words if w not in STOPWORDS] or all_words
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Trigramas de caracteres de cada palabra, con relleno como en pg_trgm
+    ("  m", " me", "mec", "ec "), de modo que las palabras cortas también cuentan.
+    """
+    grams = set()
+    for word in words(text):
+        grams.update(_word_trigrams(word))
+    return grams
+
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word: str) -> Tuple[str, ...]:
+    padded = f"  {word} "
+    return tuple(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _bitset(positions: Iterable[int], size: int) -> int:
+    # Construir el entero de una vez: acumular `|= 1 << pos` sería cuadrático
+    buffer = bytearray((size + 7) // 8)
+    for pos in positions:
+        buffer[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _add(planes: List[int], bits: int, plane: int = 0) -> None:
+    """
+    Suma 1 (o 2**plane) a las becas de `bits` en un contador por planos de
+    bits: planes[i] es el bitset de las becas cuyo recuento tiene el bit i.
+    """
+    carry = bits
+    while len(planes) < plane:
+        planes.append(0)
+    while carry:
+        if plane == len(planes):
+            planes.append(carry)
+            return
+        planes[plane], carry = planes[plane] ^ carry, planes[plane] & carry
+        plane += 1
+
+
+def _at_least(planes: List[int], k: int, universe: int) -> int:
+    """
+    Bitset de las becas con recuento >= k (comparador bit a bit, del más significativo).
+    """
+    if k <= 0:
+        return universe
+    if k.bit_length() > len(planes):
+        return 0
+    greater, equal = 0, universe
+    for i in reversed(range(len(planes))):
+        if k >> i & 1:
+            equal &= planes[i]
+        else:
+            greater |= equal & planes[i]
+            equal &= ~planes[i]
+    return greater | equal
+
+
+class NameIndex:
+    """
+    Índice de trigramas de caracteres para resolver menciones de becas
+    ("la MEC", "Erasmus") sin pasar por el LLM.
+
+    Indexa el id de cada beca, sus alias (alias/2) y su descripción (info/2).
+    Como ScholarshipIndex, cada beca ocupa un bit y cada trigrama guarda el
+    bitset de las becas que lo contienen; los trigramas de la consulta se suman
+    en un contador por planos de bits, así que el coste de una búsqueda depende
+    del número de trigramas de la consulta y no del de becas.
+
+    La puntuación de una beca suma los trigramas de la consulta que aparecen en
+    su nombre (peso NAME_WEIGHT) y en su descripción (peso TEXT_WEIGHT), y se
+    normaliza de modo que un nombre que los contiene todos vale 1 (máximo).
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        info: Optional[Mapping[str, str]] = None,
+        aliases: Optional[Mapping[str, Iterable[str]]] = None,
+    ):
+        info = info or {}
+        aliases = aliases or {}
+        self.ids = list(dict.fromkeys(ids))
+        size = len(self.ids)
+        self._universe = (1 << size) - 1
+
+        name_positions: Dict[str, List[int]] = {}
+        text_positions: Dict[str, List[int]] = {}
+        # Tamaño del nombre en trigramas: a igual puntuación, gana el más corto
+        self._name_sizes: List[int] = []
+        for pos, beca in enumerate(self.ids):
+            name_grams = trigrams(beca)
+            for alias in aliases.get(beca, []):
+                name_grams |= trigrams(alias)
+            self._name_sizes.append(len(name_grams))
+            for gram in name_grams:
+                name_positions.setdefault(gram, []).append(pos)
+            for gram in trigrams(info.get(beca, "")):
+                text_positions.setdefault(gram, []).append(pos)
+
+        self._names = {gram: _bitset(p, size) for gram, p in name_positions.items()}
+        self._texts = {gram: _bitset(p, size) for gram, p in text_positions.items()}
+
+    @classmethod
+    def from_rows(
+        cls, ids: List[str], info: Mapping[str, str], alias_rows: List[Dict]
+    ) -> "NameIndex":
+        """
+        Construye el índice con los ids e info/2 de la KB y las filas de ALIAS_GOAL.
+        """
+        aliases: Dict[str, List[str]] = {}
+        for term in alias_rows[0]["Pairs"] if alias_rows else []:
+            beca, alias = term["args"]
+            aliases.setdefault(str(beca), []).append(str(alias))
+        index = cls(ids, info, aliases)
+        logger.info(f"Índice de nombres de becas construido: {len(index)} becas, {len(aliases)} con alias")
+        return index
+
+    def search(
+        self, query: str, limit: int = DEFAULT_NAME_LIMIT, min_score: float = DEFAULT_MIN_SCORE
+    ) -> List[Tuple[str, float]]:
+        """
+        Becas cuyo nombre, alias o descripción se parecen a `query`, como pares
+        (id, puntuación) de mayor a menor puntuación.
+        """
+        grams = trigrams(query)
+        if not grams or not self.ids:
+            return []
+        planes: List[int] = []
+        for gram in grams:
+            if gram in self._names:
+                # Sumar NAME_WEIGHT (2) es sumar 1 en el plano 1
+                _add(planes, self._names[gram], plane=NAME_WEIGHT.bit_length() - 1)
+            if gram in self._texts:
+                _add(planes, self._texts[gram])
+        if not planes:
+            return []
+
+        # Un nombre que contiene todos los trigramas puntúa 1; la descripción sola, la mitad
+        total = NAME_WEIGHT * len(grams)
+        threshold = max(math.ceil(min_score * total), 1)
+        threshold = self._narrow(planes, threshold, (NAME_WEIGHT + TEXT_WEIGHT) * len(grams))
+        candidates = list(islice(iter_bits(_at_least(planes, threshold, self._universe)), MAX_CANDIDATES))
+
+        # Recuento exacto de cada candidata, leyendo sus bits en cada plano
+        size = (len(self.ids) + 7) // 8
+        counts = dict.fromkeys(candidates, 0)
+        for i, plane in enumerate(planes):
+            data = plane.to_bytes(size, "little")
+            for pos in candidates:
+                counts[pos] += (data[pos >> 3] >> (pos & 7) & 1) << i
+
+        ranked = sorted(candidates, key=lambda pos: (-counts[pos], self._name_sizes[pos], pos))
+        return [(self.ids[pos], min(counts[pos] / total, 1.0)) for pos in ranked[:limit]]
+
+    def _narrow(self, planes: List[int], threshold: int, maximum: int) -> int:
+        """
+        Menor umbral >= `threshold` que deja como mucho MAX_CANDIDATES becas
+        (búsqueda binaria: el número de becas baja al subir el umbral).
+        """
+        if _at_least(planes, threshold, self._universe).bit_count() <= MAX_CANDIDATES:
+            return threshold
+        low, high = threshold, maximum
+        while low < high:
+            mid = (low + high) // 2
+            if _at_least(planes, mid, self._universe).bit_count() <= MAX_CANDIDATES:
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -1,10 +1,52 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from swiplserver import PrologMQI, PrologError
-from domain.interfaces import ScholarshipRepository
-from domain.entities import Scholarship
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from swiplserver import PrologError, PrologQueryCancelledError, PrologQueryTimeoutError
+from domain.interfaces import ScholarshipRepository, ScholarshipWriter
+from domain.entities import FilterCriteria, Scholarship, ScholarshipPage, ScholarshipRecord
+from infrastructure.kb_journal import (
+    DEFAULT_COMPACT_EVERY,
+    KBJournal,
+    compact_source,
+    ops_goal,
+    replay_goal,
+    retract_op,
+    upsert_op,
+)
+from infrastructure.kb_reload import DEFAULT_WATCH_INTERVAL, KBWatcher, ReloadStats
+from infrastructure.kb_snapshot import KBSnapshot, kb_hash
+from infrastructure.name_index import ALIAS_GOAL, DEFAULT_NAME_LIMIT, NameIndex
+from infrastructure.prolog_metrics import DEFAULT_SLOW_QUERY_THRESHOLD, PrologMetrics, goal_template
+from infrastructure.prolog_pool import (
+    DEFAULT_HEALTH_CHECK_INTERVAL,
+    DEFAULT_POOL_SIZE,
+    PoolClosedError,
+    PrologWorker,
+    PrologWorkerPool,
+    WorkerUnresponsiveError,
+)
+from infrastructure.scholarship_index import (
+    CRITERIA,
+    INDEX_GOALS,
+    PAGE_VARS,
+    ScholarshipIndex,
+    buscar_beca_page_goal,
+    criteria_to_filters,
+)
 
 DEFAULT_KB_PATH = "config/becas.pl"
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_QUERY_TIMEOUT = 10.0
+# Lo mínimo que debe definir una KB para sustituir a la cargada
+KB_CHECK_GOAL = "once(beca(_)), current_predicate(buscar_beca/7)"
+
+logger = logging.getLogger(__name__)
 
 class PrologConnectorError(Exception):
     """Custom exception for Prolog connection or query errors."""
@@ -14,114 +56,808 @@ class NoResultsError(Exception):
     """Raised when a query returns no results."""
     pass
 
+class PrologTimeoutError(PrologConnectorError):
+    """
+    La consulta no terminó a tiempo (goal demasiado lento, sin workers libres o
+    proceso colgado). Quien llama puede recurrir a datos en caché.
+    """
+    pass
+
+class PrologCancelledError(PrologConnectorError):
+    """La consulta se canceló antes de terminar."""
+    pass
+
+class UnknownCriterionError(KeyError):
+    """El criterio pedido no es uno de los predicados de criterio de la KB."""
+    pass
+
+
+def translate_error(e: Exception) -> PrologConnectorError:
+    """
+    Traduce las excepciones de swiplserver y del pool a PrologConnectorError
+    (o sus subclases de timeout y cancelación).
+    """
+    if isinstance(e, (PrologQueryTimeoutError, TimeoutError, WorkerUnresponsiveError)):
+        return PrologTimeoutError(f"Prolog timeout: {e}")
+    if isinstance(e, PrologQueryCancelledError):
+        return PrologCancelledError(f"Prolog query cancelled: {e}")
+    if isinstance(e, PrologError):
+        return PrologConnectorError(f"Prolog error: {e}")
+    return PrologConnectorError(f"Unexpected error: {e}")
+
+
+def query_outcome(e: BaseException) -> str:
+    """
+    Resultado de una consulta fallida para PrologMetrics.
+    """
+    if isinstance(e, NoResultsError):
+        return "no_results"
+    if isinstance(e, PrologTimeoutError):
+        return "timeout"
+    if isinstance(e, (PrologCancelledError, asyncio.CancelledError)):
+        return "cancelled"
+    if isinstance(e, GeneratorExit):
+        # El consumidor cerró un iterador de iter_query antes de agotarlo
+        return "ok"
+    return "error"
+
+
+@contextmanager
+def measured(metrics: PrologMetrics, goal: str, template: Optional[str] = None):
+    """
+    Mide el bloque `with` como una consulta de `goal` y la registra en `metrics`.
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException as e:
+        outcome = query_outcome(e)
+        raise
+    finally:
+        metrics.record(template or goal_template(goal), goal, time.perf_counter() - start, outcome)
+
+
+def batch_template(goals: List[Tuple[str, List[str]]]) -> str:
+    return "query_many[" + " | ".join(goal_template(goal) for goal, _ in goals) + "]"
+
+@dataclass
+class GoalResult:
+    """
+    Resultado de un goal dentro de PrologService.query_many.
+    """
+    goal: str
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> List[Dict[str, Any]]:
+        """
+        Devuelve las filas o lanza el error del goal, igual que `query`.
+        """
+        if self.error is not None:
+            raise self.error
+        return self.rows
+
+
+def _quote_atom(text: str) -> str:
+    return "'" + text.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def batch_goal(goals: List[str]) -> str:
+    """
+    Construye un único goal que evalúa cada goal del lote por separado.
+
+    Cada goal viaja como texto y se parsea en Prolog con term_string/3, así sus
+    variables no chocan con las de otros goals y los errores de sintaxis quedan
+    aislados. El resultado de cada uno es ok(Soluciones) o error(Mensaje), donde
+    cada solución es la lista de pares Nombre=Valor de sus variables.
+    """
+    parts, results = [], []
+    for i, goal in enumerate(goals):
+        goal = goal.strip().rstrip(".")
+        parts.append(
+            f"catch((term_string({_quote_atom(goal)}, G{i}, [variable_names(V{i})]), "
+            f"findall(V{i}, G{i}, S{i}), R{i} = ok(S{i})), "
+            f"E{i}, (term_string(M{i}, E{i}), R{i} = error(M{i})))"
+        )
+        results.append(f"R{i}")
+    return f"findall([{', '.join(results)}], ({', '.join(parts)}), [Results])"
+
+
+def filter_rows(goal: str, raw: Any, vars: List[str]) -> List[Dict[str, Any]]:
+    """
+    Normaliza la respuesta cruda de swiplserver a filas {var: valor}.
+    """
+    if isinstance(raw, bool):
+        if not raw:
+            raise NoResultsError(f"No results for goal: {goal}")
+        raw = []
+    rows = list(raw)
+    if not rows:
+        raise NoResultsError(f"No results for goal: {goal}")
+    filtered = []
+    for row in rows:
+        entry = {v: row[v] for v in vars if v in row}
+        if entry:
+            filtered.append(entry)
+    if not filtered:
+        raise NoResultsError(f"No vars found in results for goal: {goal}")
+    return filtered
+
+
+def parse_batch(goals: List[Tuple[str, List[str]]], raw: Any) -> List[GoalResult]:
+    """
+    Convierte la respuesta de un goal construido con `batch_goal` en un
+    GoalResult por goal.
+    """
+    results = []
+    for (goal, vars), outcome in zip(goals, raw[0]["Results"]):
+        if outcome["functor"] == "error":
+            error = PrologConnectorError(f"Prolog error in goal {goal}: {outcome['args'][0]}")
+            results.append(GoalResult(goal=goal, error=error))
+            continue
+        solutions = [
+            {binding["args"][0]: binding["args"][1] for binding in solution}
+            for solution in outcome["args"][0]
+        ]
+        try:
+            rows = filter_rows(goal, solutions, vars)
+        except NoResultsError as e:
+            results.append(GoalResult(goal=goal, error=e))
+        else:
+            results.append(GoalResult(goal=goal, rows=rows))
+    return results
+
+
 class PrologService:
     """
     Servicio responsable de gestionar la conexión y ejecución de consultas Prolog.
-    Carga la KB una sola vez al inicializarse y reutiliza el mismo contexto.
+    Mantiene un pool de procesos swipl con la KB ya consultada y los reutiliza
+    entre consultas. Cada consulta tiene un plazo (`query_timeout`): al vencer
+    se aborta el goal en Prolog y se lanza PrologTimeoutError; si el proceso no
+    responde, se descarta y el pool lanza otro. Por defecto los workers cargan un snapshot .qlf de la KB
+    (ver KBSnapshot) y solo consultan el fuente si no está al día.
+
+    La KB se puede recargar en caliente con `reload` (o vigilando el fichero con
+    `watch`): se prepara un pool nuevo en segundo plano y se sustituye al
+    anterior solo si la nueva KB es válida.
+
+    Las becas también se pueden modificar en tiempo de ejecución con `apply`:
+    cada transacción se guarda en un diario (KBJournal) y cada worker la aplica
+    con assert/retract la próxima vez que se le presta, así que escribir no
+    bloquea las lecturas. Cada `compact_every` transacciones el diario se
+    vuelca en el .pl (`compact_journal`).
     """
 
-    def __init__(self, kb_path: Path = DEFAULT_KB_PATH):
+    def __init__(
+        self,
+        kb_path: Path = DEFAULT_KB_PATH,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+        use_snapshot: bool = True,
+        snapshot_dir: Optional[Path] = None,
+        query_timeout: Optional[float] = DEFAULT_QUERY_TIMEOUT,
+        slow_query_threshold: Optional[float] = DEFAULT_SLOW_QUERY_THRESHOLD,
+        compact_every: Optional[int] = DEFAULT_COMPACT_EVERY,
+    ):
         # Asegurarse de trabajar con Path en todo momento
         self.kb_path = Path(kb_path)
         if not self.kb_path.exists():
             raise FileNotFoundError(f"KB not found at: {self.kb_path}")
 
-        # Crear conexión a Prolog
-        # self._mqi = PrologMQI()
-        # self._thread = self._mqi.create_thread()
-
-        # Cargar la KB una sola vez, usando rutas con barras '/'
+        # Cargar la KB una sola vez por worker, usando rutas con barras '/'
         self.path_str = self.kb_path.resolve().as_posix()
 
+        # Snapshot .qlf de la KB para arrancar workers sin parsear el fuente
+        self.snapshot = KBSnapshot(self.kb_path, snapshot_dir) if use_snapshot else None
+
+        self.pool_size = pool_size
+        self.health_check_interval = health_check_interval
+
+        # Plazo por defecto de cada consulta (None = sin límite)
+        self.query_timeout = query_timeout
+
+        # Latencias y resultados por plantilla de goal, consultas lentas y cargas de la KB
+        self.metrics = PrologMetrics(slow_query_threshold)
+
+        # Versión (hash) del .pl que tienen cargado los workers del pool vigente
+        self.kb_version = kb_hash(self.kb_path)
+
+        # Cambios hechos en tiempo de ejecución, pendientes de volcar en el .pl
+        self.journal = KBJournal.for_kb(self.kb_path)
+        self.compact_every = compact_every
+        self._write_lock = threading.Lock()
+        self._compacting = False
+        self.reload_stats = ReloadStats()
+        self._reload_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[str, str], None]] = []
+        self._watcher: Optional[KBWatcher] = None
+
+        # Los procesos se lanzan bajo demanda en la primera consulta
+        self._pool = self._create_pool()
+
+    def _create_pool(self) -> PrologWorkerPool:
+        return PrologWorkerPool(
+            factory=self._create_worker,
+            size=self.pool_size,
+            health_check_interval=self.health_check_interval,
+        )
+
+    def _create_worker(self) -> PrologWorker:
+        start = time.perf_counter()
+        worker = PrologWorker(self.path_str, snapshot=self.snapshot)
+        try:
+            # El .pl ya incluye el diario hasta base_seq; el resto se aplica de una vez
+            worker.journal_seq = self.journal.base_seq
+            self._sync(worker)
+        except Exception:
+            worker.stop()
+            raise
+        self.metrics.record_load(worker.load_mode, time.perf_counter() - start)
+        return worker
+
+    def _sync(self, worker: PrologWorker, timeout: Optional[float] = None) -> None:
+        """
+        Aplica en el worker las transacciones del diario que aún no tiene.
+        """
+        entries = self.journal.since(worker.journal_seq)
+        if entries:
+            worker.query(replay_goal(entries), timeout=timeout)
+            worker.journal_seq = entries[-1].seq
+
+    @property
+    def version(self) -> str:
+        """
+        Versión de los datos: hash del .pl cargado y, si hay cambios hechos en
+        tiempo de ejecución, número de la última transacción del diario.
+        """
+        seq = self.journal.seq
+        return f"{self.kb_version}+{seq}" if seq else self.kb_version
+
+    def warm_up(self) -> None:
+        """
+        Arranca y carga la KB en todos los workers del pool antes de la primera consulta.
+        """
+        try:
+            self._pool.warm_up()
+        except Exception as e:
+            raise PrologConnectorError(f"Error al arrancar los workers de Prolog: {e}") from e
 
-    def query(self, goal: str, vars: List[str]) -> List[Dict[str, Any]]:
+    def query(
+        self,
+        goal: str,
+        vars: List[str],
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Ejecuta una consulta Prolog y devuelve los bindings solicitados.
 
         Params:
             goal (str): cadena del goal Prolog.
             vars (List[str]): lista de variables a extraer del resultado.
+            timeout: plazo en segundos (por defecto, `query_timeout`), incluida
+                la espera por un worker libre.
+            cancel: evento que, al activarse desde otro hilo, cancela el goal.
         Returns:
             lista de diccionarios {var: valor}.
         Raises:
             NoResultsError: si no hay resultados.
+            PrologTimeoutError: si vence el plazo.
+            PrologCancelledError: si se activa `cancel`.
             PrologConnectorError: otros errores Prolog.
         """
-        try:
-            with PrologMQI() as mqi:
-                with mqi.create_thread() as prolog:
-                    prolog.query(f"consult('{self.path_str}')")
-                    raw = prolog.query(goal)
-                    if isinstance(raw, bool):
-                        if not raw:
-                            raise NoResultsError(f"No results for goal: {goal}")
-                        raw = []
-                    rows = list(raw)
-                    if not rows:
-                        raise NoResultsError(f"No results for goal: {goal}")
-                    filtered = []
-                    for row in rows:
-                        entry = {v: row[v] for v in vars if v in row}
+        with measured(self.metrics, goal):
+            raw = self._run(goal, timeout, cancel)
+            return filter_rows(goal, raw, vars)
+
+    def iter_query(
+        self, goal: str, vars: List[str], timeout: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Como `query`, pero pide a Prolog las soluciones de una en una a medida
+        que se consumen, sin materializar la lista completa.
+
+        El worker queda prestado mientras el iterador esté abierto: conviene
+        consumirlo entero o cerrarlo (salir de un `for` con break lo cierra al
+        liberarse). Un goal sin soluciones produce un iterador vacío.
+        Raises:
+            PrologConnectorError: errores Prolog o del worker.
+        """
+        timeout = self.query_timeout if timeout is None else timeout
+        with measured(self.metrics, goal):
+            try:
+                with self._pool.acquire(timeout) as worker:
+                    self._sync(worker, timeout)
+                    for answer in worker.iter_query(goal, timeout):
+                        if not isinstance(answer, dict):
+                            continue
+                        entry = {v: answer[v] for v in vars if v in answer}
                         if entry:
-                            filtered.append(entry)
-                    if not filtered:
-                        raise NoResultsError(f"No vars found in results for goal: {goal}")
-                    return filtered
-        except PrologError as e:
-            raise PrologConnectorError(f"Prolog error: {e}") from e
-        except NoResultsError:
-            raise
+                            yield entry
+            except Exception as e:
+                raise translate_error(e) from e
+
+    def query_many(
+        self,
+        goals: List[Tuple[str, List[str]]],
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> List[GoalResult]:
+        """
+        Ejecuta varias consultas en un único viaje de ida y vuelta a Prolog.
+
+        Cada goal se parsea y ejecuta por separado dentro de un catch/3, de modo
+        que un goal erróneo no invalida el resto del lote.
+
+        Params:
+            goals: lista de pares (goal, vars) como los que recibe `query`.
+            timeout, cancel: como en `query`, para el lote completo.
+        Returns:
+            un GoalResult por goal, en el mismo orden, con sus filas o su error
+            (NoResultsError o PrologConnectorError).
+        Raises:
+            PrologTimeoutError / PrologCancelledError: como en `query`.
+            PrologConnectorError: si falla el lote completo (conexión, worker...).
+        """
+        if not goals:
+            return []
+        goal = batch_goal([goal for goal, _ in goals])
+        with measured(self.metrics, goal, batch_template(goals)):
+            raw = self._run(goal, timeout, cancel)
+            results = parse_batch(goals, raw)
+        for result in results:
+            if not result.ok:
+                self.metrics.count(goal_template(result.goal), query_outcome(result.error))
+        return results
+
+    def _run(self, goal: str, timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> Any:
+        timeout = self.query_timeout if timeout is None else timeout
+        failed = True
+        try:
+            raw = self._run_on_current_pool(goal, timeout, cancel)
+            failed = False
+            return raw
         except Exception as e:
-            raise PrologConnectorError(f"Unexpected error: {e}") from e
-        
-    def close(self):
+            error = translate_error(e)
+            if isinstance(error, PrologTimeoutError):
+                logger.warning(f"Timeout ({timeout}s) en la consulta Prolog: {goal[:200]}")
+            raise error from e
+        finally:
+            self.reload_stats.record_query(failed)
+
+    def _run_on_current_pool(self, goal: str, timeout: Optional[float], cancel: Optional[threading.Event]) -> Any:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pool = self._pool
+            try:
+                with pool.acquire(timeout) as worker:
+                    remaining = None if deadline is None else max(deadline - time.monotonic(), 0.001)
+                    self._sync(worker, remaining)
+                    remaining = None if deadline is None else max(deadline - time.monotonic(), 0.001)
+                    return worker.query(goal, timeout=remaining, cancel=cancel)
+            except PoolClosedError:
+                # Si una recarga sustituyó el pool mientras esperábamos un
+                # worker, reintentamos en el nuevo
+                if pool is self._pool:
+                    raise
+
+    # ------------------------------------------------------------------
+    def add_reload_listener(self, listener: Callable[[str, str], None]) -> None:
+        """
+        Registra `listener(old_version, new_version)`, que se llama tras cada
+        recarga de la KB ya con el pool nuevo en servicio.
         """
-        Cierra el hilo de Prolog y destruye la instancia de PrologMQI para liberar recursos.
+        self._reload_listeners.append(listener)
+
+    def reload(self) -> bool:
         """
+        Recarga la KB sin interrumpir el servicio.
+
+        Arranca un pool nuevo con la versión actual del fichero, lo valida y lo
+        sustituye de forma atómica por el anterior. Las consultas en curso
+        terminan en los workers antiguos, que se detienen al devolverse.
+        Returns:
+            True si se cambió de versión; False si la KB no había cambiado o si
+            la nueva no es válida (se sigue sirviendo la anterior).
+        """
+        with self._reload_lock:
+            new_kb_version = kb_hash(self.kb_path)
+            if new_kb_version == self.kb_version:
+                return False
+            started = time.perf_counter()
+            self.reload_stats.begin()
+            new_pool = self._create_pool()
+            try:
+                new_pool.warm_up()
+                self._validate(new_pool)
+            except Exception as e:
+                new_pool.close()
+                self.reload_stats.end(time.perf_counter() - started, failed=True)
+                logger.error(f"Recarga de la KB descartada ({new_kb_version[:12]}): {e}")
+                return False
+
+            old_pool, old_version = self._pool, self.version
+            self._pool, self.kb_version = new_pool, new_kb_version
+            new_version = self.version
+            old_pool.close()
+            self._notify(old_version, new_version)
+            latency = time.perf_counter() - started
+            self.reload_stats.end(latency)
+            logger.info(f"KB recargada {old_version[:12]} -> {new_version[:12]} en {latency:.3f}s")
+            return True
+
+    def _notify(self, old_version: str, new_version: str) -> None:
+        for listener in list(self._reload_listeners):
+            try:
+                listener(old_version, new_version)
+            except Exception as e:
+                logger.error(f"Error notificando la recarga de la KB: {e}")
+
+    def apply(self, ops: List[Dict[str, Any]]) -> str:
+        """
+        Aplica una transacción (operaciones de `kb_journal`: upsert_op,
+        retract_op) sobre la KB en memoria de todos los workers.
+
+        Primero se comprueba en un worker dentro de snapshot/1 (sin dejar
+        cambios); si es válida se añade al diario y cada worker la aplicará
+        antes de su siguiente consulta. Los listeners de recarga reciben el
+        cambio de versión, como tras `reload`.
+        Returns:
+            la nueva versión de los datos.
+        Raises:
+            PrologConnectorError: si la transacción no se puede aplicar.
+        """
+        if not ops:
+            return self.version
+        goal = ops_goal(ops)
+        with self._write_lock:
+            if self._run(f"snapshot(({goal}))") is not True:
+                raise PrologConnectorError("La transacción no se pudo aplicar en Prolog")
+            old_version = self.version
+            entry = self.journal.append(ops, kb_hash=self.kb_version)
+            new_version = self.version
+        logger.info(f"Transacción {entry.seq} en la KB: {len(ops)} operaciones")
+        self._notify(old_version, new_version)
+        if self.compact_every and self.journal.pending() >= self.compact_every and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self._compact_in_background, daemon=True).start()
+        return new_version
+
+    def compact_journal(self) -> bool:
+        """
+        Vuelca el diario en el .pl (conservando su estructura y comentarios),
+        recarga la KB con `reload` y vacía el diario. Las escrituras esperan a
+        que termine; las lecturas no.
+        Returns:
+            True si había transacciones que volcar.
+        """
+        with self._write_lock:
+            entries = self.journal.since(self.journal.base_seq)
+            if not entries:
+                return False
+            text = self.kb_path.read_text(encoding="utf-8")
+            tmp = self.kb_path.with_name(self.kb_path.name + ".tmp")
+            tmp.write_text(compact_source(text, entries), encoding="utf-8")
+            os.replace(tmp, self.kb_path)
+            seq = entries[-1].seq
+            self.journal.rotate(seq, kb_hash(self.kb_path))
+            self.reload()
+            # Hasta aquí, algún worker del pool anterior podía necesitarlas
+            self.journal.forget(seq)
+            logger.info(f"Diario de la KB compactado en {self.kb_path} ({len(entries)} transacciones)")
+            return True
+
+    def _compact_in_background(self) -> None:
         try:
-            # Mata el hilo de Prolog que abrimos en __init__
-            self._thread.stop()
+            self.compact_journal()
         except Exception as e:
-            # Aquí podrías loguear o ignorar según convenga
-            raise PrologConnectorError(f"Error al cerrar el hilo de Prolog: {e}") from e
+            logger.error(f"Error compactando el diario de la KB: {e}")
+        finally:
+            self._compacting = False
+
+    def _validate(self, pool: PrologWorkerPool) -> None:
+        with pool.acquire() as worker:
+            ok = worker.query(KB_CHECK_GOAL)
+        if ok is not True:
+            raise PrologConnectorError("La KB no define beca/1 o buscar_beca/7")
+
+    def watch(self, interval: float = DEFAULT_WATCH_INTERVAL) -> KBWatcher:
+        """
+        Vigila el fichero de la KB en segundo plano y la recarga al cambiar.
+        """
+        if self._watcher is None:
+            self._watcher = KBWatcher(self, interval).start()
+        return self._watcher
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estado del pool de workers (tamaño, vivos, libres, reciclados), versión
+        de la KB cargada, métricas de recarga y de las consultas (latencias por
+        plantilla de goal, errores, sin resultados, timeouts y consultas lentas).
+        """
+        stats = self._pool.stats()
+        stats["kb_version"] = self.version
+        stats["journal"] = {"seq": self.journal.seq, "pending": self.journal.pending()}
+        stats["reload"] = self.reload_stats.as_dict()
+        stats["queries"] = self.metrics.snapshot()
+        return stats
 
+    def close(self):
+        """
+        Detiene el vigilante de la KB, todos los workers del pool y sus procesos swipl.
+        """
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
         try:
-            # Destruye la instancia de MQI si existe ese método
-            self._mqi.stop()
-        except AttributeError:
-            # Si no existe destroy(), quizá no sea necesario
-            pass
+            self._pool.close()
         except Exception as e:
-            raise PrologConnectorError(f"Error al destruir PrologMQI: {e}") from e
+            raise PrologConnectorError(f"Error al cerrar el pool de Prolog: {e}") from e
+
+
+
+def criteria_goal(criterion: str) -> str:
+    """
+    Goal con los valores de un criterio. El nombre va tal cual dentro del goal,
+    así que solo se aceptan los predicados de CRITERIA.
+    Raises:
+        UnknownCriterionError: si `criterion` no es un criterio de la KB.
+    """
+    if criterion not in CRITERIA:
+        raise UnknownCriterionError(f"Criterio desconocido: {criterion}")
+    return f"setof(Type, {criterion}(_,Type), Types)"
+
+
+def criteria_values(rows: List[Dict[str, Any]]) -> List[str]:
+    # setof/3 agrupa por la beca (variable anónima): una fila por beca
+    return sorted({str(value) for row in rows for value in row["Types"]})
+
+
+def scholarship_from_row(row: Dict[str, Any]) -> Scholarship:
+    """
+    Scholarship a partir de una solución de `buscar_beca_page_goal`.
+    """
+    requirements = {}
+    for term in row["Reqs"]:
+        kind, text = term["args"]
+        requirements[str(kind)] = text
+    return Scholarship(
+        code=str(row["B"]),
+        title=row["Info"],
+        financing=str(row["Fin"]),
+        requirements=requirements,
+    )
+
 
+def page_of(items: List[Scholarship], offset: int, limit: int, kb_version: Optional[str]) -> ScholarshipPage:
+    """
+    Página a partir de hasta `limit + 1` resultados: el sobrante solo indica que hay más.
+    """
+    has_more = len(items) > limit
+    return ScholarshipPage(
+        items=items[:limit],
+        offset=offset,
+        limit=limit,
+        next_offset=offset + limit if has_more else None,
+        kb_version=kb_version,
+    )
 
 
-class PrologConnector(ScholarshipRepository):
+class KBTransaction:
+    """
+    Altas, modificaciones y bajas de becas que se aplican juntas (o ninguna)
+    al salir de `PrologConnector.transaction()`.
+    """
+
+    def __init__(self, exists: Callable[[str], bool]):
+        self.ops: List[Dict[str, Any]] = []
+        self._exists = exists
+        self._present: Dict[str, bool] = {}
+
+    def _is_present(self, code: str) -> bool:
+        if code not in self._present:
+            self._present[code] = self._exists(code)
+        return self._present[code]
+
+    def add(self, record: ScholarshipRecord) -> None:
+        if self._is_present(record.code):
+            raise PrologConnectorError(f"La beca {record.code} ya existe")
+        self.ops.append(upsert_op(record))
+        self._present[record.code] = True
+
+    def update(self, record: ScholarshipRecord) -> None:
+        if not self._is_present(record.code):
+            raise PrologConnectorError(f"No existe la beca {record.code}")
+        self.ops.append(upsert_op(record))
+
+    def retract(self, code: str) -> None:
+        if not self._is_present(code):
+            raise PrologConnectorError(f"No existe la beca {code}")
+        self.ops.append(retract_op(code))
+        self._present[code] = False
+
+
+class PrologConnector(ScholarshipRepository, ScholarshipWriter):
     """
     Implementación de ScholarshipRepository usando PrologService.
     """
     def __init__(self, service: Optional[PrologService] = None, kb_path: Path = DEFAULT_KB_PATH):
         self.service = service or PrologService(kb_path)
+        self._index: Optional[ScholarshipIndex] = None
+        self._name_index: Optional[NameIndex] = None
+        self._index_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[str, str, Optional[Set[str]]], None]] = []
+        self.service.add_reload_listener(self._on_kb_reload)
+
+    @property
+    def index(self) -> ScholarshipIndex:
+        """
+        Índice invertido de criterios, construido la primera vez que se necesita.
+        """
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = ScholarshipIndex.from_service(self.service)
+        return self._index
+
+    def add_reload_listener(self, listener: Callable[[str, str, Optional[Set[str]]], None]) -> None:
+        """
+        Registra `listener(old_version, new_version, changed)` para las recargas
+        de la KB. `changed` es el conjunto de predicados que han cambiado, o None
+        si no se sabe (p. ej. si el índice aún no se había construido).
+        """
+        self._reload_listeners.append(listener)
+
+    def _on_kb_reload(self, old_version: str, new_version: str) -> None:
+        changed: Optional[Set[str]] = None
+        with self._index_lock:
+            # Se reconstruye en la siguiente búsqueda por nombre
+            self._name_index = None
+            if self._index is not None:
+                try:
+                    results = [r.unwrap() for r in self.service.query_many(INDEX_GOALS)]
+                    self._index, changed = self._index.updated(results)
+                    # alias/2 no está en el índice de criterios: se da por cambiado
+                    changed = changed | {"alias"}
+                except Exception as e:
+                    # Se reconstruirá entero en la siguiente búsqueda
+                    logger.error(f"No se pudo actualizar el índice de becas: {e}")
+                    self._index = None
+        for listener in list(self._reload_listeners):
+            listener(old_version, new_version, changed)
+
     def get_criteria(self, criterion) -> List[str]:
-        rows = self.service.query(
-            f"setof(Type, {criterion}(_,Type), Types)", ["Types"]
-        )
-        return sorted({str(criterion["Types"][0]) for criterion in rows })
+        rows = self.service.query(criteria_goal(criterion), ["Types"])
+        return criteria_values(rows)
+
+    def get_criteria_many(self, criteria: List[str]) -> Dict[str, List[str]]:
+        """
+        Valores de varios criterios en una sola consulta a Prolog.
+        Los criterios sin valores (o con error) se omiten del resultado.
+        """
+        results = self.service.query_many([(criteria_goal(c), ["Types"]) for c in criteria])
+        values = {}
+        for criterion, result in zip(criteria, results):
+            if result.ok:
+                values[criterion] = criteria_values(result.rows)
+            elif not isinstance(result.error, NoResultsError):
+                logger.warning(f"No se pudieron obtener opciones de {criterion}: {result.error}")
+        return values
+
     def get_all_criteria(self, criteria) -> List[str]:
-        # Asume que en tu KB hay hechos área/1
-        all_names = []
-        for criterion in criteria:
-            names = self.get_criteria(criterion)
-            all_names.extend(names)
-        return sorted(set(all_names))
-            
-    def find_by_name(self, name: str) -> List[Scholarship]:
-        raise NotImplementedError("find_by_name not implemented")
-    def find_by_filters(self, criteria):
-        raise NotImplementedError("find_by_filters not implemented")
+        all_names = set()
+        for names in self.get_criteria_many(list(criteria)).values():
+            all_names.update(names)
+        return sorted(all_names)
+
+    @property
+    def name_index(self) -> NameIndex:
+        """
+        Índice de trigramas sobre ids, alias e info/2, construido la primera vez que se necesita.
+        """
+        if self._name_index is None:
+            index = self.index
+            with self._index_lock:
+                if self._name_index is None:
+                    alias_goal, alias_vars = ALIAS_GOAL
+                    alias_rows = self.service.query(alias_goal, alias_vars)
+                    self._name_index = NameIndex.from_rows(index.ids, index.info, alias_rows)
+        return self._name_index
+
+    def find_by_name(self, name: str, limit: int = DEFAULT_NAME_LIMIT) -> List[Scholarship]:
+        """
+        Becas que mejor encajan con una mención libre ("la MEC", "Erasmus"),
+        de más a menos parecida. Lista vacía si ninguna se parece lo suficiente.
+        """
+        index = self.index
+        return [index.scholarship(beca) for beca, _ in self.name_index.search(name, limit)]
+
+    def find_by_filters(self, criteria: FilterCriteria) -> List[Scholarship]:
+        """
+        Becas que cumplen los criterios (None o "cualquiera" = sin filtro),
+        con los mismos resultados y orden que buscar_beca/7.
+        """
+        return self.index.find(criteria)
+
+    def facet_counts(
+        self, criteria: FilterCriteria, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Para los criterios ya elegidos, cuántas becas hay por valor de cada
+        criterio en `fields` (predicados; por defecto, los que faltan por fijar).
+        Se resuelve con los bitsets del índice, sin consultar a Prolog.
+        """
+        return self.index.facets(criteria_to_filters(criteria), fields)
+
+    def iter_by_filters(
+        self, criteria: FilterCriteria, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Scholarship]:
+        """
+        Igual que find_by_filters, pero las becas se leen de Prolog una a una a
+        medida que se consumen. Mismo orden que buscar_beca/7 (hechos beca/1).
+        """
+        goal = buscar_beca_page_goal(criteria_to_filters(criteria), offset, limit)
+        for row in self.service.iter_query(goal, PAGE_VARS):
+            yield scholarship_from_row(row)
+
+    def find_page(
+        self, criteria: FilterCriteria, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE
+    ) -> ScholarshipPage:
+        """
+        Página de resultados de find_by_filters; solo se traen de Prolog `limit + 1` becas.
+        """
+        items = list(self.iter_by_filters(criteria, offset, limit + 1))
+        return page_of(items, offset, limit, self.service.version)
+
     def get_all_scholarship_names(self) -> List[str]:
         rows = self.service.query("setof(Name, beca(Name), Names)", ["Names"])
         return sorted(rows[0]["Names"])
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def transaction(self) -> Iterator[KBTransaction]:
+        """
+        Agrupa varias escrituras en una transacción:
+
+            with connector.transaction() as tx:
+                tx.add(nueva)
+                tx.retract("beca_antigua")
+
+        Si el bloque lanza una excepción no se aplica nada.
+        """
+        tx = KBTransaction(lambda code: code in self.index)
+        yield tx
+        if tx.ops:
+            self.service.apply(tx.ops)
+
+    def add_scholarship(self, record: ScholarshipRecord) -> str:
+        """
+        Da de alta una beca con todos sus hechos. Devuelve la nueva versión de la KB.
+        """
+        with self.transaction() as tx:
+            tx.add(record)
+        return self.service.version
+
+    def update_scholarship(self, record: ScholarshipRecord) -> str:
+        """
+        Sustituye todos los hechos de una beca existente (conserva su posición).
+        """
+        with self.transaction() as tx:
+            tx.update(record)
+        return self.service.version
+
+    def retract_scholarship(self, code: str) -> str:
+        """
+        Retira una beca y todos sus hechos.
+        """
+        with self.transaction() as tx:
+            tx.retract(code)
+        return self.service.version
     
 
 
@@ -0,0 +1,177 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_QUERY_THRESHOLD = 0.5
+DEFAULT_SLOW_LOG_SIZE = 100
+MAX_TEMPLATES = 200
+OTHER_TEMPLATE = "<otros>"
+
+# Límites superiores (ms) de los cubos del histograma; el último es +inf
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+OUTCOMES = ("ok", "no_results", "timeout", "cancelled", "error")
+
+_QUOTED = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"(?<![\w])-?\d+(?:\.\d+)?")
+_SPACES = re.compile(r"\s+")
+
+
+def goal_template(goal: str) -> str:
+    """
+    Plantilla de un goal: los átomos entre comillas y los números se
+    sustituyen por `?`, de modo que las consultas que solo difieren en sus
+    valores comparten métricas.
+    """
+    template = _QUOTED.sub("?", goal.strip().rstrip("."))
+    template = _NUMBER.sub("?", template)
+    return _SPACES.sub(" ", template)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con cubos fijos (ms), más recuento, suma y máximo.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Cota superior (ms) del cubo que contiene el percentil `q` (0-1).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class PrologMetrics:
+    """
+    Métricas de las consultas a Prolog: histograma de latencia y contadores de
+    resultado por plantilla de goal, registro de consultas lentas y tiempos de
+    carga de la KB en los workers.
+    """
+
+    def __init__(
+        self,
+        slow_threshold: Optional[float] = DEFAULT_SLOW_QUERY_THRESHOLD,
+        slow_log_size: int = DEFAULT_SLOW_LOG_SIZE,
+    ):
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._loads: Dict[str, LatencyHistogram] = {}
+
+    def record(self, template: str, goal: str, seconds: float, outcome: str = "ok") -> None:
+        """
+        Registra una consulta terminada con su duración y su resultado (ver OUTCOMES).
+        """
+        with self._lock:
+            if template not in self._latency and len(self._latency) >= MAX_TEMPLATES:
+                template = OTHER_TEMPLATE
+            self._latency.setdefault(template, LatencyHistogram()).observe(seconds)
+            counters = self._outcomes.setdefault(template, dict.fromkeys(OUTCOMES, 0))
+            counters[outcome] = counters.get(outcome, 0) + 1
+            slow = self.slow_threshold is not None and seconds >= self.slow_threshold
+            if slow:
+                self._slow.append({
+                    "at": time.time(),
+                    "template": template,
+                    "goal": goal[:1000],
+                    "duration_ms": seconds * 1000,
+                    "outcome": outcome,
+                })
+        if slow:
+            logger.warning(f"Consulta Prolog lenta ({seconds * 1000:.0f} ms, {outcome}): {goal[:200]}")
+
+    def count(self, template: str, outcome: str) -> None:
+        """
+        Suma un resultado sin latencia (p. ej. un goal sin resultados dentro de un lote).
+        """
+        with self._lock:
+            if template not in self._outcomes and len(self._outcomes) >= MAX_TEMPLATES:
+                template = OTHER_TEMPLATE
+            counters = self._outcomes.setdefault(template, dict.fromkeys(OUTCOMES, 0))
+            counters[outcome] = counters.get(outcome, 0) + 1
+
+    def record_load(self, mode: str, seconds: float) -> None:
+        """
+        Registra la carga de la KB en un worker nuevo ("qlf", "compiled", "source"...).
+        """
+        with self._lock:
+            self._loads.setdefault(mode, LatencyHistogram()).observe(seconds)
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._slow)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Todas las métricas como un dict serializable a JSON.
+        """
+        with self._lock:
+            totals = dict.fromkeys(OUTCOMES, 0)
+            for counters in self._outcomes.values():
+                for outcome, n in counters.items():
+                    totals[outcome] = totals.get(outcome, 0) + n
+            templates = {
+                template: {
+                    "latency": self._latency[template].as_dict() if template in self._latency else None,
+                    "outcomes": dict(counters),
+                }
+                for template, counters in self._outcomes.items()
+            }
+            return {
+                "totals": totals,
+                "templates": templates,
+                "kb_loads": {mode: h.as_dict() for mode, h in self._loads.items()},
+                "slow_threshold_ms": None if self.slow_threshold is None else self.slow_threshold * 1000,
+                "slow_queries": list(self._slow),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._outcomes.clear()
+            self._slow.clear()
+            self._loads.clear()
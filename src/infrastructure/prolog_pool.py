@@ -0,0 +1,356 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Set
+
+from swiplserver import PrologMQI, PrologError, PrologConnectionFailedError, PrologResultNotAvailableError
+
+from infrastructure.kb_snapshot import KBSnapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+_POLL_INTERVAL = 0.1
+# Margen sobre el timeout de la consulta antes de dar el proceso por colgado
+HUNG_WORKER_GRACE = 2.0
+_CANCEL_POLL = 0.05
+
+
+class PoolClosedError(RuntimeError):
+    """Se intenta usar un pool que ya se ha cerrado (p. ej. tras una recarga de la KB)."""
+    pass
+
+
+class WorkerUnresponsiveError(RuntimeError):
+    """El proceso swipl no respondió ni siquiera al vencer el timeout de la consulta."""
+    pass
+
+
+class PrologWorker:
+    """
+    Proceso swipl (PrologMQI) de larga duración con un único hilo Prolog
+    en el que la KB ya está consultada.
+    """
+
+    def __init__(self, kb_path: str, snapshot: Optional[KBSnapshot] = None):
+        self.kb_path = kb_path
+        self._mqi = PrologMQI()
+        self._thread = self._mqi.create_thread()
+        try:
+            self._thread.start()
+            if snapshot is not None:
+                self.load_mode = snapshot.load_into(self._thread)
+            else:
+                self._thread.query(f"consult('{kb_path}')")
+                self.load_mode = "source"
+        except Exception:
+            self.stop()
+            raise
+        self.last_used = time.monotonic()
+        self.queries = 0
+        # Última transacción del diario de la KB (KBJournal) aplicada en este worker
+        self.journal_seq = 0
+
+    def query(
+        self,
+        goal: str,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ):
+        """
+        Ejecuta el goal en el hilo del worker y devuelve la respuesta cruda de swiplserver.
+
+        Con `timeout` el propio Prolog aborta el goal al vencer el plazo
+        (PrologQueryTimeoutError) y el worker sigue siendo válido. Si el proceso
+        tampoco responde pasado HUNG_WORKER_GRACE, se lanza
+        WorkerUnresponsiveError y el pool lo sustituye.
+
+        Con `cancel`, activar el evento desde otro hilo cancela el goal en curso
+        (PrologQueryCancelledError).
+        """
+        self.queries += 1
+        self.last_used = time.monotonic()
+        if timeout is not None:
+            self._set_socket_timeout(timeout + HUNG_WORKER_GRACE)
+        try:
+            if cancel is None:
+                return self._thread.query(goal, query_timeout_seconds=timeout)
+            return self._cancellable_query(goal, timeout, cancel)
+        except OSError as e:
+            # socket.timeout: el proceso no contesta (ni siquiera los latidos)
+            raise WorkerUnresponsiveError(f"El worker Prolog no responde: {e}") from e
+        finally:
+            if timeout is not None:
+                self._set_socket_timeout(None)
+
+    def _cancellable_query(self, goal: str, timeout: Optional[float], cancel: threading.Event):
+        self._thread.query_async(goal, find_all=True, query_timeout_seconds=timeout)
+        cancelled = False
+        while True:
+            try:
+                answer = self._thread.query_async_result(wait_timeout_seconds=_CANCEL_POLL)
+                break
+            except PrologResultNotAvailableError:
+                if cancel.is_set() and not cancelled:
+                    self._thread.cancel_query_async()
+                    cancelled = True
+        # Tras la respuesta completa, el MQI indica el final con None
+        try:
+            self._thread.query_async_result()
+        except PrologError:
+            pass
+        return answer
+
+    def _set_socket_timeout(self, seconds: Optional[float]) -> None:
+        # swiplserver no expone un timeout de socket; sin él, un proceso
+        # colgado bloquearía el hilo para siempre
+        sock = getattr(self._thread, "_socket", None)
+        if sock is not None:
+            sock.settimeout(seconds)
+
+    def iter_query(self, goal: str, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Resuelve el goal solución a solución (query_async con find_all=False),
+        sin traer todas las respuestas de golpe. Cada elemento es un dict
+        {var: valor} (o True si el goal no tiene variables). `timeout` limita
+        el tiempo total del goal en Prolog, como en `query`.
+
+        Si el consumidor abandona el iterador antes del final, la consulta se
+        cancela y el hilo queda listo para la siguiente.
+        """
+        self.queries += 1
+        self.last_used = time.monotonic()
+        self._thread.query_async(goal, find_all=False, query_timeout_seconds=timeout)
+        if timeout is not None:
+            self._set_socket_timeout(timeout + HUNG_WORKER_GRACE)
+        finished = False
+        try:
+            while True:
+                try:
+                    answer = self._thread.query_async_result()
+                except PrologError:
+                    # Cualquier excepción indica que no quedan más respuestas
+                    finished = True
+                    raise
+                except OSError as e:
+                    finished = True
+                    raise WorkerUnresponsiveError(f"El worker Prolog no responde: {e}") from e
+                if answer is None:
+                    finished = True
+                    return
+                if answer is False:
+                    continue
+                yield answer[0] if isinstance(answer, list) else answer
+        finally:
+            if not finished:
+                self._cancel_async()
+            if timeout is not None:
+                self._set_socket_timeout(None)
+
+    def _cancel_async(self) -> None:
+        try:
+            self._thread.cancel_query_async()
+        except PrologError:
+            # La consulta ya había terminado
+            pass
+        try:
+            while self._thread.query_async_result() is not None:
+                pass
+        except PrologError:
+            pass
+
+    def is_healthy(self) -> bool:
+        """
+        Comprueba que el proceso sigue respondiendo con un goal trivial.
+        """
+        self._set_socket_timeout(HUNG_WORKER_GRACE)
+        try:
+            healthy = self._thread.query("true") is True
+        except Exception as e:
+            logger.warning(f"Worker Prolog sin respuesta: {e}")
+            return False
+        finally:
+            self._set_socket_timeout(None)
+        if healthy:
+            self.last_used = time.monotonic()
+        return healthy
+
+    def stop(self) -> None:
+        """
+        Termina el proceso swipl y cierra la conexión del hilo Prolog.
+
+        El proceso se mata primero y sin despedirse por el socket: si está
+        colgado, el "close" de PrologThread.stop esperaría una respuesta que
+        no llega nunca y el hueco del pool quedaría ocupado para siempre.
+        """
+        # Con connection_failed, PrologThread.stop solo cierra el socket
+        self._mqi.connection_failed = True
+        try:
+            self._mqi.stop(kill=True)
+        except Exception as e:
+            logger.debug(f"Error al detener PrologMQI: {e}")
+        try:
+            self._thread.stop()
+        except Exception as e:
+            logger.debug(f"Error al cerrar el hilo de Prolog: {e}")
+
+
+class PrologWorkerPool:
+    """
+    Pool de PrologWorker reutilizables.
+
+    Los workers se crean bajo demanda hasta `size`, se prestan por consulta con
+    `acquire()` y se sustituyen si fallan o no superan el health-check.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], PrologWorker],
+        size: int = DEFAULT_POOL_SIZE,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+    ):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self._factory = factory
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self._idle: "queue.LifoQueue[PrologWorker]" = queue.LifoQueue()
+        self._workers: Set[PrologWorker] = set()
+        self._lock = threading.Lock()
+        self._spawning = 0
+        self._closed = False
+        self.recycled = 0
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[PrologWorker]:
+        """
+        Presta un worker durante el bloque `with`.
+
+        Los errores propios de Prolog (goal mal formado, excepción del programa)
+        dejan el worker en el pool; cualquier otro error (conexión caída, proceso
+        muerto...) lo descarta y se sustituirá en la siguiente petición. Cerrar
+        un generador que tenía el worker prestado (GeneratorExit) lo devuelve.
+        """
+        worker = self._checkout(timeout)
+        try:
+            yield worker
+        except PrologError as e:
+            if isinstance(e, PrologConnectionFailedError):
+                self._discard(worker)
+            else:
+                self._release(worker)
+            raise
+        except GeneratorExit:
+            self._release(worker)
+            raise
+        except BaseException:
+            self._discard(worker)
+            raise
+        else:
+            self._release(worker)
+
+    def warm_up(self) -> None:
+        """
+        Arranca todos los workers del pool por adelantado.
+        """
+        workers = [self._checkout() for _ in range(self.size)]
+        for worker in workers:
+            self._release(worker)
+
+    def close(self) -> None:
+        """
+        Detiene todos los workers. Los que estén prestados se detienen al devolverse.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(worker)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "alive": len(self._workers),
+                "idle": self._idle.qsize(),
+                "recycled": self.recycled,
+            }
+
+    # ------------------------------------------------------------------
+    def _checkout(self, timeout: Optional[float] = None) -> PrologWorker:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            worker = self._next_worker(deadline)
+            if self._check(worker):
+                return worker
+            self._discard(worker)
+
+    def _next_worker(self, deadline: Optional[float]) -> PrologWorker:
+        while True:
+            if self._closed:
+                raise PoolClosedError("El pool de Prolog está cerrado")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            worker = self._try_spawn()
+            if worker is not None:
+                return worker
+            # Pool lleno: esperamos a que se libere un worker o a que se
+            # descarte alguno y quede hueco para lanzar otro.
+            wait = _POLL_INTERVAL
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("No hay workers de Prolog libres")
+                wait = min(wait, remaining)
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def _try_spawn(self) -> Optional[PrologWorker]:
+        with self._lock:
+            if self._closed or len(self._workers) + self._spawning >= self.size:
+                return None
+            # Reservamos el hueco antes de lanzar el proceso (lento) fuera del lock
+            self._spawning += 1
+        worker = None
+        try:
+            worker = self._factory()
+            return worker
+        finally:
+            with self._lock:
+                self._spawning -= 1
+                if worker is not None:
+                    self._workers.add(worker)
+
+    def _check(self, worker: PrologWorker) -> bool:
+        if time.monotonic() - worker.last_used < self.health_check_interval:
+            return True
+        return worker.is_healthy()
+
+    def _release(self, worker: PrologWorker) -> None:
+        if self._closed:
+            self._discard(worker)
+            return
+        self._idle.put(worker)
+
+    def _discard(self, worker: PrologWorker) -> None:
+        with self._lock:
+            if worker not in self._workers:
+                return
+            self._workers.discard(worker)
+            if not self._closed:
+                self.recycled += 1
+        worker.stop()
@@ -0,0 +1,55 @@
+import logging
+import string
+import time
+from typing import Dict, Iterable
+
+from domain.interfaces import LLMInterface
+
+logger = logging.getLogger(__name__)
+
+
+def static_prefix(template: str) -> str:
+    """
+    Parte fija de una plantilla de prompt: el texto hasta el primer campo
+    `{...}`, con las llaves escapadas (`{{`) ya resueltas. Es lo que Ollama
+    puede reutilizar de la caché KV entre llamadas.
+    """
+    prefix = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        prefix.append(literal)
+        if field is not None:
+            break
+    return "".join(prefix)
+
+
+def warm_up(llm: LLMInterface, prompts: Iterable[str]) -> Dict[str, float]:
+    """
+    Carga el modelo de `llm` en Ollama y evalúa cada prompt (normalmente los
+    prefijos fijos de un clasificador) para que las llamadas siguientes solo
+    tengan que evaluar la parte variable. La generación se corta en el primer
+    token; por entonces el prompt ya está en la caché KV.
+
+    Las envolturas (CachedLLM) se saltan para no contar ni guardar nada. Los
+    errores (Ollama caído) se registran y no impiden arrancar. Devuelve los
+    segundos que tardó cada prompt, por sus primeros caracteres.
+    """
+    while hasattr(getattr(llm, "llm", None), "generate_stream"):
+        llm = llm.llm
+    timings = {}
+    for prompt in prompts:
+        start = time.perf_counter()
+        chunks = llm.generate_stream(prompt)
+        try:
+            first = next(chunks, None)
+        except Exception as e:
+            first = e
+        finally:
+            chunks.close()
+        # GEMMA y LLAMA no lanzan: devuelven error_response
+        if isinstance(first, Exception) or first == getattr(llm, "error_response", None):
+            logger.warning(f"No se pudo precalentar el LLM: {first}")
+            return timings
+        label = " ".join(prompt.split())[:40]
+        timings[label] = time.perf_counter() - start
+        logger.info(f"Prefijo precalentado en {timings[label]:.2f} s: {label}…")
+    return timings
@@ -0,0 +1,287 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from domain.entities import FilterCriteria, Scholarship, ScholarshipRecord
+from domain.interfaces import ScholarshipRepository, ScholarshipWriter
+from infrastructure.kb_snapshot import KBVersionTracker
+# Misma ruta que el PrologConnector al que envuelve (ArgumentClassifier):
+# con otra, `except PrologTimeoutError` no reconocería su excepción
+from src.infrastructure.prolog_connector import PrologTimeoutError
+from infrastructure.scholarship_index import CRITERIA, criteria_to_filters
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 512
+
+_MISSING = object()
+
+_SCHOLARSHIP_FACTS = frozenset({"beca", "info", "requisito", *CRITERIA})
+
+# Predicados de la KB de los que depende cada método cacheado
+CACHE_DEPENDENCIES: Dict[str, Callable[[tuple], frozenset]] = {
+    "get_criteria": lambda key: frozenset({key[1]}),
+    "get_all_scholarship_names": lambda key: frozenset({"beca"}),
+    "find_by_name": lambda key: _SCHOLARSHIP_FACTS | {"alias"},
+    "find_by_filters": lambda key: _SCHOLARSHIP_FACTS,
+    "facet_counts": lambda key: _SCHOLARSHIP_FACTS,
+}
+
+
+class LRUCache:
+    """
+    Caché LRU acotada y segura entre hilos, con contadores de aciertos y fallos.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("El tamaño de la caché debe ser al menos 1")
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> bool:
+        """
+        Elimina la entrada de `key`, si existe. Devuelve si estaba.
+        """
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Elimina las entradas cuya clave cumple `predicate`. Devuelve cuántas.
+        """
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def rekey(self, transform: Callable[[Hashable], Optional[Hashable]]) -> Tuple[int, int]:
+        """
+        Cambia la clave de cada entrada por `transform(key)`, o la elimina si
+        devuelve None, conservando el orden LRU. Devuelve (conservadas, eliminadas).
+        """
+        with self._lock:
+            data: "OrderedDict[Hashable, Any]" = OrderedDict()
+            for key, value in self._data.items():
+                new_key = transform(key)
+                if new_key is not None:
+                    data[new_key] = value
+            dropped = len(self._data) - len(data)
+            self._data = data
+            return len(data), dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedScholarshipRepository(ScholarshipRepository, ScholarshipWriter):
+    """
+    Caché delante de un ScholarshipRepository (normalmente PrologConnector).
+
+    Las claves incluyen la versión de la KB, así que al editar becas.pl las
+    respuestas antiguas dejan de servirse sin invalidación manual; además se
+    purgan en cuanto se detecta el cambio de versión.
+
+    Si el repositorio avisa de las recargas en caliente (PrologConnector), la
+    versión es la que tiene cargada el servicio y, en cada recarga, las entradas
+    que no dependen de ningún predicado modificado pasan a la versión nueva.
+
+    Si Prolog no responde a tiempo (PrologTimeoutError) se sirve la última
+    respuesta conocida para esa consulta, aunque sea de una versión anterior.
+    """
+
+    def __init__(
+        self,
+        repository: ScholarshipRepository,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        version: Optional[Callable[[], str]] = None,
+    ):
+        self.repository = repository
+        self.cache = LRUCache(maxsize)
+        # Última respuesta por consulta, sin versión: solo se usa tras un timeout
+        self._fallback = LRUCache(maxsize)
+        self.invalidations = 0
+        self.rebased = 0
+        self.stale_served = 0
+        self._last_version: Optional[str] = None
+        if version is None:
+            if hasattr(repository, "add_reload_listener"):
+                repository.add_reload_listener(self._on_kb_reload)
+                version = lambda: self.repository.service.version
+            else:
+                version = KBVersionTracker(repository.service.kb_path).current
+        self._version = version
+
+    # ------------------------------------------------------------------
+    def get_criteria(self, criterion: str) -> List[str]:
+        return list(self._cached(("get_criteria", criterion), lambda: self.repository.get_criteria(criterion)))
+
+    def get_criteria_many(self, criteria: List[str]) -> Dict[str, List[str]]:
+        """
+        Sirve de la caché los criterios conocidos y pide el resto en un único lote.
+        """
+        version = self._current_version()
+        values, missing = {}, []
+        for criterion in criteria:
+            cached = self.cache.get(("get_criteria", criterion, version), _MISSING)
+            if cached is _MISSING:
+                missing.append(criterion)
+            else:
+                values[criterion] = list(cached)
+        if missing:
+            try:
+                fetched = self.repository.get_criteria_many(missing)
+            except PrologTimeoutError:
+                fetched = {}
+                for criterion in missing:
+                    stale = self._stale(("get_criteria", criterion))
+                    if stale is not _MISSING:
+                        fetched[criterion] = stale
+                if not fetched:
+                    raise
+            else:
+                for criterion, options in fetched.items():
+                    self.cache.put(("get_criteria", criterion, version), options)
+                    self._fallback.put(("get_criteria", criterion), options)
+            for criterion, options in fetched.items():
+                values[criterion] = list(options)
+        return {c: values[c] for c in criteria if c in values}
+
+    def get_all_criteria(self, criteria) -> List[str]:
+        all_names = set()
+        for names in self.get_criteria_many(list(criteria)).values():
+            all_names.update(names)
+        return sorted(all_names)
+
+    def get_all_scholarship_names(self) -> List[str]:
+        return list(self._cached(("get_all_scholarship_names",), self.repository.get_all_scholarship_names))
+
+    def find_by_name(self, name: str) -> List[Scholarship]:
+        return list(self._cached(("find_by_name", name), lambda: self.repository.find_by_name(name)))
+
+    # Las escrituras van directas al repositorio; la caché se entera por el
+    # aviso de cambio de versión, como en una recarga
+    def add_scholarship(self, record: ScholarshipRecord) -> str:
+        return self.repository.add_scholarship(record)
+
+    def update_scholarship(self, record: ScholarshipRecord) -> str:
+        return self.repository.update_scholarship(record)
+
+    def retract_scholarship(self, code: str) -> str:
+        return self.repository.retract_scholarship(code)
+
+    def transaction(self):
+        return self.repository.transaction()
+
+    def find_by_filters(self, criteria: FilterCriteria) -> List[Scholarship]:
+        key = ("find_by_filters", tuple(sorted(criteria_to_filters(criteria).items())))
+        return list(self._cached(key, lambda: self.repository.find_by_filters(criteria)))
+
+    def facet_counts(
+        self, criteria: FilterCriteria, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        fields = None if fields is None else tuple(fields)
+        key = ("facet_counts", tuple(sorted(criteria_to_filters(criteria).items())), fields)
+        counts = self._cached(key, lambda: self.repository.facet_counts(criteria, fields))
+        return {field: dict(values) for field, values in counts.items()}
+
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        stats["invalidations"] = self.invalidations
+        stats["rebased"] = self.rebased
+        stats["stale_served"] = self.stale_served
+        stats["kb_version"] = self._last_version
+        return stats
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self._fallback.clear()
+
+    def _cached(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        versioned_key = key + (self._current_version(),)
+        value = self.cache.get(versioned_key, _MISSING)
+        if value is _MISSING:
+            try:
+                value = compute()
+            except PrologTimeoutError:
+                value = self._stale(key)
+                if value is _MISSING:
+                    raise
+                return value
+            self.cache.put(versioned_key, value)
+            self._fallback.put(key, value)
+        return value
+
+    def _stale(self, key: tuple) -> Any:
+        value = self._fallback.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stale_served += 1
+            logger.warning(f"Prolog no respondió a tiempo; se sirve la caché para {key}")
+        return value
+
+    def _on_kb_reload(self, old_version: str, new_version: str, changed: Optional[Set[str]]) -> None:
+        def rebase(key: tuple) -> Optional[tuple]:
+            if changed is None or key[-1] != old_version:
+                return None
+            dependencies = CACHE_DEPENDENCIES.get(key[0])
+            if dependencies is None or dependencies(key) & changed:
+                return None
+            return key[:-1] + (new_version,)
+
+        kept, dropped = self.cache.rekey(rebase)
+        self.rebased += kept
+        self.invalidations += 1
+        self._last_version = new_version
+        logger.info(f"KB recargada: {kept} entradas de caché conservadas, {dropped} invalidadas")
+
+    def _current_version(self) -> str:
+        version = self._version()
+        if version != self._last_version:
+            if self._last_version is not None:
+                dropped = self.cache.discard_where(lambda key: key[-1] != version)
+                self.invalidations += 1
+                logger.info(f"KB modificada: {dropped} entradas de caché invalidadas")
+            self._last_version = version
+        return version
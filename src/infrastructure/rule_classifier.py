@@ -0,0 +1,188 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from infrastructure.name_index import normalize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLOW_CONFIG = Path("config/flow_config.json")
+ANY_OPTION = "cualquiera"
+
+# Respuestas a "¿Es todo correcto para que proceda con la búsqueda?"
+CONFIRMATION_LEXICON = {
+    "yes": {
+        "si", "s", "sip", "sii", "vale", "ok", "okay", "okey", "de acuerdo", "claro", "si claro",
+        "correcto", "es correcto", "si es correcto", "todo correcto", "perfecto", "exacto", "eso es",
+        "adelante", "venga", "dale", "esta bien", "si esta bien", "todo bien", "afirmativo", "busca",
+    },
+    "no": {
+        "no", "nop", "nope", "no es correcto", "incorrecto", "no esta bien", "esta mal",
+        "negativo", "para nada", "no quiero",
+    },
+}
+
+# Comandos de navegación del flujo guiado (mismos valores que interpret_guided_response)
+NAVIGATION_LEXICON = {
+    "atras": {"atras", "vuelve", "volver", "vuelve atras", "volver atras", "ir atras", "retrocede"},
+    "saltar_omitir": {
+        "salta", "saltar", "saltala", "saltatela", "salta esta pregunta", "saltar pregunta",
+        "omitir", "omite", "omitela", "siguiente", "siguiente pregunta", "paso", "pasa",
+    },
+    "cancelar": {"cancela", "cancelar", "cancelalo", "olvidalo", "dejalo", "salir", "para ya"},
+}
+
+ANY_SYNONYMS = {
+    "cualquiera", "cualquier", "me da igual", "da igual", "igual", "indiferente", "todas", "todos",
+    "sin preferencia", "no tengo preferencia", "ninguna preferencia", "no importa", "lo que sea",
+}
+
+# Sinónimos de las opciones de ask_field (las propias opciones ya se reconocen)
+OPTION_SYNONYMS: Dict[str, Dict[str, set]] = {
+    "campo_estudio": {
+        "ciencias_tecnicas": {"ingenieria", "ingenierias", "tecnicas", "ciencias", "tecnologia", "informatica"},
+        "ciencias_sociales": {"sociales", "economia", "derecho", "empresa", "ade", "educacion"},
+        "arte_humanidades": {"arte", "artes", "humanidades", "letras", "historia", "bellas artes"},
+        "salud": {"medicina", "enfermeria", "sanidad", "ciencias de la salud", "farmacia"},
+    },
+    "nivel": {
+        "grado": {"carrera", "grado universitario", "universidad", "licenciatura"},
+        "posgrado": {"postgrado", "master", "maestria", "doctorado", "phd"},
+        "postobligatoria_no_uni": {"fp", "formacion profesional", "ciclo formativo", "bachillerato"},
+    },
+    "financiamiento": {
+        "completa": {"total", "beca completa"},
+        "parcial": {"beca parcial"},
+        "ayuda_transporte": {"transporte", "ayuda para el transporte", "ayuda al transporte"},
+    },
+    "ubicacion": {
+        "espana": {"nacional", "en espana"},
+        "valencia": {"comunidad valenciana", "comunitat valenciana"},
+        "europa": {"europea", "en europa"},
+    },
+    "organismo": {
+        "publico_estatal": {"estatal", "estado", "ministerio", "gobierno"},
+        "publico_local": {"local", "ayuntamiento", "generalitat", "autonomico"},
+        "internacional": {"extranjero", "organismo internacional"},
+        "empresas": {"empresa", "privada", "privado", "privadas"},
+    },
+}
+
+# Palabras de relleno al principio ("para ingeniería", "pues un máster") o al final
+LEADING_FILLERS = {"pues", "bueno", "mmm", "eh", "para", "de", "en", "el", "la", "los", "las", "un", "una", "nivel"}
+TRAILING_FILLERS = ("por favor", "porfa", "gracias")
+
+
+def strip_fillers(text: str) -> str:
+    """
+    Texto normalizado sin muletillas ni preposiciones al principio ni
+    fórmulas de cortesía al final.
+    """
+    text = normalize(text)
+    changed = True
+    while changed and text:
+        changed = False
+        for filler in TRAILING_FILLERS:
+            if text.endswith(" " + filler):
+                text = text[: -len(filler) - 1]
+                changed = True
+        head, _, rest = text.partition(" ")
+        if rest and head in LEADING_FILLERS:
+            text = rest
+            changed = True
+    return text
+
+
+class RuleBasedClassifier:
+    """
+    Pre-clasificador determinista para los turnos triviales del flujo guiado
+    ("sí", "vale", "atrás", "cualquiera", "posgrado"), que así no pasan por
+    el LLM.
+
+    Solo responde cuando el mensaje completo, sin muletillas, es una entrada
+    de los léxicos (confirmación, navegación, "cualquiera") o una opción de
+    `ask_field` del flow_config.json o un sinónimo suyo para el campo que se
+    está preguntando. En cualquier otro caso devuelve None y decide el LLM.
+    """
+
+    def __init__(self, ask_field: Mapping[str, Mapping[str, Any]]):
+        self.options: Dict[str, Dict[str, str]] = {}
+        for criterion, config in ask_field.items():
+            lexicon: Dict[str, str] = {}
+            for option in config.get("options", []):
+                lexicon[normalize(option)] = option
+            for option, synonyms in OPTION_SYNONYMS.get(criterion, {}).items():
+                if option in config.get("options", []):
+                    lexicon.update(dict.fromkeys(map(normalize, synonyms), option))
+            if ANY_OPTION in config.get("options", []):
+                lexicon.update(dict.fromkeys(ANY_SYNONYMS, ANY_OPTION))
+            self.options[criterion] = lexicon
+        self._confirmations = _invert(CONFIRMATION_LEXICON)
+        self._navigation = _invert(NAVIGATION_LEXICON)
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {"confirmation": 0, "navigation": 0, "criterion": 0}
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config_path: Path = DEFAULT_FLOW_CONFIG) -> "RuleBasedClassifier":
+        with open(config_path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["ask_field"])
+
+    def classify(
+        self,
+        message: str,
+        pending_field: Optional[str] = None,
+        awaiting_confirmation: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Resuelve un turno del flujo guiado sin LLM.
+        Args:
+            pending_field: criterio (clave de ask_field) que se acaba de preguntar.
+            awaiting_confirmation: si se ha pedido confirmar la búsqueda.
+        Returns:
+            {"confirmation": "yes"|"no"}, {"navigation": ...} o
+            {"criterion": {"action", "field", "value"}}, o None si no hay certeza.
+        """
+        result = None
+        # Primero el mensaje tal cual ("para nada", "de acuerdo") y luego sin relleno
+        for text in dict.fromkeys((normalize(message), strip_fillers(message))):
+            result = self._match(text, pending_field, awaiting_confirmation)
+            if result is not None:
+                break
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits[next(iter(result))] += 1
+        if result is not None:
+            logger.debug(f"Turno resuelto sin LLM: {message!r} → {result}")
+        return result
+
+    def _match(
+        self, text: str, pending_field: Optional[str], awaiting_confirmation: bool
+    ) -> Optional[Dict[str, Any]]:
+        if awaiting_confirmation and text in self._confirmations:
+            return {"confirmation": self._confirmations[text]}
+        if text in self._navigation:
+            return {"navigation": self._navigation[text]}
+        options = self.options.get(pending_field, {})
+        if text in options:
+            return {"criterion": {"action": "select", "field": pending_field, "value": options[text]}}
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self.hits.values())
+            total = hits + self.misses
+            return {
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+            }
+
+
+def _invert(lexicon: Mapping[str, Iterable[str]]) -> Dict[str, str]:
+    return {normalize(phrase): label for label, phrases in lexicon.items() for phrase in phrases}
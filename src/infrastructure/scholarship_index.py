@@ -0,0 +1,380 @@
+import copy
+import logging
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from domain.entities import FilterCriteria, Scholarship
+
+logger = logging.getLogger(__name__)
+
+# Predicados de criterio en el mismo orden que los argumentos de buscar_beca/7
+CRITERIA = ("organismo", "campo_estudio", "financiamiento", "nivel", "ubicacion")
+
+# Campo de FilterCriteria → predicado de la KB
+FILTER_FIELDS = {
+    "organization": "organismo",
+    "area": "campo_estudio",
+    "financing": "financiamiento",
+    "education_level": "nivel",
+    "location": "ubicacion",
+}
+
+ANY_VALUE = "cualquiera"
+
+# Consultas (goal, vars) con las que se construye el índice
+INDEX_GOALS = (
+    [("findall(B, beca(B), Becas)", ["Becas"])]
+    + [(f"findall(B-V, {criterion}(B,V), Pairs)", ["Pairs"]) for criterion in CRITERIA]
+    + [
+        ("findall(B-I, info(B,I), Pairs)", ["Pairs"]),
+        ("findall(r(B,T,D), requisito(B,T,D), Reqs)", ["Reqs"]),
+    ]
+)
+
+
+def criteria_to_filters(criteria: FilterCriteria) -> Dict[str, Optional[str]]:
+    """
+    Traduce un FilterCriteria a {predicado: valor}. "cualquiera" equivale a None.
+    """
+    filters = {}
+    for field, predicate in FILTER_FIELDS.items():
+        value = getattr(criteria, field, None)
+        if isinstance(value, str) and value.strip().lower() == ANY_VALUE:
+            value = None
+        filters[predicate] = value
+    return filters
+
+
+def _buscar_beca_args(filters: Mapping[str, Optional[str]]) -> str:
+    args = []
+    for criterion in CRITERIA:
+        value = filters.get(criterion)
+        if value is None or value == ANY_VALUE:
+            args.append("_")
+        else:
+            escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+            args.append(f"'{escaped}'")
+    return ", ".join(args)
+
+
+def buscar_beca_goal(filters: Mapping[str, Optional[str]], var: str = "Becas") -> str:
+    """
+    Goal equivalente en Prolog: findall/3 sobre buscar_beca/7 con los filtros dados.
+    """
+    return f"findall(B, buscar_beca({_buscar_beca_args(filters)}, B, _), {var})"
+
+
+# Variables de cada solución de `buscar_beca_page_goal`
+PAGE_VARS = ["B", "Info", "Fin", "Reqs"]
+
+
+def buscar_beca_page_goal(
+    filters: Mapping[str, Optional[str]], offset: int = 0, limit: Optional[int] = None
+) -> str:
+    """
+    Goal que enumera (sin findall) las becas que cumplen los filtros, una por
+    solución, con los datos necesarios para construir cada Scholarship.
+
+    El orden es el de los hechos beca/1, como en buscar_beca/7, y las becas
+    repetidas se descartan con distinct/2, así que `offset`/`limit` (de
+    library(solution_sequences)) dan páginas estables para una misma KB.
+    """
+    solutions = f"distinct(B, buscar_beca({_buscar_beca_args(filters)}, B, Info))"
+    if offset:
+        solutions = f"offset({int(offset)}, {solutions})"
+    if limit is not None:
+        solutions = f"limit({int(limit)}, {solutions})"
+    return (
+        f"{solutions}, once((financiamiento(B, Fin) ; Fin = '')), "
+        "findall(T-D, requisito(B, T, D), Reqs)"
+    )
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """
+    Posiciones de los bits activos, de menor a mayor.
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _pair(term) -> Tuple[str, str]:
+    # swiplserver serializa B-V como {"functor": "-", "args": [B, V]}
+    args = term["args"]
+    return str(args[0]), args[1]
+
+
+def _group(pairs: List[Tuple[str, str]]) -> Dict[str, List[str]]:
+    grouped: Dict[str, List[str]] = {}
+    for beca, value in pairs:
+        grouped.setdefault(beca, []).append(str(value))
+    return grouped
+
+
+def parse_results(results: List[List[Dict]]):
+    """
+    Separa las filas de INDEX_GOALS (en el mismo orden) en
+    (ids, hechos por criterio, info, requisitos).
+    """
+    becas_rows, *criteria_rows, info_rows, req_rows = results
+    ids = [str(b) for b in becas_rows[0]["Becas"]]
+    facts = {
+        criterion: [_pair(term) for term in rows[0]["Pairs"]]
+        for criterion, rows in zip(CRITERIA, criteria_rows)
+    }
+    info = dict(_pair(term) for term in info_rows[0]["Pairs"])
+    requirements: Dict[str, Dict[str, str]] = {}
+    for term in req_rows[0]["Reqs"]:
+        beca, kind, text = term["args"]
+        requirements.setdefault(str(beca), {})[str(kind)] = text
+    return ids, facts, info, requirements
+
+
+class ScholarshipIndex:
+    """
+    Índice invertido en memoria sobre los hechos de criterio de la KB.
+
+    Cada beca ocupa un bit (según el orden de los hechos beca/1) y cada valor de
+    criterio guarda el bitset de las becas que lo tienen, de modo que un filtro
+    se resuelve con intersecciones de enteros. Reproduce la semántica de
+    buscar_beca/7: solo aparecen becas declaradas con beca/1 y con info/2.
+
+    Tras una recarga de la KB, `updated` aplica solo las diferencias: las becas
+    nuevas ocupan bits nuevos y las eliminadas dejan su bit vacío.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        facts: Mapping[str, List[Tuple[str, str]]],
+        info: Mapping[str, str],
+        requirements: Optional[Mapping[str, Dict[str, str]]] = None,
+    ):
+        self.ids: List[str] = []
+        self._position: Dict[str, int] = {}
+        for beca in ids:
+            if beca not in self._position:
+                self._position[beca] = len(self.ids)
+                self.ids.append(beca)
+
+        self._postings: Dict[str, Dict[str, int]] = {criterion: {} for criterion in CRITERIA}
+        self._values: Dict[str, Dict[str, List[str]]] = {criterion: {} for criterion in CRITERIA}
+        for criterion in CRITERIA:
+            for beca, value in facts.get(criterion, []):
+                pos = self._position.get(beca)
+                if pos is None:
+                    # Hechos de becas no declaradas con beca/1: buscar_beca nunca las devuelve
+                    continue
+                postings = self._postings[criterion]
+                value = str(value)
+                postings[value] = postings.get(value, 0) | (1 << pos)
+                self._values[criterion].setdefault(beca, []).append(value)
+
+        self.info = {beca: text for beca, text in info.items() if beca in self._position}
+        self.requirements = dict(requirements or {})
+        self._searchable = 0
+        for beca in self.info:
+            self._searchable |= 1 << self._position[beca]
+
+        # Hechos tal y como llegaron, para calcular diferencias en `updated`
+        self._declared = list(self.ids)
+        self._facts = {criterion: list(facts.get(criterion, [])) for criterion in CRITERIA}
+        self._raw_info = dict(info)
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_service(cls, service) -> "ScholarshipIndex":
+        """
+        Construye el índice leyendo los hechos de la KB con un PrologService
+        (una sola consulta por lotes).
+        """
+        return cls.from_results([result.unwrap() for result in service.query_many(INDEX_GOALS)])
+
+    @classmethod
+    def from_results(cls, results: List[List[Dict]]) -> "ScholarshipIndex":
+        """
+        Construye el índice a partir de las filas de INDEX_GOALS, en el mismo orden.
+        """
+        index = cls(*parse_results(results))
+        logger.info(f"Índice de becas construido: {len(index)} becas")
+        return index
+
+    def updated(self, results: List[List[Dict]]) -> Tuple["ScholarshipIndex", Set[str]]:
+        """
+        Índice para una nueva versión de la KB (filas de INDEX_GOALS).
+
+        No modifica este índice, que puede seguir atendiendo búsquedas: devuelve
+        uno nuevo que comparte las estructuras de los criterios sin cambios, y el
+        conjunto de predicados que han cambiado ("beca", criterios, "info",
+        "requisito"). Si cambia el orden de las becas existentes (o se acumulan
+        demasiados huecos) se reconstruye entero.
+        """
+        ids, facts, info, requirements = parse_results(results)
+        declared = list(dict.fromkeys(ids))
+        changed = {c for c in CRITERIA if facts.get(c, []) != self._facts[c]}
+        if declared != self._declared:
+            changed.add("beca")
+        if info != self._raw_info:
+            changed.add("info")
+        if requirements != self.requirements:
+            changed.add("requisito")
+        if not changed:
+            return self, changed
+
+        if not self._can_extend(declared):
+            index = ScholarshipIndex(declared, facts, info, requirements)
+            logger.info(f"Índice de becas reconstruido: {len(index)} becas")
+            return index, changed
+
+        index = copy.copy(self)
+        index._apply(declared, facts, info, requirements, changed)
+        logger.info(f"Índice de becas actualizado ({', '.join(sorted(changed))}): {len(index)} becas")
+        return index, changed
+
+    def _can_extend(self, declared: List[str]) -> bool:
+        # Las becas que siguen deben conservar su orden relativo y las nuevas ir
+        # al final, para que el orden de los bits siga siendo el de beca/1
+        kept = [beca for beca in declared if beca in self._position]
+        declared_set = set(declared)
+        if kept != [beca for beca in self._declared if beca in declared_set]:
+            return False
+        if declared[:len(kept)] != kept:
+            return False
+        holes = len(self.ids) - len(kept)
+        return holes <= max(len(declared) // 2, 16)
+
+    def _apply(self, declared, facts, info, requirements, changed: Set[str]) -> None:
+        old_position = self._position
+        removed = set(self._declared) - set(declared)
+        added = [beca for beca in declared if beca not in old_position]
+
+        self.ids = list(self.ids)
+        self._position = dict(old_position)
+        for beca in removed:
+            del self._position[beca]
+        for beca in added:
+            self._position[beca] = len(self.ids)
+            self.ids.append(beca)
+        touched = removed | set(added)
+
+        self._postings = dict(self._postings)
+        self._values = dict(self._values)
+        for criterion in CRITERIA:
+            if criterion not in changed and not touched:
+                continue
+            old_by_beca = _group(self._facts[criterion])
+            new_by_beca = _group(facts.get(criterion, []))
+            affected = touched | {
+                beca for beca in old_by_beca.keys() | new_by_beca.keys()
+                if old_by_beca.get(beca) != new_by_beca.get(beca)
+            }
+            if not affected:
+                continue
+            postings = dict(self._postings[criterion])
+            values = dict(self._values[criterion])
+            for beca in affected:
+                pos = old_position.get(beca)
+                if pos is not None:
+                    for value in values.pop(beca, []):
+                        bits = postings.get(value, 0) & ~(1 << pos)
+                        if bits:
+                            postings[value] = bits
+                        else:
+                            postings.pop(value, None)
+                pos = self._position.get(beca)
+                if pos is not None and beca in new_by_beca:
+                    values[beca] = new_by_beca[beca]
+                    for value in values[beca]:
+                        postings[value] = postings.get(value, 0) | (1 << pos)
+            self._postings[criterion] = postings
+            self._values[criterion] = values
+
+        self.info = {beca: text for beca, text in info.items() if beca in self._position}
+        for beca in touched | (self._raw_info.keys() ^ info.keys()):
+            pos = old_position.get(beca)
+            if pos is not None:
+                self._searchable &= ~(1 << pos)
+            if beca in self.info:
+                self._searchable |= 1 << self._position[beca]
+
+        self.requirements = dict(requirements)
+        self._declared = declared
+        self._facts = {criterion: list(facts.get(criterion, [])) for criterion in CRITERIA}
+        self._raw_info = dict(info)
+
+    # ------------------------------------------------------------------
+    def match(self, filters: Mapping[str, Optional[str]]) -> int:
+        """
+        Bitset de las becas que cumplen los filtros {predicado: valor}.
+        Los valores None o "cualquiera" no restringen.
+        """
+        bits = self._searchable
+        for criterion, value in filters.items():
+            if value is None or value == ANY_VALUE:
+                continue
+            if criterion not in self._postings:
+                raise ValueError(f"Criterio desconocido: {criterion}")
+            bits &= self._postings[criterion].get(value, 0)
+            if not bits:
+                break
+        return bits
+
+    def search(self, filters: Mapping[str, Optional[str]]) -> List[str]:
+        """
+        IDs de las becas que cumplen los filtros, en el orden de los hechos beca/1
+        (el mismo en que las devuelve buscar_beca/7).
+        """
+        return [self.ids[pos] for pos in iter_bits(self.match(filters))]
+
+    def find(self, criteria: FilterCriteria) -> List[Scholarship]:
+        return [self.scholarship(beca) for beca in self.search(criteria_to_filters(criteria))]
+
+    def facets(
+        self, filters: Mapping[str, Optional[str]], criteria: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Número de becas por valor de cada criterio, dentro de las que cumplen
+        los filtros. Por defecto se calculan los criterios aún sin fijar.
+
+        Para cada criterio se ignora su propio filtro, de modo que los recuentos
+        dicen cuántas becas quedarían al elegir (o cambiar a) cada valor. Solo
+        aparecen los valores con al menos una beca.
+        """
+        if criteria is None:
+            criteria = [
+                c for c in CRITERIA
+                if filters.get(c) is None or filters.get(c) == ANY_VALUE
+            ]
+        counts: Dict[str, Dict[str, int]] = {}
+        for criterion in criteria:
+            if criterion not in self._postings:
+                raise ValueError(f"Criterio desconocido: {criterion}")
+            base = self.match({c: v for c, v in filters.items() if c != criterion})
+            counts[criterion] = {}
+            for value, bits in self._postings[criterion].items():
+                count = (base & bits).bit_count()
+                if count:
+                    counts[criterion][value] = count
+        return counts
+
+    def values(self, criterion: str) -> List[str]:
+        """
+        Valores distintos presentes en la KB para un criterio.
+        """
+        return sorted(self._postings[criterion])
+
+    def scholarship(self, beca: str) -> Scholarship:
+        financing = self._values["financiamiento"].get(beca, [""])[0]
+        return Scholarship(
+            code=beca,
+            title=self.info.get(beca, beca),
+            financing=financing,
+            requirements=dict(self.requirements.get(beca, {})),
+        )
+
+    def __contains__(self, beca: str) -> bool:
+        return beca in self._position
+
+    def __len__(self) -> int:
+        return len(self._position)
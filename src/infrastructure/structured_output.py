@@ -0,0 +1,187 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from domain.interfaces import LLMInterface, LLMStreamError
+from infrastructure.json_stream import JsonObjectReader, generate_json
+
+logger = logging.getLogger(__name__)
+
+# Reparaciones como mucho por llamada, y solo si aún no se ha gastado el presupuesto (s)
+DEFAULT_MAX_REPAIRS = 2
+DEFAULT_REPAIR_BUDGET = 4.0
+
+# Los prompts enseñan `"action": "null"` entre comillas: ambas formas valen
+NULLS = (None, "null")
+
+REPAIR_PROMPT = """Tu respuesta anterior no es válida: {error}.
+
+Respuesta anterior:
+{response}
+
+Devuelve **solo** el objeto JSON corregido, con estas claves y valores permitidos:
+{schema}
+
+JSON corregido:
+"""
+
+JSON_TYPES = {"string": str, "null": type(None), "boolean": bool, "integer": int, "number": (int, float)}
+
+
+def validate(data: Any, schema: Dict[str, Any]) -> Optional[str]:
+    """
+    Comprueba `data` contra un esquema JSON Schema reducido (objeto con
+    `required` y, por propiedad, `enum` o `type`). Devuelve el primer error,
+    o None si es válido.
+    """
+    if not isinstance(data, dict):
+        return f"se esperaba un objeto JSON, no {type(data).__name__}"
+    for key in schema.get("required", []):
+        if key not in data:
+            return f"falta la clave '{key}'"
+    for key, rule in schema.get("properties", {}).items():
+        if key not in data:
+            continue
+        value = data[key]
+        if "enum" in rule and value not in rule["enum"]:
+            return f"'{key}' vale {value!r} y debe ser uno de: {describe_values(rule)}"
+        if "type" in rule:
+            types = rule["type"] if isinstance(rule["type"], list) else [rule["type"]]
+            if not any(_is_type(value, t) for t in types):
+                return f"'{key}' debe ser de tipo {' | '.join(types)}"
+    return None
+
+
+def _is_type(value: Any, json_type: str) -> bool:
+    # En Python bool es un int: true/false solo cuentan como boolean
+    if isinstance(value, bool):
+        return json_type == "boolean"
+    return isinstance(value, JSON_TYPES[json_type])
+
+
+def describe_values(rule: Dict[str, Any]) -> str:
+    if "enum" in rule:
+        return " | ".join(dict.fromkeys("null" if v is None else str(v) for v in rule["enum"]))
+    types = rule.get("type", "string")
+    return " | ".join(types) if isinstance(types, list) else types
+
+
+def describe(schema: Dict[str, Any]) -> str:
+    """Resumen corto del esquema para el prompt de reparación."""
+    return "\n".join(f"- {key}: {describe_values(rule)}" for key, rule in schema.get("properties", {}).items())
+
+
+def parse(text: str) -> Tuple[Optional[Any], Optional[str]]:
+    """
+    Primer objeto JSON de `text` y, si no lo hay o no se puede decodificar, el error.
+    """
+    reader = JsonObjectReader()
+    reader.feed(text)
+    if not reader.done:
+        return None, "no contiene un objeto JSON completo"
+    try:
+        return json.loads(reader.object()), None
+    except json.JSONDecodeError as e:
+        return None, f"JSON mal formado ({e.msg})"
+
+
+class StructuredOutput:
+    """
+    Salida JSON de un clasificador validada contra el esquema de cada tarea.
+    Si la respuesta no se puede leer o no cumple el esquema, se pide al LLM
+    que la corrija con un prompt corto (la respuesta, el error y el esquema),
+    como mucho `max_repairs` veces y mientras no se supere `latency_budget`
+    segundos desde el inicio de la llamada.
+
+    Lleva por tarea el número de llamadas, fallos de lectura y de validación
+    de la primera respuesta, reparaciones y llamadas que acaban sin JSON válido.
+    """
+
+    def __init__(
+        self,
+        llm: LLMInterface,
+        max_repairs: int = DEFAULT_MAX_REPAIRS,
+        latency_budget: Optional[float] = DEFAULT_REPAIR_BUDGET,
+    ):
+        self.llm = llm
+        self.max_repairs = max_repairs
+        self.latency_budget = latency_budget
+        self._counts: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def generate(
+        self,
+        task: str,
+        prompt: str,
+        schema: Dict[str, Any],
+        max_tokens: Optional[int] = None,
+        stop: Iterable[str] = (),
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Objeto JSON válido para `schema`, o None si no se consigue.
+        """
+        start = time.perf_counter()
+        response = self._generate(task, prompt, max_tokens, stop)
+        data, error = self._check(response, schema)
+        self._count(task, "calls")
+        if error is not None:
+            self._count(task, "parse_failures" if data is None else "invalid")
+
+        repairs = 0
+        while error is not None and repairs < self.max_repairs:
+            if self.latency_budget is not None and time.perf_counter() - start > self.latency_budget:
+                logger.warning(f"[{task}] Sin tiempo para reparar la respuesta del LLM: {error}")
+                break
+            repairs += 1
+            self._count(task, "repairs")
+            logger.info(f"[{task}] Respuesta no válida ({error}), reintento {repairs}: {response!r}")
+            repair = REPAIR_PROMPT.format(error=error, response=response.strip() or "(vacía)", schema=describe(schema))
+            response = self._generate(task, repair, max_tokens, stop)
+            data, error = self._check(response, schema)
+
+        if error is not None:
+            self._count(task, "failed")
+            logger.error(f"[{task}] El LLM no devolvió un JSON válido ({error}). Raw: {response!r}")
+            return None
+        if repairs:
+            self._count(task, "repaired")
+        return data
+
+    def _generate(self, task: str, prompt: str, max_tokens: Optional[int], stop: Iterable[str]) -> str:
+        # Una respuesta cortada a mitad cuenta como vacía (y no se cachea)
+        try:
+            return generate_json(self.llm, prompt, max_tokens=max_tokens, stop=stop)
+        except LLMStreamError as e:
+            logger.warning(f"[{task}] {e}")
+            return ""
+
+    def _check(self, response: str, schema: Dict[str, Any]) -> Tuple[Optional[Any], Optional[str]]:
+        data, error = parse(response)
+        if error is None:
+            error = validate(data, schema)
+        return data, error
+
+    def _count(self, task: str, name: str) -> None:
+        with self._lock:
+            self._counts[task][name] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            stats = {}
+            for task, counts in self._counts.items():
+                calls = counts["calls"]
+                stats[task] = {
+                    "calls": calls,
+                    "parse_failures": counts["parse_failures"],
+                    "invalid": counts["invalid"],
+                    "repairs": counts["repairs"],
+                    "repaired": counts["repaired"],
+                    "failed": counts["failed"],
+                    # Primera respuesta ilegible o fuera de esquema / llamada sin JSON válido al final
+                    "parse_failure_rate": (counts["parse_failures"] + counts["invalid"]) / calls if calls else 0.0,
+                    "failure_rate": counts["failed"] / calls if calls else 0.0,
+                }
+            return stats
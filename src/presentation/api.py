@@ -1,20 +1,85 @@
-from fastapi import FastAPI
+import asyncio
+import json
+from dataclasses import asdict
+from functools import lru_cache
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 
-from application.pipeline.factory import build_pipeline
-from application.pipeline.interfaces import HandlerContext
+from application.pipeline.interfaces import HandlerContext, IHandler
+from domain.entities import FilterCriteria
+from domain.interfaces import LLMInterface, LLMStreamError
+from infrastructure.argument_classifier import ArgumentClassifier
+from infrastructure.async_prolog_connector import AsyncPrologConnector
+from infrastructure.intention_classifier import IntentionClassifier
+from infrastructure.kb_reload import DEFAULT_WATCH_INTERVAL
+from infrastructure.kb_registry import KBRegistry, UnknownTenantError
+from infrastructure.prolog_connector import UnknownCriterionError
+from infrastructure.prompt_warmup import warm_up
 
-# Inicialización de FastAPI y construcción de la pipeline
+# Inicialización de FastAPI
 app = FastAPI()
-# Aquí debes proporcionar las dependencias reales de tu aplicación:
-# llm_client, criteria_repo, scholarship_repo, fuzzy_matcher, etc.
-pipeline = build_pipeline(
-    llm_client=...,          # Cliente LLM (p.ej. instancia de LLAMAInterface)
-    criteria_repo=...,       # Implementación de CriteriaRepository (PrologCriteriaRepository)
-    scholarship_repo=...,    # Implementación de ScholarshipRepository (PrologScholarshipRepository)
-    fuzzy_matcher=...        # Implementación de FuzzyMatcher
-)
+
+@lru_cache(maxsize=1)
+def get_pipeline() -> IHandler:
+    """
+    Pipeline de handlers, construida en la primera petición de chat (los
+    endpoints de becas y criterios no la necesitan).
+    """
+    from application.pipeline.factory import build_pipeline
+    # Aquí debes proporcionar las dependencias reales de tu aplicación:
+    # llm_client, criteria_repo, scholarship_repo, fuzzy_matcher, etc.
+    return build_pipeline(
+        llm_client=...,          # Cliente LLM (p.ej. instancia de LLAMAInterface)
+        criteria_repo=...,       # Implementación de CriteriaRepository (PrologCriteriaRepository)
+        scholarship_repo=...,    # Implementación de ScholarshipRepository (PrologScholarshipRepository)
+        fuzzy_matcher=...        # Implementación de FuzzyMatcher
+    )
+
+# Un repositorio asíncrono por KB (config/tenants.json): las consultas a Prolog
+# no ocupan hilos del threadpool y los tenants con la misma KB lo comparten
+async_scholarship_repos = KBRegistry.from_config(lambda kb_path: AsyncPrologConnector(kb_path=kb_path))
+# Cada cuánto se mira si ha cambiado el fichero de alguna KB (s)
+KB_WATCH_INTERVAL = DEFAULT_WATCH_INTERVAL
+
+def tenant_repository(x_tenant: Optional[str] = Header(None)) -> AsyncPrologConnector:
+    """
+    Repositorio de la KB del tenant indicado en la cabecera `X-Tenant`
+    (sin cabecera, el tenant por defecto).
+    """
+    try:
+        return async_scholarship_repos.get(x_tenant)
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"Tenant desconocido: {x_tenant}")
+
+@app.on_event("startup")
+async def warm_up_llm() -> None:
+    """
+    Carga los modelos en Ollama y deja evaluada la parte fija de los prompts
+    de los clasificadores: la primera petición no paga la carga del modelo y
+    las siguientes solo evalúan la parte variable.
+    """
+    for classifier in (IntentionClassifier(), ArgumentClassifier()):
+        await asyncio.to_thread(warm_up, classifier.llm, classifier.prompt_prefixes())
+
+@app.on_event("startup")
+async def watch_kbs() -> None:
+    """
+    Recarga en caliente la KB de cada tenant cuando cambia su fichero: las
+    respuestas (y el índice, que va por versión de la KB) pasan a la nueva
+    sin reiniciar la API. Los repositorios se crean aquí; los procesos swipl
+    siguen lanzándose en la primera consulta.
+    """
+    for tenant in async_scholarship_repos.tenants():
+        async_scholarship_repos.get(tenant)
+    for repo in async_scholarship_repos.instances():
+        repo.service.watch(KB_WATCH_INTERVAL)
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    for repo in async_scholarship_repos.instances():
+        await repo.close()
 
 # Modelos de datos para request y response
 class ChatRequest(BaseModel):
@@ -26,7 +91,7 @@ class ChatResponse(BaseModel):
     history: List[Dict[str, str]]
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest) -> ChatResponse:
+def chat(req: ChatRequest, pipeline: IHandler = Depends(get_pipeline)) -> ChatResponse:
     """
     Endpoint para procesar mensajes de chat.
     - Recibe el mensaje del usuario y un historial opcional.
@@ -41,7 +106,135 @@ def chat(req: ChatRequest) -> ChatResponse:
     # 2. Procesar pipeline
     ctx = pipeline.handle(ctx)
     # 3. Devolver respuesta y nuevo historial
+    if ctx.response_stream is not None:
+        try:
+            text = "".join(ctx.response_stream)
+        except LLMStreamError:
+            # Una respuesta cortada no se da por buena
+            raise HTTPException(status_code=502, detail=LLMInterface.error_response)
+        return ChatResponse(response=_finish_stream(ctx, text), history=ctx.history)
     return ChatResponse(
-        response=ctx.response_payload.get("text", ""),
+        response=_response_text(ctx),
         history=ctx.history
     )
+
+def _response_text(ctx: HandlerContext) -> str:
+    """
+    Respuesta que no se genera por fragmentos: el mensaje de las plantillas
+    o, si no lo hay, el texto de response_payload (que puede no existir).
+    """
+    if ctx.response_message is not None:
+        return ctx.response_message
+    payload = ctx.response_payload if isinstance(ctx.response_payload, dict) else {}
+    return payload.get("text", "")
+
+def _finish_stream(ctx: HandlerContext, text: str) -> str:
+    """
+    Añade al historial el turno cuya respuesta se generó por fragmentos.
+    """
+    text = text.strip()
+    ctx.history.append({"role": "user", "content": ctx.raw_text})
+    ctx.history.append({"role": "assistant", "content": text})
+    return text
+
+def _sse(data: Dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+def chat_stream(req: ChatRequest, pipeline: IHandler = Depends(get_pipeline)) -> StreamingResponse:
+    """
+    Igual que /chat, pero como Server-Sent Events: un evento `data` con cada
+    fragmento ({"token": ...}) según lo genera el LLM y un evento `done` final
+    con la respuesta completa y el historial actualizado. Las respuestas que
+    no vienen del LLM (plantillas, resultados de búsqueda) llegan en un solo
+    fragmento. Si el LLM falla a mitad de la respuesta, el evento final es
+    `error` (con el mensaje de error) y el turno no se añade al historial.
+    """
+    ctx = pipeline.handle(HandlerContext(raw_text=req.message, history=req.history or []))
+
+    def events() -> Iterator[str]:
+        if ctx.response_stream is None:
+            text = _response_text(ctx)
+            yield _sse({"token": text})
+        else:
+            chunks = []
+            try:
+                for token in ctx.response_stream:
+                    chunks.append(token)
+                    yield _sse({"token": token})
+            except LLMStreamError:
+                yield _sse({"error": LLMInterface.error_response}, event="error")
+                return
+            text = _finish_stream(ctx, "".join(chunks))
+        yield _sse({"response": text, "history": ctx.history}, event="done")
+
+    # Sin buffering en proxies (nginx) para que cada token salga al momento
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+class ScholarshipResponse(BaseModel):
+    code: str
+    title: str
+    financing: str
+    requirements: Dict[str, str]
+
+class ScholarshipPageResponse(BaseModel):
+    items: List[ScholarshipResponse]
+    offset: int
+    limit: int
+    next_offset: Optional[int] = None
+    kb_version: Optional[str] = None
+
+@app.get("/becas", response_model=ScholarshipPageResponse)
+async def search_scholarships(
+    organismo: Optional[str] = None,
+    campo_estudio: Optional[str] = None,
+    financiamiento: Optional[str] = None,
+    nivel: Optional[str] = None,
+    ubicacion: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    repo: AsyncPrologConnector = Depends(tenant_repository),
+) -> ScholarshipPageResponse:
+    """
+    Busca becas por criterios ("cualquiera" o ausente = sin filtro), por páginas.
+    La siguiente página se pide con `offset=next_offset`; `next_offset` es null
+    en la última.
+    """
+    criteria = FilterCriteria(
+        organization=organismo,
+        area=campo_estudio,
+        financing=financiamiento,
+        education_level=nivel,
+        location=ubicacion,
+    )
+    page = await repo.find_page(criteria, offset, limit)
+    return ScholarshipPageResponse(**asdict(page))
+
+@app.get("/criterios/{criterion}", response_model=List[str])
+async def list_criterion_values(
+    criterion: str, repo: AsyncPrologConnector = Depends(tenant_repository)
+) -> List[str]:
+    """
+    Valores disponibles para un criterio de búsqueda (organismo, nivel...).
+    """
+    try:
+        return await repo.get_criteria(criterion)
+    except UnknownCriterionError:
+        raise HTTPException(status_code=404, detail=f"Criterio desconocido: {criterion}")
+
+@app.get("/stats/prolog")
+def prolog_stats(repo: AsyncPrologConnector = Depends(tenant_repository)) -> Dict:
+    """
+    Estado del pool de Prolog del tenant y métricas de las consultas: latencias
+    por plantilla de goal, errores, sin resultados, timeouts y consultas lentas.
+    """
+    return repo.service.stats()
+
+@app.get("/stats/tenants")
+def tenant_stats() -> Dict:
+    """
+    Tenants registrados, agrupados por KB (los de KBs idénticas comparten workers).
+    """
+    return async_scholarship_repos.stats()
@@ -0,0 +1,59 @@
+from src.application.pipeline.handlers import CriteriaSearchHandler, FastPathHandler
+from src.application.pipeline.interfaces import BuscarPorCriterioDTO, HandlerContext
+from src.infrastructure.llm_response_builder import TemplateResponseBuilder
+
+
+class NoLLMClassifier:
+    """Los comandos de navegación no deben llegar al LLM."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"Llamada inesperada al clasificador: {name}")
+
+
+class RecordingResponder(TemplateResponseBuilder):
+    def __init__(self):
+        super().__init__(llama_client=object())
+        self.acts = []
+
+    def render(self, acts, ctx):
+        # interfaces.py y handlers.py importan DialogAct por rutas distintas
+        self.acts = [(a.type, a.field, a.old, a.new) for a in acts]
+        return super().render(acts, ctx)
+
+
+def navigate(message, criteria):
+    responder = RecordingResponder()
+    search = CriteriaSearchHandler(classifier=NoLLMClassifier(), responder=responder)
+    ctx = FastPathHandler(next_handler=search).handle(HandlerContext(
+        raw_text=message, normalized_text=message,
+        last_intention="buscar_por_criterio", filter_criteria=criteria,
+    ))
+    return ctx, responder.acts
+
+
+def test_atras_clears_the_last_answered_field():
+    ctx, acts = navigate("atras", BuscarPorCriterioDTO(area="salud", education_level="posgrado"))
+    assert ctx.filter_criteria == BuscarPorCriterioDTO(area="salud")
+    assert acts == [
+        ("clear_field", "nivel", "posgrado", None),
+        ("ask_field", "education_level", None, None),
+    ]
+    assert ctx.response_message.startswith("Vale, volvemos atrás: borramos nivel de estudios (posgrado).")
+    assert "¿Para qué nivel educativo es la beca?" in ctx.response_message
+
+
+def test_saltar_answers_the_pending_field_with_cualquiera():
+    ctx, acts = navigate("saltar", BuscarPorCriterioDTO(area="salud"))
+    assert ctx.filter_criteria == BuscarPorCriterioDTO(area="salud", education_level="cualquiera")
+    assert acts == [
+        ("skip_field", "nivel", None, "cualquiera"),
+        ("ask_field", "location", None, None),
+    ]
+    assert "¿En qué ubicación geográfica te interesa estudiar?" in ctx.response_message
+
+
+def test_cancelar_discards_the_search():
+    ctx, acts = navigate("cancelar", BuscarPorCriterioDTO(area="salud", education_level="grado"))
+    assert ctx.filter_criteria is None
+    assert acts == [("cancel_search", None, None, None)]
+    assert ctx.response_message.startswith("Vale, cancelamos la búsqueda.")
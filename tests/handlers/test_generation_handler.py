@@ -0,0 +1,33 @@
+from src.application.pipeline.handlers import GenerationHandler
+from src.application.pipeline.interfaces import HandlerContext
+
+
+class StreamingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_stream(self, prompt, history=None):
+        self.prompts.append(prompt)
+        yield from ["Suelen pedir ", "el DNI ", "y el expediente."]
+
+
+def test_general_qa_answer_is_left_as_a_stream():
+    llm = StreamingLLM()
+    ctx = HandlerContext(
+        raw_text="¿Qué documentos piden?",
+        normalized_text="qué documentos piden?",
+        intention="general_qa",
+        history=[{"role": "assistant", "content": "¡Hola! ¿En qué puedo ayudarte?"}],
+    )
+    ctx = GenerationHandler(llm).handle(ctx)
+    # El LLM no se llama hasta que alguien consume el stream
+    assert llm.prompts == []
+    assert "".join(ctx.response_stream) == "Suelen pedir el DNI y el expediente."
+    assert "Asistente: ¡Hola! ¿En qué puedo ayudarte?" in llm.prompts[0]
+    assert "qué documentos piden?" in llm.prompts[0]
+
+
+def test_other_intents_are_not_generated():
+    llm = StreamingLLM()
+    ctx = GenerationHandler(llm).handle(HandlerContext(raw_text="para un máster", intention="buscar_por_criterio"))
+    assert ctx.response_stream is None
@@ -0,0 +1,32 @@
+from src.application.pipeline import handlers
+from src.application.pipeline.handlers import CriteriaSearchHandler, IntentHandler
+from src.infrastructure.llm_response_builder import TemplateResponseBuilder
+
+
+class StubClassifier:
+    built = 0
+
+    def __init__(self, *args, **kwargs):
+        StubClassifier.built += 1
+
+    @classmethod
+    def from_config(cls, **kwargs):
+        return cls(**kwargs)
+
+
+def test_default_classifiers_are_built_per_handler(monkeypatch):
+    # Si se crearan al importar el módulo, el stub nunca se usaría
+    monkeypatch.setattr(handlers, "ArgumentClassifier", StubClassifier)
+    monkeypatch.setattr(handlers, "IntentionClassifier", StubClassifier)
+    monkeypatch.setattr(handlers.FallbackIntentClassifier, "from_model_file", classmethod(lambda cls, fallback: fallback))
+    StubClassifier.built = 0
+    responder = TemplateResponseBuilder(llama_client=object())
+
+    first = CriteriaSearchHandler(responder=responder)
+    second = CriteriaSearchHandler(responder=responder)
+    intent = IntentHandler()
+
+    assert isinstance(first.classifier, StubClassifier)
+    assert first.classifier is not second.classifier
+    assert isinstance(intent.classifier, StubClassifier)
+    assert StubClassifier.built == 3
@@ -0,0 +1,42 @@
+from src.application.pipeline.handlers import CriteriaSearchHandler, JointTurnHandler
+from src.application.pipeline.interfaces import BuscarPorCriterioDTO, HandlerContext
+from src.infrastructure.llm_response_builder import TemplateResponseBuilder
+
+
+class TurnClassifier:
+    def __init__(self, criterion):
+        self.criterion = criterion
+        self.criteria_names = None
+
+    def extract_turn(self, context=None, last_intention=None, awaiting_confirmation=False, criteria_names=()):
+        self.criteria_names = list(criteria_names)
+        return {"intention": "buscar_por_criterio", "criterion": self.criterion, "confirmation": None}
+
+
+def pending_search():
+    return BuscarPorCriterioDTO(area="salud", education_level=None, location=None, organization=None)
+
+
+def test_joint_turn_only_offers_criteria_the_dto_can_store():
+    classifier = TurnClassifier({"action": None, "field": None, "value": None})
+    JointTurnHandler(classifier).handle(HandlerContext(
+        raw_text="para un máster", last_intention="buscar_por_criterio", filter_criteria=pending_search(),
+    ))
+    assert "financiamiento" not in classifier.criteria_names
+    assert sorted(classifier.criteria_names) == ["campo_estudio", "nivel", "organismo", "ubicacion"]
+
+    fc = BuscarPorCriterioDTO(active_fields=["campo_estudio", "nivel", "financiamiento"])
+    JointTurnHandler(classifier).handle(HandlerContext(
+        raw_text="para un máster", last_intention="buscar_por_criterio", filter_criteria=fc,
+    ))
+    assert classifier.criteria_names == ["campo_estudio", "nivel"]
+
+
+def test_unmapped_criterion_from_the_joint_turn_is_ignored():
+    classifier = TurnClassifier({"action": "select", "field": "financiamiento", "value": "completa"})
+    search = CriteriaSearchHandler(classifier=classifier, responder=TemplateResponseBuilder(llama_client=object()))
+    ctx = search.handle(JointTurnHandler(classifier).handle(HandlerContext(
+        raw_text="que sea completa", last_intention="buscar_por_criterio", filter_criteria=pending_search(),
+    )))
+    assert ctx.filter_criteria == pending_search()
+    assert ctx.response_message is not None
@@ -90,3 +90,41 @@ def test_render_without_history_excludes_context():
     builder.render(acts, ctx)
 
     assert "<context>" not in dummy_llm.last_prompt
+
+
+class FacetRepository:
+    def __init__(self, counts):
+        self.counts = counts
+        self.calls = []
+
+    def facet_counts(self, criteria, fields=None):
+        self.calls.append((criteria.area, tuple(fields)))
+        return {field: self.counts for field in fields}
+
+
+def test_ask_field_only_offers_options_with_results():
+    repository = FacetRepository({"grado": 3, "posgrado": 1})
+    builder = TemplateResponseBuilder(llama_client=object(), repository=repository)
+    ctx = DummyCtx()
+    ctx.filter_criteria = BuscarPorCriterioDTO(area="salud")
+
+    text = builder.render([DialogAct(type="ask_field", field="education_level")], ctx)
+
+    assert repository.calls == [("salud", ("nivel",))]
+    assert "Grado" in text and "Posgrado" in text and "Cualquiera" in text
+    assert "Postobligatoria no uni" not in text
+
+
+def test_otros_is_offered_while_unlisted_values_have_results():
+    # "otro" no es ninguna de las opciones de nivel: cae en "otros"
+    repository = FacetRepository({"grado": 3, "otro": 1})
+    builder = TemplateResponseBuilder(llama_client=object(), repository=repository)
+    ctx = DummyCtx()
+    ctx.filter_criteria = BuscarPorCriterioDTO(area="salud")
+
+    text = builder.render([DialogAct(type="ask_field", field="education_level")], ctx)
+    assert "Grado" in text and "Otros" in text and "Posgrado" not in text
+
+    repository.counts = {"grado": 3}
+    text = builder.render([DialogAct(type="ask_field", field="education_level")], ctx)
+    assert "Otros" not in text
@@ -46,3 +46,83 @@ def test_get_all_scholarships_names(prolog_svc):
     assert isinstance(scholarships, list)
     assert all(isinstance(scholarship, str) for scholarship in scholarships), "Todos los valores de beca deben ser strings"
 
+
+def test_find_by_filters_matches_buscar_beca(prolog_svc):
+    from src.domain.entities import FilterCriteria
+    from src.infrastructure.scholarship_index import CRITERIA, buscar_beca_goal
+
+    index = prolog_svc.index
+    for criterion in CRITERIA:
+        for value in index.values(criterion) + ["cualquiera"]:
+            filters = {criterion: value}
+            rows = prolog_svc.service.query(buscar_beca_goal(filters), ["Becas"])
+            expected = list(dict.fromkeys(str(b) for b in rows[0]["Becas"]))
+            assert index.search(filters) == expected, f"Discrepancia para {filters}"
+
+    results = prolog_svc.find_by_filters(FilterCriteria(education_level="grado", location="valencia"))
+    assert [s.code for s in results] == ["beca_upv_deporte", "beca_gv_transporte"]
+
+def test_query_many_matches_individual_queries(prolog_svc):
+    service = prolog_svc.service
+    goals = [(f"setof(Type, {c}(_,Type), Types)", ["Types"]) for c in ("organismo", "nivel", "ubicacion")]
+    results = service.query_many(goals + [("no_existe(X)", ["X"])])
+    for (goal, vars), result in zip(goals, results):
+        assert result.rows == service.query(goal, vars)
+    assert not results[-1].ok
+
+def test_pages_match_find_by_filters(prolog_svc):
+    from src.domain.entities import FilterCriteria
+    criteria = FilterCriteria(area="cualquiera")
+    expected = [s.code for s in prolog_svc.find_by_filters(criteria)]
+    codes, offset = [], 0
+    while offset is not None:
+        page = prolog_svc.find_page(criteria, offset=offset, limit=2)
+        codes += [s.code for s in page.items]
+        offset = page.next_offset
+    assert codes == expected
+    # Abandonar el iterador a medias deja el worker listo para otra consulta
+    next(prolog_svc.iter_by_filters(criteria))
+    assert prolog_svc.get_all_scholarship_names()
+
+@pytest.mark.parametrize("mention, expected", [
+    ("la MEC", "beca_mec_general"),
+    ("Erasmus", "beca_erasmus_master"),
+    ("beca de deportistas de la UPV", "beca_upv_deporte"),
+    ("ayuda para el transporte", "beca_gv_transporte"),
+])
+def test_find_by_name_resolves_mentions(prolog_svc, mention, expected):
+    results = prolog_svc.find_by_name(mention)
+    assert results and results[0].code == expected
+
+def test_runtime_writes_reach_every_worker_and_compact(tmp_path):
+    import shutil
+    from src.domain.entities import FilterCriteria, ScholarshipRecord
+
+    kb = tmp_path / "becas.pl"
+    shutil.copy("config/becas.pl", kb)
+    service = PrologService(kb_path=kb, pool_size=2, use_snapshot=False)
+    repo = PrologConnector(service=service)
+    try:
+        service.warm_up()
+        new = ScholarshipRecord(
+            code="beca_nueva",
+            info="Beca de prueba para estudiantes de salud",
+            criteria={"organismo": ["privado"], "campo_estudio": ["salud"], "financiamiento": ["parcial"],
+                      "nivel": ["grado"], "ubicacion": ["valencia"]},
+            aliases=["la nueva"],
+        )
+        with repo.transaction() as tx:
+            tx.add(new)
+            tx.retract("beca_upv_deporte")
+        assert [s.code for s in repo.find_by_filters(FilterCriteria(area="salud"))] == ["beca_nueva"]
+        assert repo.find_by_name("la nueva")[0].code == "beca_nueva"
+        # Todos los workers ven el cambio
+        for _ in range(4):
+            names = service.query("setof(B, beca(B), L)", ["L"])[0]["L"]
+            assert "beca_nueva" in names and "beca_upv_deporte" not in names
+
+        assert service.compact_journal()
+        assert "beca(beca_nueva)." in kb.read_text(encoding="utf-8")
+        assert [s.code for s in repo.find_by_filters(FilterCriteria(area="salud"))] == ["beca_nueva"]
+    finally:
+        service.close()
@@ -0,0 +1,151 @@
+import json
+import re
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.infrastructure.async_prolog_connector import AsyncPrologConnector, AsyncPrologService
+from src.infrastructure.kb_registry import KBRegistry
+from src.infrastructure.prolog_connector import KB_CHECK_GOAL
+from src.presentation import api
+
+
+class RecordingService:
+    version = "v1"
+
+    def __init__(self):
+        self.goals = []
+
+    async def query(self, goal, vars, timeout=None):
+        self.goals.append(goal)
+        return [{"Types": ["publico_estatal"]}, {"Types": ["internacional"]}]
+
+
+@pytest.fixture
+def service():
+    service = RecordingService()
+    api.app.dependency_overrides[api.tenant_repository] = lambda: AsyncPrologConnector(service=service)
+    yield service
+    api.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client():
+    # Sin `with`: no se lanza el precalentamiento del LLM del arranque
+    return TestClient(api.app)
+
+
+def test_criterion_values(client, service):
+    response = client.get("/criterios/organismo")
+    assert response.status_code == 200
+    assert response.json() == ["internacional", "publico_estatal"]
+    assert service.goals == ["setof(Type, organismo(_,Type), Types)"]
+
+
+def test_unknown_criterion_is_404_and_never_reaches_prolog(client, service):
+    response = client.get("/criterios/member(X,[1]),halt")
+    assert response.status_code == 404
+    assert service.goals == []
+
+
+class KBWorker:
+    """Worker que responde con los hechos que tenía el .pl al arrancar."""
+    load_mode = "source"
+
+    def __init__(self, kb_path):
+        self.facts = re.findall(r"^(\w+)\(\w+, (\w+)\)\.", kb_path.read_text(), re.M)
+        self.journal_seq = 0
+
+    async def query(self, goal, timeout=None):
+        if goal == KB_CHECK_GOAL:
+            return True
+        criterion = re.match(r"setof\(Type, (\w+)\(", goal).group(1)
+        return [{"Types": [value for name, value in self.facts if name == criterion]}]
+
+    async def stop(self):
+        pass
+
+
+class FileBackedService(AsyncPrologService):
+    async def _create_worker(self):
+        return KBWorker(self.kb_path)
+
+
+def test_kb_edit_is_visible_through_the_api(tmp_path, monkeypatch):
+    kb = tmp_path / "becas.pl"
+    kb.write_text("beca(a).\norganismo(a, publico_estatal).\n")
+    registry = KBRegistry(
+        {"default": kb}, lambda path: AsyncPrologConnector(FileBackedService(path, max_concurrency=1, use_snapshot=False))
+    )
+    monkeypatch.setattr(api, "async_scholarship_repos", registry)
+    monkeypatch.setattr(api, "KB_WATCH_INTERVAL", 0.02)
+    # Solo el vigilante de las KBs: sin precalentar el LLM
+    monkeypatch.setattr(api.app.router, "on_startup", [api.watch_kbs])
+
+    with TestClient(api.app) as client:
+        assert client.get("/criterios/organismo").json() == ["publico_estatal"]
+        kb.write_text("beca(a).\norganismo(a, internacional).\norganismo(b, publico_local).\n")
+        deadline = time.monotonic() + 5
+        while client.get("/stats/prolog").json()["reload"]["reloads"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert client.get("/criterios/organismo").json() == ["internacional", "publico_local"]
+
+
+class TemplatePipeline:
+    """Pipeline cuyo turno se responde con una plantilla (sin payload ni stream)."""
+
+    def handle(self, ctx):
+        ctx.response_message = "¿Para qué nivel educativo es la beca?"
+        return ctx
+
+
+@pytest.fixture
+def template_turn():
+    api.app.dependency_overrides[api.get_pipeline] = TemplatePipeline
+    yield
+    api.app.dependency_overrides.clear()
+
+
+def sse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines.get("event"), json.loads(lines["data"])))
+    return events
+
+
+def test_template_only_turn(client, template_turn):
+    response = client.post("/chat", json={"message": "quiero una beca"})
+    assert response.status_code == 200
+    assert response.json()["response"] == "¿Para qué nivel educativo es la beca?"
+
+    response = client.post("/chat/stream", json={"message": "quiero una beca"})
+    assert sse_events(response.text) == [
+        (None, {"token": "¿Para qué nivel educativo es la beca?"}),
+        ("done", {"response": "¿Para qué nivel educativo es la beca?", "history": []}),
+    ]
+
+
+class BrokenStreamPipeline:
+    """Pipeline cuya respuesta del LLM se corta tras los primeros tokens."""
+
+    def handle(self, ctx):
+        def stream():
+            yield from ["Suelen pedir ", "el DNI"]
+            raise api.LLMStreamError("Generación interrumpida: conexión cerrada")
+
+        ctx.response_stream = stream()
+        return ctx
+
+
+def test_stream_cut_mid_answer_ends_with_an_error_event(client):
+    api.app.dependency_overrides[api.get_pipeline] = BrokenStreamPipeline
+    try:
+        events = sse_events(client.post("/chat/stream", json={"message": "¿qué piden?"}).text)
+        response = client.post("/chat", json={"message": "¿qué piden?"})
+    finally:
+        api.app.dependency_overrides.clear()
+    assert [event for event, _ in events] == [None, None, "error"]
+    assert "done" not in {event for event, _ in events}
+    assert response.status_code == 502
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from src.infrastructure import prolog_connector
+from src.infrastructure.argument_classifier import ArgumentClassifier
+from src.infrastructure.prolog_connector import PrologTimeoutError
+
+
+class ScriptedLLM:
+    error_response = "error"
+
+    def __init__(self, response):
+        self.response = response
+        self.prompts = []
+
+    def generate(self, prompt, history=None):
+        self.prompts.append(prompt)
+        return self.response
+
+
+class OptionsRepository:
+    def get_criteria_many(self, criteria):
+        options = {
+            "campo_estudio": ["ciencias_tecnicas", "salud", "cualquiera"],
+            "nivel": ["grado", "posgrado", "cualquiera"],
+            "organismo": ["publico_estatal", "publico_local", "cualquiera"],
+        }
+        return {c: options.get(c, []) for c in criteria}
+
+
+def classifier(response: dict) -> ArgumentClassifier:
+    return ArgumentClassifier(llm=ScriptedLLM(json.dumps(response)), repository=OptionsRepository())
+
+
+def test_extract_turn_returns_every_slot_from_one_call():
+    c = classifier({
+        "intention": "buscar_por_criterio", "action": "modify", "field": "organismo",
+        "value": "publico_estatal", "confirmation": "no",
+    })
+    turn = c.extract_turn("Usuario: no, cambia el organismo a estatal", "buscar_por_criterio",
+                          awaiting_confirmation=True)
+    assert turn == {
+        "intention": "buscar_por_criterio",
+        "criterion": {"action": "modify", "field": "organismo", "value": "publico_estatal"},
+        "confirmation": "no",
+    }
+    assert len(c.llm.prompts) == 1
+    assert "publico_estatal · publico_local" in c.llm.prompts[0]
+
+
+@pytest.mark.parametrize("response, expected", [
+    # Valor fuera de la tabla: criterio anulado
+    ({"intention": "buscar_por_criterio", "action": "select", "field": "nivel", "value": "lunar"},
+     {"intention": "buscar_por_criterio", "criterion": {"action": None, "field": None, "value": None},
+      "confirmation": None}),
+    # Intención desconocida y confirmación sin haberla pedido
+    ({"intention": "charla", "action": "null", "confirmation": "yes"},
+     {"intention": None, "criterion": {"action": None, "field": None, "value": None}, "confirmation": None}),
+])
+def test_extract_turn_validates_the_answer(response, expected):
+    assert classifier(response).extract_turn("Usuario: hola") == expected
+
+
+def test_extract_turn_only_accepts_the_offered_criteria():
+    c = classifier({"intention": "buscar_por_criterio", "action": "select", "field": "nivel", "value": "grado"})
+    turn = c.extract_turn("Usuario: de grado", "buscar_por_criterio", criteria_names=["campo_estudio", "organismo"])
+    assert turn["criterion"] == {"action": None, "field": None, "value": None}
+    assert "| **nivel** |" not in c.llm.prompts[0]
+
+
+def test_dynamic_parts_come_after_the_static_prefix():
+    c = classifier({"intention": "general_qa", "action": "null", "field": None, "value": None})
+    c.classify_criterion_response(["nivel"], "Usuario: para un máster")
+    c.extract_initial_criteria("Usuario: quiero una beca")
+    c.extract_turn("Usuario: hola", "buscar_por_criterio")
+    for prefix, prompt in zip(c.prompt_prefixes(), c.llm.prompts):
+        assert prompt.startswith(prefix)
+        assert "| **nivel** |" not in prefix
+        # Reglas y ejemplos quedan dentro del prefijo reutilizable
+        assert "Ejemplo" in prefix
+
+
+class SequenceLLM(ScriptedLLM):
+    def __init__(self, *responses):
+        super().__init__(None)
+        self.responses = list(responses)
+
+    def generate(self, prompt, history=None):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+
+def test_unparseable_answer_is_repaired_once():
+    c = ArgumentClassifier(llm=SequenceLLM("Sí, confirma.", '{"confirmation": "yes"}'), repository=OptionsRepository())
+    assert c.detect_confirmation("Usuario: sí") == {"confirmation": "yes"}
+    assert len(c.llm.prompts) == 2
+    assert c.structured.stats()["detect_confirmation"]["parse_failures"] == 1
+
+
+class TimingOutService:
+    """PrologService que responde una vez y luego deja de responder a tiempo."""
+
+    def __init__(self, kb_path=None):
+        self.version = "v1"
+        self.timeouts = False
+
+    def add_reload_listener(self, listener):
+        pass
+
+    def query(self, goal, vars):
+        if self.timeouts:
+            raise PrologTimeoutError("Prolog timeout")
+        return [{"Types": ["grado", "posgrado"]}]
+
+
+def test_default_repository_serves_the_cache_when_prolog_times_out(monkeypatch):
+    monkeypatch.setattr(prolog_connector, "PrologService", TimingOutService)
+    repository = ArgumentClassifier(llm=ScriptedLLM("{}")).repository
+    assert repository.get_criteria("nivel") == ["grado", "posgrado"]
+
+    # La versión nueva no está en caché: hay que ir a Prolog, que no responde
+    service = repository.repository.service
+    service.version, service.timeouts = "v2", True
+    assert repository.get_criteria("nivel") == ["grado", "posgrado"]
+    assert repository.stats()["stale_served"] == 1
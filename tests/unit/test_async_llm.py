@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from src.infrastructure.async_llm import AsyncLLMClient, FairLimiter
+
+
+class SlowClient:
+    model = "gemma3:4b"
+    temperature = 0.1
+
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self.release = None
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await self.release.wait()
+        self.active -= 1
+        return f" respuesta a {prompt} "
+
+
+class FakeLLM:
+    error_response = "error"
+
+    def __init__(self):
+        self.llm = SlowClient()
+
+
+def test_identical_concurrent_prompts_share_one_request():
+    async def scenario():
+        llm = FakeLLM()
+        llm.llm.release = asyncio.Event()
+        client = AsyncLLMClient(llm, max_in_flight=2)
+        calls = [asyncio.ensure_future(client.generate(p)) for p in ["hola", "hola", "adiós", "hola"]]
+        await asyncio.sleep(0)
+        llm.llm.release.set()
+        return llm, client, await asyncio.gather(*calls)
+
+    llm, client, answers = asyncio.run(scenario())
+    assert answers == ["respuesta a hola", "respuesta a hola", "respuesta a adiós", "respuesta a hola"]
+    assert sorted(llm.llm.prompts) == ["adiós", "hola"]
+    stats = client.stats()
+    assert (stats["requests"], stats["upstream_calls"], stats["coalesced"]) == (4, 2, 2)
+    assert stats["in_flight"] == 0
+
+
+def test_in_flight_limit_and_queue_depth():
+    async def scenario():
+        llm = FakeLLM()
+        llm.llm.release = asyncio.Event()
+        client = AsyncLLMClient(llm, max_in_flight=2)
+        calls = [asyncio.ensure_future(client.generate(f"pregunta {i}")) for i in range(5)]
+        await asyncio.sleep(0.01)
+        depth = client.stats()["queue_depth"]
+        llm.llm.release.set()
+        await asyncio.gather(*calls)
+        return llm, client, depth
+
+    llm, client, depth = asyncio.run(scenario())
+    assert depth == 3
+    assert llm.llm.max_active == 2
+    stats = client.stats()
+    assert stats["max_queue_depth"] == 3
+    assert stats["wait"]["count"] == 5
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_request():
+    async def scenario():
+        llm = FakeLLM()
+        llm.llm.release = asyncio.Event()
+        client = AsyncLLMClient(llm, max_in_flight=1)
+        first = asyncio.ensure_future(client.generate("hola"))
+        second = asyncio.ensure_future(client.generate("hola"))
+        await asyncio.sleep(0)
+        first.cancel()
+        llm.llm.release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(scenario()) == ("respuesta a hola", True)
+
+
+def test_limiter_is_fifo_and_skips_cancelled_waiters():
+    async def scenario():
+        limiter = FairLimiter(1)
+        order = []
+        await limiter.acquire()
+
+        async def worker(name):
+            async with limiter:
+                order.append(name)
+
+        tasks = [asyncio.ensure_future(worker(n)) for n in "abc"]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        limiter.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return order, limiter.in_flight, limiter.queue_depth
+
+    assert asyncio.run(scenario()) == (["a", "c"], 0, 0)
+    with pytest.raises(ValueError):
+        FairLimiter(0)
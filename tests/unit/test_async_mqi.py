@@ -0,0 +1,191 @@
+import asyncio
+import json
+
+import pytest
+from swiplserver import PrologError, PrologQueryTimeoutError
+
+from src.infrastructure.async_mqi import AsyncPrologPool, AsyncPrologThread, AsyncPrologWorker, parse_answer
+
+
+def frame(text: str) -> bytes:
+    body = (text + ".\n").encode("utf-8")
+    return f"{len(body)}.\n".encode("utf-8") + body
+
+
+async def fake_mqi_server(answers):
+    """Servidor MQI mínimo: acepta la contraseña y responde `answers` en orden."""
+    received = []
+
+    async def handle(reader, writer):
+        pending = [json.dumps({"functor": "true", "args": [[[]]]})] + list(answers)
+        while pending:
+            header = await reader.readuntil(b".\n")
+            body = await reader.readexactly(int(header[:-2]))
+            received.append(body.decode("utf-8"))
+            # Latidos antes de la respuesta, como hace el MQI en consultas largas
+            writer.write(b".." + frame(pending.pop(0)))
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], received
+
+
+def test_parse_answer_matches_swiplserver_format():
+    binding = {"functor": "=", "args": ["X", "a"]}
+    assert parse_answer({"functor": "false", "args": []}) is False
+    assert parse_answer({"functor": "true", "args": [[[]]]}) is True
+    assert parse_answer({"functor": "true", "args": [[[binding]]]}) == [{"X": "a"}]
+    with pytest.raises(PrologQueryTimeoutError):
+        parse_answer({"functor": "exception", "args": ["time_limit_exceeded"]})
+    with pytest.raises(PrologError):
+        parse_answer({"functor": "exception", "args": [{"functor": "error", "args": []}]})
+
+
+def test_thread_speaks_mqi_protocol():
+    async def scenario():
+        answer = {"functor": "true", "args": [[[{"functor": "=", "args": ["X", "ñandú"]}]]]}
+        server, port, received = await fake_mqi_server([json.dumps(answer)])
+        async with server:
+            thread = await AsyncPrologThread.connect(port, "secreto")
+            result = await thread.query("member(X, [ñandú]).", timeout=2)
+        return received, result
+
+    received, result = asyncio.run(scenario())
+    assert received == ["secreto.\n", "run((member(X, [ñandú])), 2).\n"]
+    assert result == [{"X": "ñandú"}]
+
+
+class FakeWorker:
+    def __init__(self):
+        self.stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+
+def test_pool_bounds_concurrency_and_replaces_failed_workers():
+    spawned = []
+    running = 0
+    peak = 0
+
+    async def factory():
+        spawned.append(FakeWorker())
+        return spawned[-1]
+
+    async def scenario():
+        nonlocal running, peak
+        pool = AsyncPrologPool(factory, size=2)
+
+        async def job():
+            nonlocal running, peak
+            async with pool.acquire():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job() for _ in range(10)))
+        with pytest.raises(OSError):
+            async with pool.acquire():
+                raise OSError("socket cerrado")
+        # El hueco liberado permite lanzar un worker nuevo
+        async with pool.acquire(), pool.acquire():
+            pass
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert peak == 2
+    assert len(spawned) == 3
+    assert sum(w.stopped for w in spawned) == 1
+    assert pool.recycled == 1
+
+
+def test_closing_the_pool_releases_its_waiters():
+    from src.infrastructure.async_mqi import PoolClosedError
+
+    async def factory():
+        return FakeWorker()
+
+    async def scenario():
+        pool = AsyncPrologPool(factory, size=1)
+        async with pool.acquire() as busy:
+            waiter = asyncio.ensure_future(pool.acquire().__aenter__())
+            await asyncio.sleep(0)
+            await pool.close()
+            with pytest.raises(PoolClosedError):
+                await waiter
+        await asyncio.sleep(0)
+        return busy
+
+    # El worker prestado se detiene al devolverse
+    assert asyncio.run(scenario()).stopped
+
+
+def test_thread_streams_solutions_one_by_one():
+    def solution(value):
+        return json.dumps({"functor": "true", "args": [[[{"functor": "=", "args": ["X", value]}]]]})
+
+    async def scenario():
+        answers = [
+            json.dumps({"functor": "true", "args": [[[]]]}),
+            solution(1),
+            solution(2),
+            json.dumps({"functor": "exception", "args": ["no_more_results"]}),
+        ]
+        server, port, received = await fake_mqi_server(answers)
+        async with server:
+            thread = await AsyncPrologThread.connect(port, "secreto")
+            rows = [row async for row in thread.iter_query("member(X, [1,2])")]
+        return received, rows
+
+    received, rows = asyncio.run(scenario())
+    assert rows == [{"X": 1}, {"X": 2}]
+    assert received[1] == "run_async((member(X, [1,2])), _, false).\n"
+    assert received[2:] == ["async_result(-1).\n"] * 3
+
+
+class FakeProcess:
+    """Proceso swipl colgado: solo termina cuando se le mata."""
+
+    def __init__(self):
+        self.returncode = None
+        self.stdout = asyncio.StreamReader()
+        self.stdout.feed_eof()
+
+    def kill(self):
+        self.returncode = -9
+
+    async def wait(self):
+        return self.returncode
+
+
+async def hung_mqi_server():
+    """Servidor MQI que acepta la contraseña y después no vuelve a responder."""
+
+    async def handle(reader, writer):
+        header = await reader.readuntil(b".\n")
+        await reader.readexactly(int(header[:-2]))
+        writer.write(frame(json.dumps({"functor": "true", "args": [[[]]]})))
+        await writer.drain()
+        while await reader.read(4096):
+            pass
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_stopping_a_hung_worker_does_not_wait_for_prolog():
+    async def scenario():
+        server, port = await hung_mqi_server()
+        async with server:
+            thread = await AsyncPrologThread.connect(port, "secreto")
+            worker = AsyncPrologWorker(FakeProcess(), thread)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(worker.query("repeat, fail"), timeout=0.05)
+            await asyncio.wait_for(worker.stop(), timeout=3)
+        return worker
+
+    worker = asyncio.run(scenario())
+    assert worker._process.returncode == -9
+
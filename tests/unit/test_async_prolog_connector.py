@@ -0,0 +1,33 @@
+import asyncio
+import logging
+
+from src.infrastructure.async_prolog_connector import (
+    AsyncPrologConnector,
+    GoalResult,
+    NoResultsError,
+    PrologConnectorError,
+)
+
+
+class BatchService:
+    """
+    query_many con un resultado por criterio: valores, sin resultados o error.
+    Los errores se importan por la misma ruta que el conector que los comprueba.
+    """
+
+    async def query_many(self, goals):
+        return [
+            GoalResult(goals[0][0], rows=[{"Types": ["publico_local"]}]),
+            GoalResult(goals[1][0], error=NoResultsError("sin resultados")),
+            GoalResult(goals[2][0], error=PrologConnectorError("existence_error")),
+        ]
+
+
+def test_get_criteria_many_logs_failed_goals(caplog):
+    connector = AsyncPrologConnector(service=BatchService())
+    with caplog.at_level(logging.WARNING):
+        values = asyncio.run(connector.get_criteria_many(["organismo", "nivel", "ubicacion"]))
+
+    assert values == {"organismo": ["publico_local"]}
+    warnings = [r.getMessage() for r in caplog.records if r.levelno == logging.WARNING]
+    assert warnings == ["No se pudieron obtener opciones de ubicacion: existence_error"]
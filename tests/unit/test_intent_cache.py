@@ -0,0 +1,48 @@
+import pytest
+
+from src.infrastructure.intent_cache import IntentSimilarityCache, char_ngrams
+
+
+def test_char_ngrams_are_normalized():
+    assert char_ngrams("Sí", sizes=(2,)) == [" s", "si", "i "]
+
+
+def test_near_identical_phrasing_reuses_the_decision():
+    cache = IntentSimilarityCache(threshold=0.7)
+    cache.add("necesito una beca para mi grado", "buscar_por_criterio")
+    cache.add("¿qué es mérito académico?", "explicar_termino")
+    cache.add("¿qué documentos suelen pedir?", "general_qa")
+
+    intent, score = cache.lookup("Necesito beca para el grado")
+    assert intent == "buscar_por_criterio"
+    assert 0.7 <= score < 1
+    assert cache.lookup("que es merito academico")[0] == "explicar_termino"
+    assert cache.lookup("cuéntame la beca erasmus") is None
+    assert cache.stats()["hits"] == 2
+
+
+def test_previous_intent_is_part_of_the_key():
+    cache = IntentSimilarityCache(threshold=0.9)
+    cache.add("para ingeniería", "buscar_por_criterio", previous_intent="buscar_por_criterio")
+    assert cache.lookup("para ingeniería", "buscar_por_criterio")[0] == "buscar_por_criterio"
+    assert cache.lookup("para ingeniería", None) is None
+
+
+def test_full_cache_replaces_least_recently_used():
+    cache = IntentSimilarityCache(threshold=0.99, maxsize=2)
+    cache.add("hola", "general_qa")
+    cache.add("que es una beca completa", "explicar_termino")
+    cache.lookup("hola")
+    cache.add("becas para doctorado", "buscar_por_criterio")
+    assert len(cache) == 2
+    assert cache.lookup("hola")[0] == "general_qa"
+    assert cache.lookup("que es una beca completa") is None
+    assert cache.lookup("becas para doctorado")[0] == "buscar_por_criterio"
+
+
+def test_same_message_updates_its_entry():
+    cache = IntentSimilarityCache()
+    cache.add("hola", "general_qa")
+    cache.add("Hola", "buscar_por_criterio")
+    assert len(cache) == 1
+    assert cache.lookup("hola") == ("buscar_por_criterio", pytest.approx(1.0))
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from src.infrastructure.intent_model import (
+    FallbackIntentClassifier,
+    IntentModel,
+    LocalIntentClassifier,
+    log_decision,
+    read_decisions,
+)
+
+PHRASES = {
+    "buscar_por_criterio": [
+        "necesito una beca para {x}", "quiero becas para {x}", "busco ayudas para estudiar {x}",
+        "recomiéndame becas de {x}", "qué becas hay para {x}",
+    ],
+    "explicar_termino": [
+        "qué es {x}", "explícame qué significa {x}", "qué quiere decir {x}",
+        "define {x}", "no entiendo qué es {x}",
+    ],
+}
+TOPICS = ["ingeniería", "un máster", "medicina", "mérito académico", "la financiación parcial", "derecho"]
+
+
+def samples():
+    return [
+        (template.format(x=topic), None, intent)
+        for intent, templates in PHRASES.items()
+        for template in templates
+        for topic in TOPICS
+    ]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return IntentModel.train(samples(), epochs=40)
+
+
+def test_model_learns_and_is_calibrated(model):
+    assert model.metrics["train_accuracy"] > 0.95
+    assert model.metrics["holdout_accuracy"] > 0.8
+    intent, confidence = model.predict("necesito becas para arquitectura")
+    assert intent == "buscar_por_criterio"
+    assert 0.5 < confidence <= 1
+    assert sum(model.predict_proba("qué es una beca").values()) == pytest.approx(1.0)
+
+
+def test_model_round_trips_through_file(model, tmp_path):
+    path = tmp_path / "model.npz"
+    model.save(path)
+    loaded = IntentModel.load(path)
+    assert loaded.labels == model.labels
+    assert loaded.metrics == model.metrics
+    assert loaded.predict("qué significa doctorado") == pytest.approx(model.predict("qué significa doctorado"))
+
+
+def test_training_needs_enough_samples():
+    with pytest.raises(ValueError):
+        IntentModel.train(samples()[:5])
+
+
+def test_decision_log_skips_corrupt_lines(tmp_path):
+    path = tmp_path / "decisions.jsonl"
+    log_decision(path, "hola", "general_qa", latency_ms=812.0)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"message": "cortado\n')
+    log_decision(path, "para medicina", "buscar_por_criterio", "buscar_por_criterio")
+    decisions = read_decisions(path)
+    assert [d["intention"] for d in decisions] == ["general_qa", "buscar_por_criterio"]
+    assert decisions[1]["last_intention"] == "buscar_por_criterio"
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[0])["latency_ms"] == 812.0
+
+
+class RecordingLLMClassifier:
+    def __init__(self):
+        self.calls = []
+
+    def classify_intention(self, message, context=None, last_intention=None):
+        self.calls.append(message)
+        return {"intention": "general_qa", "navigation": None}
+
+
+def test_fallback_below_threshold(model, tmp_path):
+    llm = RecordingLLMClassifier()
+    classifier = FallbackIntentClassifier(llm, LocalIntentClassifier(model), threshold=0.0)
+    assert classifier.classify_intention("quiero becas para derecho")["intention"] == "buscar_por_criterio"
+    assert llm.calls == []
+
+    classifier.threshold = 1.01
+    assert classifier.classify_intention("quiero becas para derecho")["intention"] == "general_qa"
+    assert llm.calls == ["quiero becas para derecho"]
+    assert classifier.stats()["local_rate"] == 0.5
+
+    without_model = FallbackIntentClassifier.from_model_file(llm, tmp_path / "missing.npz")
+    assert without_model.local is None
+    without_model.classify_intention("hola")
+    assert llm.calls[-1] == "hola"
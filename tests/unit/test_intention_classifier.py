@@ -0,0 +1,31 @@
+import json
+
+from src.infrastructure.intention_classifier import IntentionClassifier
+
+
+class ScriptedLLM:
+    error_response = "error"
+
+    def generate(self, prompt, history=None):
+        return '{"intention": "general_qa"}'
+
+
+def test_decisions_are_not_logged_unless_enabled(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    classifier = IntentionClassifier(llm=ScriptedLLM(), similarity_threshold=None)
+    assert classifier.classify_intention("¿qué es el IPREM?")["intention"] == "general_qa"
+    assert classifier.decision_log is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_decision_log_is_enabled_from_config(tmp_path):
+    log = tmp_path / "decisions.jsonl"
+    config = tmp_path / "flow_config.json"
+    config.write_text(json.dumps({"decision_log": str(log)}), encoding="utf-8")
+
+    classifier = IntentionClassifier.from_config(config, llm=ScriptedLLM(), similarity_threshold=None)
+    classifier.classify_intention("¿qué es el IPREM?")
+    assert json.loads(log.read_text(encoding="utf-8"))["intention"] == "general_qa"
+
+    config.write_text(json.dumps({"decision_log": None}), encoding="utf-8")
+    assert IntentionClassifier.from_config(config, llm=ScriptedLLM()).decision_log is None
@@ -0,0 +1,65 @@
+import pytest
+
+from src.infrastructure.json_stream import JsonObjectReader, generate_json
+from src.infrastructure.llm_cache import CachedLLM
+
+
+class StreamingLLM:
+    error_response = "error"
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+        self.calls = 0
+
+    def generate(self, prompt, history=None):
+        return "".join(self.chunks)
+
+    def generate_stream(self, prompt, history=None):
+        self.calls += 1
+        try:
+            for chunk in self.chunks:
+                self.consumed += 1
+                yield chunk
+        except GeneratorExit:
+            self.closed = True
+            raise
+
+
+def test_reader_ignores_braces_inside_strings():
+    reader = JsonObjectReader()
+    for chunk in ['```json\n{"value": "a}', '{\\"b", ', '"n": {"x": 1}', "}\n```", " y más"]:
+        done = reader.feed(chunk)
+    assert done
+    assert reader.object() == '{"value": "a}{\\"b", "n": {"x": 1}}'
+
+
+def test_generation_stops_when_the_object_closes():
+    llm = StreamingLLM(['```json\n{', '"intention"', ': "info_beca"', "}", "\n```", "\nExplicación:", " larga"])
+    assert generate_json(llm, "prompt") == '```json\n{"intention": "info_beca"}'
+    assert (llm.consumed, llm.closed) == (4, True)
+
+
+@pytest.mark.parametrize("chunks, kwargs, expected, consumed", [
+    # Secuencia de parada antes del JSON: el modelo sigue la conversación
+    (["Claro.", "\nUsuario:", " otra", " cosa"], {"stop": ("\nUsuario:",)}, "Claro.", 2),
+    # Dentro del objeto la secuencia no corta
+    (['{"a": "', '\nUsuario:', '"}', " fin"], {"stop": ("\nUsuario:",)}, '{"a": "\nUsuario:"}', 3),
+    # Tope de tokens sin JSON completo
+    (['{"a":', " 1,", ' "b":', " 2"], {"max_tokens": 2}, '{"a": 1,', 2),
+])
+def test_stop_sequences_and_token_cap(chunks, kwargs, expected, consumed):
+    llm = StreamingLLM(chunks)
+    assert generate_json(llm, "prompt", **kwargs) == expected
+    assert llm.consumed == consumed
+
+
+def test_cached_structured_output_is_kept_apart_from_full_answers():
+    llm = StreamingLLM(['{"confirmation": "yes"}', " y además..."])
+    llm.llm = type("Client", (), {"model": "gemma3:4b", "temperature": 0.1})()
+    cached = CachedLLM(llm)
+    assert generate_json(cached, "prompt") == '{"confirmation": "yes"}'
+    assert generate_json(cached, "prompt") == '{"confirmation": "yes"}'
+    assert llm.calls == 1
+    assert cached.generate("prompt") == '{"confirmation": "yes"} y además...'
@@ -0,0 +1,35 @@
+import re
+
+import pytest
+
+from benchmarks.kb_generator import DOMAINS, generate_kb
+
+
+def facts(text, predicate):
+    return re.findall(rf"^{predicate}\((\w+), (\w+)\)\.$", text, flags=re.M)
+
+
+def test_generated_kb_uses_real_schema_and_domains(tmp_path):
+    text = generate_kb(200, tmp_path / "kb.pl", seed=1).read_text(encoding="utf-8")
+    assert len(re.findall(r"^beca\(", text, flags=re.M)) == 200
+    for criterion, domain in DOMAINS.items():
+        values = {value for _, value in facts(text, criterion)}
+        assert values and values <= set(domain)
+    # Las reglas se copian de la KB real
+    assert "buscar_beca(OrgInput, AreaInput, FinInput, NivInput, UbiInput, Beca, Info) :-" in text
+
+
+def test_generation_is_deterministic(tmp_path):
+    first = generate_kb(50, tmp_path / "a.pl", seed=7).read_text(encoding="utf-8")
+    second = generate_kb(50, tmp_path / "b.pl", seed=7).read_text(encoding="utf-8")
+    assert first == second
+
+
+@pytest.mark.parametrize("variant, marker", [
+    ("index_first", "nonvar(OrgInput)  -> organismo(Beca, OrgInput)"),
+    ("tabled", ":- table buscar_beca/7."),
+])
+def test_variants_rewrite_the_rules(tmp_path, variant, marker):
+    text = generate_kb(5, tmp_path / "kb.pl", variant=variant).read_text(encoding="utf-8")
+    assert marker in text
+    assert text.count("buscar_beca(OrgInput") == 1
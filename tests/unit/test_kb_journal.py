@@ -0,0 +1,100 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from src.domain.entities import ScholarshipRecord
+from src.infrastructure.kb_journal import (
+    KBJournal,
+    compact_source,
+    op_goal,
+    ops_goal,
+    retract_op,
+    upsert_op,
+)
+
+REAL_KB = Path("config/becas.pl")
+
+
+def record(code="beca_nueva", **kwargs):
+    defaults = dict(
+        info="Beca de prueba para l'estudiant",
+        criteria={"organismo": ["privado"], "nivel": ["grado", "posgrado"], "ubicacion": ["valencia"]},
+        requirements={"nota_media": "7.0"},
+        aliases=["la nueva"],
+    )
+    defaults.update(kwargs)
+    return ScholarshipRecord(code=code, **defaults)
+
+
+def test_goals_are_idempotent_upserts_and_retracts():
+    goal = op_goal(upsert_op(record()))
+    assert goal.startswith("(beca(beca_nueva) -> true ; assertz(beca(beca_nueva)))")
+    assert "retractall(nivel(beca_nueva, _))" in goal
+    assert "assertz(nivel(beca_nueva, posgrado))" in goal
+    assert "assertz(info(beca_nueva, 'Beca de prueba para l\\'estudiant'))" in goal
+    assert "retractall(beca(beca_nueva))" in op_goal(retract_op("beca_nueva"))
+    assert ops_goal([retract_op("a"), retract_op("b")]).startswith("transaction((")
+    with pytest.raises(ValueError):
+        retract_op("Beca con espacios")
+    with pytest.raises(ValueError):
+        upsert_op(record(criteria={"color": ["rojo"]}))
+
+
+def test_journal_survives_restarts_and_ignores_partial_lines(tmp_path):
+    path = tmp_path / "becas.pl.journal"
+    journal = KBJournal(path)
+    assert journal.seq == 0 and journal.since(0) == []
+    journal.append([retract_op("a")], kb_hash="h1")
+    journal.append([retract_op("b")])
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"seq": 3, "at"')
+
+    reopened = KBJournal(path)
+    assert reopened.seq == 2 and reopened.kb_hash == "h1"
+    assert [e.ops[0]["code"] for e in reopened.since(1)] == ["b"]
+    # La escritura interrumpida se descarta y otra instancia ve la entrada nueva
+    journal.append([retract_op("c")])
+    assert reopened.seq == 3
+    assert KBJournal(path).seq == 3
+
+
+def test_rotate_keeps_only_pending_entries_on_disk(tmp_path):
+    path = tmp_path / "becas.pl.journal"
+    journal = KBJournal(path)
+    for code in "abc":
+        journal.append([retract_op(code)])
+    journal.rotate(2, "h2")
+    assert len(journal.since(0)) == 3  # en memoria hasta forget
+    journal.forget(2)
+    reopened = KBJournal(path)
+    assert reopened.base_seq == 2 and reopened.pending() == 1
+    assert [e.seq for e in reopened.since(0)] == [3]
+
+
+def facts(text, predicate, code):
+    return re.findall(rf"^{predicate}\({code}, (.+)\)\.$", text, flags=re.M)
+
+
+def test_compact_source_keeps_structure():
+    journal_entries = [
+        type("Entry", (), {"ops": [upsert_op(record())]})(),
+        type("Entry", (), {"ops": [
+            upsert_op(record("beca_mec_general", info="MEC actualizada", criteria={"nivel": ["grado"]})),
+            retract_op("beca_upv_deporte"),
+        ]})(),
+    ]
+    source = REAL_KB.read_text(encoding="utf-8")
+    text = compact_source(source, journal_entries)
+
+    assert "beca(beca_nueva)." in text and "beca(beca_mec_general)." in text
+    assert "upv_deporte" not in text.split("% 7. CONSULTAS")[0]
+    assert facts(text, "nivel", "beca_nueva") == ["grado", "posgrado"]
+    assert facts(text, "nivel", "beca_mec_general") == ["grado"]
+    assert facts(text, "info", "beca_mec_general") == ["'MEC actualizada'"]
+    assert facts(text, "organismo", "beca_mec_general") == []
+    # Los hechos nuevos van junto a los de su predicado y los comentarios se conservan
+    lines = text.split("\n")
+    assert lines.index("organismo(beca_nueva, privado).") == lines.index("organismo(beca_gv_transporte, publico_local).") + 1
+    assert "% 2.1 Organismo convocante" in text
+    assert text.split("% 7. CONSULTAS")[1] == source.split("% 7. CONSULTAS")[1]
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from src.infrastructure.kb_registry import KBRegistry, UnknownTenantError
+
+
+@pytest.fixture
+def kbs(tmp_path):
+    paths = {}
+    for name, text in [("upv", "beca(a).\n"), ("uv", "beca(a).\n"), ("gva", "beca(b).\n")]:
+        paths[name] = tmp_path / f"{name}.pl"
+        paths[name].write_text(text)
+    return paths
+
+
+def test_identical_kbs_share_one_repository(kbs):
+    created = []
+    registry = KBRegistry(kbs, factory=lambda path: created.append(path) or object(), default="upv")
+    assert created == []  # se crean bajo demanda
+    assert registry.get("upv") is registry.get("uv")
+    assert registry.get("gva") is not registry.get("upv")
+    assert registry.get(None) is registry.get("upv")
+    assert len(created) == 2 and len(list(registry.instances())) == 2
+    groups = registry.stats()["groups"]
+    assert [g["tenants"] for g in groups] == [["upv", "uv"], ["gva"]]
+
+
+def test_unknown_tenant(kbs):
+    registry = KBRegistry(kbs, factory=lambda path: object(), default=None)
+    with pytest.raises(UnknownTenantError):
+        registry.get("otra")
+    with pytest.raises(UnknownTenantError):
+        registry.get(None)
+
+
+def test_regroup_splits_tenants_whose_kb_diverged(kbs):
+    registry = KBRegistry(kbs, factory=lambda path: path)
+    assert registry.get("uv") == kbs["upv"]
+    kbs["uv"].write_text("beca(c).\n")
+    assert registry.regroup() == ["uv"]
+    assert registry.get("uv") == kbs["uv"]
+    assert registry.regroup() == []
+
+
+def test_from_config(tmp_path, kbs):
+    config = tmp_path / "tenants.json"
+    config.write_text(json.dumps({"default": "gva", "tenants": {k: str(v) for k, v in kbs.items()}}))
+    registry = KBRegistry.from_config(lambda path: path, config)
+    assert registry.tenants() == ["upv", "uv", "gva"]
+    assert registry.get() == kbs["gva"]
@@ -0,0 +1,69 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from src.infrastructure.kb_snapshot import KBSnapshot, kb_hash
+
+
+class FakePrologThread:
+    """Simula qcompile/1 escribiendo el .qlf junto al fuente compilado."""
+
+    def __init__(self, fail_on: str = None):
+        self.goals = []
+        self.fail_on = fail_on
+
+    def query(self, goal):
+        self.goals.append(goal)
+        if self.fail_on and goal.startswith(self.fail_on):
+            raise RuntimeError("fallo simulado")
+        match = re.match(r"qcompile\('(.+)\.pl'\)", goal)
+        if match:
+            Path(match.group(1) + ".qlf").write_text("qlf")
+        return True
+
+
+@pytest.fixture
+def kb(tmp_path):
+    path = tmp_path / "becas.pl"
+    path.write_text("beca(a).\n")
+    return path
+
+
+def test_first_load_compiles_and_next_loads_qlf(kb, tmp_path):
+    snapshot = KBSnapshot(kb, cache_dir=tmp_path / "cache")
+    assert not snapshot.is_current()
+    assert snapshot.load_into(FakePrologThread()) == "compiled"
+    assert snapshot.is_current()
+
+    thread = FakePrologThread()
+    assert snapshot.load_into(thread) == "qlf"
+    assert thread.goals[0].startswith("load_files(")
+
+
+def test_snapshot_is_stale_after_kb_changes(kb, tmp_path):
+    snapshot = KBSnapshot(kb, cache_dir=tmp_path / "cache")
+    snapshot.load_into(FakePrologThread())
+    old_version = kb_hash(kb)
+
+    kb.write_text("beca(a).\nbeca(b).\n")
+    assert not snapshot.is_current()
+    assert snapshot.load_into(FakePrologThread()) == "compiled"
+    # Solo se conserva el snapshot de la versión vigente
+    assert not snapshot.qlf_path(old_version).exists()
+    assert len(list((tmp_path / "cache").glob("*.qlf"))) == 1
+
+
+def test_falls_back_to_source_when_compile_fails(kb, tmp_path):
+    snapshot = KBSnapshot(kb, cache_dir=tmp_path / "cache")
+    thread = FakePrologThread(fail_on="qcompile")
+    assert snapshot.load_into(thread) == "source"
+    assert thread.goals[-1].startswith("consult(")
+    assert not snapshot.is_current()
+
+
+def test_falls_back_to_source_when_qlf_cannot_be_loaded(kb, tmp_path):
+    snapshot = KBSnapshot(kb, cache_dir=tmp_path / "cache")
+    snapshot.load_into(FakePrologThread())
+    thread = FakePrologThread(fail_on="load_files")
+    assert snapshot.load_into(thread) == "source"
@@ -0,0 +1,133 @@
+import pytest
+
+from src.infrastructure import llm_cache
+from src.infrastructure.llm_cache import CachedLLM, generation_options, prompt_key
+from src.domain.interfaces import LLMStreamError
+
+
+class FakeClient:
+    def __init__(self, model="gemma3:4b", temperature=0.1):
+        self.model = model
+        self.temperature = temperature
+
+
+class FakeLLM:
+    error_response = "Lo siento, tuve un problema al procesar tu solicitud con la IA."
+
+    def __init__(self, temperature=0.1, model="gemma3:4b"):
+        self.llm = FakeClient(model, temperature)
+        self.calls = []
+        self.fail = False
+
+    def generate(self, prompt, history=None):
+        self.calls.append(prompt)
+        if self.fail:
+            return self.error_response
+        return f"respuesta a {prompt}"
+
+
+def test_key_depends_on_model_options_and_prompt():
+    options = generation_options(FakeLLM())
+    assert options == {"model": "gemma3:4b", "temperature": 0.1}
+    key = prompt_key(options, "quiero una beca")
+    assert key == prompt_key(dict(options), "quiero una beca")
+    assert key != prompt_key(options, "quiero una beca ")
+    assert key != prompt_key({**options, "model": "llama3.2"}, "quiero una beca")
+    assert key != prompt_key(options, "quiero una beca", [("user", "hola")])
+
+
+def test_identical_prompts_reach_the_model_once():
+    llm = FakeLLM()
+    cached = CachedLLM(llm)
+    assert cached.generate("quiero una beca") == "respuesta a quiero una beca"
+    assert cached.generate("quiero una beca") == "respuesta a quiero una beca"
+    cached.generate("otra cosa")
+    assert llm.calls == ["quiero una beca", "otra cosa"]
+    stats = cached.stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_creative_models_and_errors_are_not_cached():
+    creative = FakeLLM(temperature=0.3)
+    cached = CachedLLM(creative)
+    cached.generate("hola")
+    cached.generate("hola")
+    assert len(creative.calls) == 2
+    assert cached.stats()["bypassed"] == 2
+
+    failing = FakeLLM()
+    failing.fail = True
+    cached = CachedLLM(failing)
+    cached.generate("hola")
+    failing.fail = False
+    assert cached.generate("hola") == "respuesta a hola"
+    assert len(failing.calls) == 2
+
+
+def test_disk_tier_survives_restarts_and_expires(tmp_path, monkeypatch):
+    db_path = tmp_path / "llm.sqlite3"
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+
+    first = FakeLLM()
+    CachedLLM(first, db_path=db_path, ttl=60).generate("quiero una beca")
+
+    restarted = FakeLLM()
+    cached = CachedLLM(restarted, db_path=db_path, ttl=60)
+    assert cached.generate("quiero una beca") == "respuesta a quiero una beca"
+    assert restarted.calls == []
+    assert cached.stats()["disk_hits"] == 1
+
+    now[0] += 61
+    cached.generate("quiero una beca")
+    assert restarted.calls == ["quiero una beca"]
+    assert cached.stats()["expired"] == 1
+
+    now[0] += 61
+    assert cached.purge_expired() == 1
+    assert len(cached.store) == 0
+
+
+class StreamingLLM(FakeLLM):
+    def generate_stream(self, prompt, history=None):
+        self.calls.append(prompt)
+        yield from ["respuesta ", "a ", prompt]
+
+
+def test_streamed_responses_are_cached_only_when_complete():
+    llm = StreamingLLM()
+    cached = CachedLLM(llm)
+    stream = cached.generate_stream("hola")
+    assert next(stream) == "respuesta "
+    stream.close()
+    assert list(cached.generate_stream("hola")) == ["respuesta ", "a ", "hola"]
+    assert list(cached.generate_stream("hola")) == ["respuesta a hola"]
+    assert cached.generate("hola") == "respuesta a hola"
+    assert llm.calls == ["hola", "hola"]
+
+
+class CutStreamLLM(StreamingLLM):
+    def __init__(self):
+        super().__init__()
+        self.cut = True
+
+    def generate_stream(self, prompt, history=None):
+        self.calls.append(prompt)
+        yield "respuesta "
+        if self.cut:
+            raise LLMStreamError("Generación interrumpida")
+        yield from ["a ", prompt]
+
+
+def test_stream_cut_by_the_llm_is_not_cached():
+    llm = CutStreamLLM()
+    cached = CachedLLM(llm)
+    with pytest.raises(LLMStreamError):
+        list(cached.generate_stream("hola"))
+    with pytest.raises(LLMStreamError):
+        cached.generate_json("hola")
+    assert len(cached.memory) == 0
+    llm.cut = False
+    assert "".join(cached.generate_stream("hola")) == "respuesta a hola"
+    assert llm.calls == ["hola", "hola", "hola"]
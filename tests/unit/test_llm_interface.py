@@ -0,0 +1,30 @@
+import pytest
+
+from src.infrastructure.llm_interface import GEMMA, LLMStreamError
+
+
+class FailingClient:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def stream(self, prompt):
+        yield from self.chunks
+        raise ConnectionError("conexión cerrada")
+
+
+def gemma(chunks):
+    llm = GEMMA.__new__(GEMMA)
+    llm.llm = FailingClient(chunks)
+    return llm
+
+
+def test_failure_before_the_first_token_yields_the_error_response():
+    assert list(gemma([" ", "\n"]).generate_stream("prompt")) == [GEMMA.error_response]
+
+
+def test_failure_mid_answer_is_raised():
+    chunks = gemma([" Suelen", " pedir"]).generate_stream("prompt")
+    assert next(chunks) == "Suelen"
+    assert next(chunks) == " pedir"
+    with pytest.raises(LLMStreamError):
+        next(chunks)
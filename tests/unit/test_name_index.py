@@ -0,0 +1,61 @@
+import pytest
+
+from src.infrastructure.name_index import NameIndex, _add, _at_least, normalize, trigrams
+
+IDS = ["beca_mec_general", "beca_upv_deporte", "beca_fp_valencia", "beca_erasmus_master", "beca_gv_transporte"]
+INFO = {
+    "beca_mec_general": "Beca del Ministerio de Educación de España para estudios universitarios.",
+    "beca_upv_deporte": "Beca para estudiantes deportistas de alto nivel en la Universitat Politècnica de València.",
+    "beca_fp_valencia": "Beca de apoyo económico para estudiantes de Formación Profesional.",
+    "beca_erasmus_master": "Beca europea para cursar másteres conjuntos internacionales.",
+    "beca_gv_transporte": "Ayuda económica para estudiantes con residencia alejada del campus.",
+}
+ALIASES = {"beca_mec_general": ["MEC"], "beca_erasmus_master": ["Erasmus Mundus"]}
+
+
+@pytest.fixture
+def index():
+    return NameIndex(IDS, INFO, ALIASES)
+
+
+def test_normalize_and_trigrams():
+    assert normalize("Politècnica de València!") == "politecnica de valencia"
+    assert trigrams("la MEC") == {"  m", " me", "mec", "ec "}
+
+
+@pytest.mark.parametrize("mention, expected", [
+    ("la MEC", "beca_mec_general"),
+    ("erasmus", "beca_erasmus_master"),
+    ("Erasmus Mundus", "beca_erasmus_master"),
+    ("beca del ministerio", "beca_mec_general"),
+    ("deporte upv", "beca_upv_deporte"),
+    ("transprte", "beca_gv_transporte"),
+])
+def test_search_ranks_the_mentioned_scholarship_first(index, mention, expected):
+    results = index.search(mention)
+    assert results[0][0] == expected
+    assert all(a[1] >= b[1] for a, b in zip(results, results[1:]))
+
+
+def test_unrelated_text_has_no_candidates(index):
+    assert index.search("xyzzy") == []
+    assert index.search("") == []
+
+
+def test_bit_sliced_counter_matches_plain_counts():
+    bitsets = [0b1011, 0b0110, 0b1110, 0b0011]
+    planes = []
+    for bits in bitsets:
+        _add(planes, bits)
+    _add(planes, 0b0001, plane=1)  # +2 para la beca 0
+    counts = [sum(b >> pos & 1 for b in bitsets) + (2 if pos == 0 else 0) for pos in range(4)]
+    for k in range(6):
+        expected = sum(1 << pos for pos, c in enumerate(counts) if c >= k)
+        assert _at_least(planes, k, 0b1111) == expected
+
+
+def test_many_scholarships_keep_the_best_candidates():
+    ids = [f"beca_sint_{i:05d}" for i in range(2000)] + ["beca_mec_general"]
+    index = NameIndex(ids, {}, {"beca_mec_general": ["MEC"]})
+    assert index.search("sint 01234")[0][0] == "beca_sint_01234"
+    assert index.search("la mec")[0][0] == "beca_mec_general"
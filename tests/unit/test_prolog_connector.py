@@ -1,7 +1,10 @@
 import pytest
+from contextlib import contextmanager
 from pathlib import Path
-from swiplserver import PrologError
+from swiplserver import PrologError, PrologQueryTimeoutError
+from src.infrastructure.kb_journal import retract_op
 from src.infrastructure.prolog_connector import PrologService, PrologConnectorError, NoResultsError
+from src.infrastructure.prolog_connector import PrologConnector, PrologTimeoutError, UnknownCriterionError
 
 class DummyThread:
     def __init__(self, response):
@@ -76,3 +79,208 @@ def test_query_prolog_error(monkeypatch, tmp_path):
     with pytest.raises(PrologConnectorError) as exc:
         svc.query("fail", ["X"])
     assert "Prolog error" in str(exc.value)
+
+
+# --- query_many ---------------------------------------------------------------
+class FakeWorker:
+    def __init__(self, raw):
+        self.raw = raw
+        self.goals = []
+        self.journal_seq = 0
+
+    def query(self, goal, timeout=None, cancel=None):
+        self.goals.append(goal)
+        if isinstance(self.raw, Exception):
+            raise self.raw
+        return self.raw
+
+
+class FakePool:
+    def __init__(self, worker):
+        self.worker = worker
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        yield self.worker
+
+
+def binding(name, value):
+    return {"functor": "=", "args": [name, value]}
+
+
+@pytest.fixture
+def batch_service(tmp_path):
+    kb = tmp_path / "test.pl"
+    kb.write_text("% empty\n")
+    svc = PrologService(kb_path=kb, use_snapshot=False)
+    worker = FakeWorker([{"Results": [
+        {"functor": "ok", "args": [[[binding("Types", ["internacional"])], [binding("Types", ["publico_local"])]]]},
+        {"functor": "ok", "args": [[]]},
+        {"functor": "error", "args": ["error(existence_error(procedure,foo/2),foo/2)"]},
+    ]}])
+    svc._pool = FakePool(worker)
+    return svc, worker
+
+
+def test_query_many_runs_in_one_round_trip(batch_service):
+    svc, worker = batch_service
+    results = svc.query_many([
+        ("setof(Type, organismo(_,Type), Types)", ["Types"]),
+        ("setof(Type, nivel(_,Type), Types)", ["Types"]),
+        ("foo(_, X)", ["X"]),
+    ])
+    assert len(worker.goals) == 1
+    assert "term_string('setof(Type, organismo(_,Type), Types)'" in worker.goals[0]
+    assert results[0].rows == [{"Types": ["internacional"]}, {"Types": ["publico_local"]}]
+    assert isinstance(results[1].error, NoResultsError)
+    assert isinstance(results[2].error, PrologConnectorError)
+    with pytest.raises(PrologConnectorError):
+        results[2].unwrap()
+
+
+def test_get_all_criteria_uses_a_single_batch(batch_service):
+    svc, worker = batch_service
+    connector = PrologConnector(service=svc)
+    values = connector.get_criteria_many(["organismo", "nivel", "financiamiento"])
+    assert values == {"organismo": ["internacional", "publico_local"]}
+    assert connector.get_all_criteria(["organismo", "nivel", "financiamiento"]) == ["internacional", "publico_local"]
+    assert len(worker.goals) == 2
+
+
+def test_unknown_criteria_never_reach_prolog(batch_service):
+    svc, worker = batch_service
+    connector = PrologConnector(service=svc)
+    with pytest.raises(UnknownCriterionError):
+        connector.get_criteria("member(X,[1]),halt")
+    with pytest.raises(UnknownCriterionError):
+        connector.get_criteria_many(["organismo", "beca"])
+    assert worker.goals == []
+
+
+# --- recarga en caliente --------------------------------------------------------
+class ReloadPool(FakePool):
+    def __init__(self, worker):
+        super().__init__(worker)
+        self.closed = False
+
+    def warm_up(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def stats(self):
+        return {}
+
+
+def test_reload_swaps_the_pool_and_notifies(tmp_path):
+    kb = tmp_path / "test.pl"
+    kb.write_text("beca(a).\n")
+    svc = PrologService(kb_path=kb, use_snapshot=False)
+    old_pool = ReloadPool(FakeWorker(True))
+    new_pool = ReloadPool(FakeWorker(True))
+    svc._pool = old_pool
+    svc._create_pool = lambda: new_pool
+    events = []
+    svc.add_reload_listener(lambda old, new: events.append((old, new)))
+
+    old_version = svc.version
+    assert svc.reload() is False
+    kb.write_text("beca(a).\nbeca(b).\n")
+    assert svc.reload() is True
+    assert svc._pool is new_pool and old_pool.closed
+    assert events == [(old_version, svc.version)]
+    assert svc.stats()["reload"]["reloads"] == 1
+
+
+def test_invalid_kb_keeps_the_current_pool(tmp_path):
+    kb = tmp_path / "test.pl"
+    kb.write_text("beca(a).\n")
+    svc = PrologService(kb_path=kb, use_snapshot=False)
+    old_pool = ReloadPool(FakeWorker(True))
+    new_pool = ReloadPool(FakeWorker(False))
+    svc._pool = old_pool
+    svc._create_pool = lambda: new_pool
+
+    kb.write_text("% vacía\n")
+    assert svc.reload() is False
+    assert svc._pool is old_pool and new_pool.closed
+    assert svc.stats()["reload"]["failures"] == 1
+
+
+def test_prolog_timeout_surfaces_as_its_own_error(tmp_path):
+    kb = tmp_path / "test.pl"
+    kb.write_text("% empty\n")
+    svc = PrologService(kb_path=kb, use_snapshot=False, query_timeout=0.5)
+    svc._pool = FakePool(FakeWorker(PrologQueryTimeoutError({"functor": "exception", "args": ["time_limit_exceeded"]})))
+    with pytest.raises(PrologTimeoutError):
+        svc.query("repeat, fail", ["X"])
+    # Sigue siendo un PrologConnectorError para quien ya lo capturaba
+    with pytest.raises(PrologConnectorError):
+        svc.query_many([("repeat, fail", ["X"])])
+
+
+def test_service_records_query_metrics(batch_service):
+    svc, _ = batch_service
+    svc.query_many([
+        ("setof(Type, organismo(_,Type), Types)", ["Types"]),
+        ("setof(Type, nivel(_,Type), Types)", ["Types"]),
+        ("foo(_, X)", ["X"]),
+    ])
+    svc._pool = FakePool(FakeWorker(False))
+    with pytest.raises(NoResultsError):
+        svc.query("beca('x')", ["B"])
+    queries = svc.metrics.snapshot()
+    assert queries["totals"]["ok"] == 1
+    assert queries["totals"]["no_results"] == 2
+    assert queries["totals"]["error"] == 1
+    assert queries["templates"]["beca(?)"]["latency"]["count"] == 1
+
+
+# --- escrituras con diario -------------------------------------------------------
+def test_apply_journals_the_change_and_workers_catch_up(tmp_path):
+    kb = tmp_path / "test.pl"
+    kb.write_text("beca(a).\n")
+    svc = PrologService(kb_path=kb, use_snapshot=False)
+    worker = FakeWorker(True)
+    svc._pool = FakePool(worker)
+    events = []
+    svc.add_reload_listener(lambda old, new: events.append((old, new)))
+
+    old_version = svc.version
+    new_version = svc.apply([retract_op("a")])
+    assert new_version == f"{svc.kb_version}+1" and events == [(old_version, new_version)]
+    assert len(worker.goals) == 1 and worker.goals[0].startswith("snapshot((transaction((retractall(beca(a)), ")
+    assert (tmp_path / "test.pl.journal").exists()
+
+    # La siguiente consulta aplica antes la transacción en el worker
+    worker.raw = [{"X": "b"}]
+    svc.query("beca(X)", ["X"])
+    assert worker.goals[1].startswith("transaction((retractall(beca(a))")
+    assert worker.goals[2] == "beca(X)" and worker.journal_seq == 1
+    svc.query("beca(X)", ["X"])
+    assert worker.goals[3] == "beca(X)"
+
+
+def test_rejected_transactions_are_not_journaled(tmp_path):
+    kb = tmp_path / "test.pl"
+    kb.write_text("beca(a).\n")
+    svc = PrologService(kb_path=kb, use_snapshot=False)
+    svc._pool = FakePool(FakeWorker(False))
+    with pytest.raises(PrologConnectorError):
+        svc.apply([retract_op("a")])
+    assert svc.journal.seq == 0 and not (tmp_path / "test.pl.journal").exists()
+
+
+def test_compaction_writes_the_journal_into_the_kb(tmp_path):
+    kb = tmp_path / "test.pl"
+    kb.write_text("beca(a).\nbeca(b).\ninfo(a, 'A').\n")
+    svc = PrologService(kb_path=kb, use_snapshot=False)
+    svc._pool = ReloadPool(FakeWorker(True))
+    svc._create_pool = lambda: ReloadPool(FakeWorker(True))
+    svc.apply([retract_op("a")])
+
+    assert svc.compact_journal() is True
+    assert kb.read_text() == "beca(b).\n"
+    assert svc.journal.pending() == 0 and svc.version == f"{svc.kb_version}+1"
+    assert svc.compact_journal() is False
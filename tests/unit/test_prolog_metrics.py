@@ -0,0 +1,43 @@
+import logging
+
+from src.infrastructure.prolog_metrics import LatencyHistogram, PrologMetrics, goal_template
+
+
+def test_goal_template_hides_values():
+    first = goal_template("buscar_beca('publico_local', _, _, 'grado', _, B, Info).")
+    second = goal_template("buscar_beca('internacional', _, _,  'master', _, B, Info)")
+    assert first == second == "buscar_beca(?, _, _, ?, _, B, Info)"
+    assert goal_template("limit(20, offset(40, beca(B)))") == "limit(?, offset(?, beca(B)))"
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    h = LatencyHistogram()
+    for ms in [1] * 90 + [150] * 9 + [3000]:
+        h.observe(ms / 1000)
+    assert h.percentile(0.5) == 1.0
+    assert h.percentile(0.95) == 200.0
+    assert h.percentile(0.999) == 5000.0
+    assert h.as_dict()["count"] == 100
+
+
+def test_outcomes_are_counted_per_template():
+    metrics = PrologMetrics(slow_threshold=None)
+    metrics.record("beca(B)", "beca(B)", 0.01)
+    metrics.record("beca(B)", "beca(B)", 0.02, "no_results")
+    metrics.record("foo(?)", "foo(1)", 0.5, "timeout")
+    metrics.count("foo(?)", "error")
+    snap = metrics.snapshot()
+    assert snap["templates"]["beca(B)"]["outcomes"]["no_results"] == 1
+    assert snap["templates"]["beca(B)"]["latency"]["count"] == 2
+    assert snap["totals"] == {"ok": 1, "no_results": 1, "timeout": 1, "cancelled": 0, "error": 1}
+    assert snap["slow_queries"] == []
+
+
+def test_slow_queries_are_logged_over_the_threshold(caplog):
+    metrics = PrologMetrics(slow_threshold=0.1, slow_log_size=2)
+    with caplog.at_level(logging.WARNING):
+        for i in range(3):
+            metrics.record("foo(?)", f"foo({i})", 0.2)
+        metrics.record("foo(?)", "foo(9)", 0.05)
+    assert [q["goal"] for q in metrics.slow_queries()] == ["foo(1)", "foo(2)"]
+    assert sum("Consulta Prolog lenta" in r.message for r in caplog.records) == 3
@@ -0,0 +1,250 @@
+import socket
+import threading
+
+import pytest
+from swiplserver import PrologError, PrologQueryCancelledError, PrologResultNotAvailableError
+
+from src.infrastructure.prolog_pool import PrologWorkerPool, WorkerUnresponsiveError
+
+
+class FakeWorker:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.stopped = False
+        self.last_used = 0.0
+
+    def query(self, goal):
+        return True
+
+    def is_healthy(self):
+        return self.healthy
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def spawned():
+    return []
+
+
+@pytest.fixture
+def pool(spawned):
+    def factory():
+        worker = FakeWorker()
+        spawned.append(worker)
+        return worker
+    return PrologWorkerPool(factory=factory, size=2, health_check_interval=0)
+
+
+def test_worker_is_reused_between_queries(pool, spawned):
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        pass
+    assert first is second
+    assert len(spawned) == 1
+
+
+def test_pool_never_exceeds_size(pool, spawned):
+    with pool.acquire():
+        with pool.acquire():
+            with pytest.raises(TimeoutError):
+                with pool.acquire(timeout=0.05):
+                    pass
+    assert len(spawned) == 2
+
+
+def test_prolog_error_keeps_worker(pool, spawned):
+    with pytest.raises(PrologError):
+        with pool.acquire():
+            raise PrologError({"functor": "exception", "args": ["boom"]})
+    assert not spawned[0].stopped
+    assert pool.stats()["idle"] == 1
+
+
+def test_unexpected_error_recycles_worker(pool, spawned):
+    with pytest.raises(OSError):
+        with pool.acquire():
+            raise OSError("socket closed")
+    assert spawned[0].stopped
+    with pool.acquire() as worker:
+        assert worker is spawned[1]
+    assert pool.stats()["recycled"] == 1
+
+
+def test_unhealthy_worker_is_replaced_on_checkout(pool, spawned):
+    with pool.acquire():
+        pass
+    spawned[0].healthy = False
+    with pool.acquire() as worker:
+        assert worker is spawned[1]
+    assert spawned[0].stopped
+
+
+def test_close_stops_idle_and_borrowed_workers(pool, spawned):
+    with pool.acquire():
+        pass
+    with pool.acquire() as borrowed:
+        pool.close()
+        assert not borrowed.stopped
+    assert borrowed.stopped
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+
+
+class FakeAsyncThread:
+    """Hilo MQI que entrega las respuestas de query_async una a una."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.cancelled = False
+
+    def query_async(self, goal, find_all=True, query_timeout_seconds=None):
+        assert find_all is False
+        self.pending = [[a] for a in self.answers] + [None]
+
+    def query_async_result(self):
+        if self.cancelled:
+            self.pending = [None]
+        return self.pending.pop(0)
+
+    def cancel_query_async(self):
+        self.cancelled = True
+
+
+def streaming_worker(answers):
+    from src.infrastructure.prolog_pool import PrologWorker
+    worker = PrologWorker.__new__(PrologWorker)
+    worker._thread = FakeAsyncThread(answers)
+    worker.queries = 0
+    worker.last_used = 0.0
+    return worker
+
+
+def test_iter_query_streams_answers():
+    worker = streaming_worker([{"X": 1}, {"X": 2}])
+    assert list(worker.iter_query("member(X, [1,2])")) == [{"X": 1}, {"X": 2}]
+    assert not worker._thread.cancelled
+
+
+def test_abandoned_iterator_cancels_and_returns_the_worker():
+    worker = streaming_worker([{"X": 1}, {"X": 2}, {"X": 3}])
+    pool = PrologWorkerPool(factory=lambda: worker, size=1, health_check_interval=float("inf"))
+
+    def stream():
+        with pool.acquire() as w:
+            yield from w.iter_query("between(1, 3, X)")
+
+    rows = stream()
+    assert next(rows) == {"X": 1}
+    rows.close()
+    assert worker._thread.cancelled
+    assert worker._thread.pending == []
+    assert pool.stats()["idle"] == 1
+    assert pool.recycled == 0
+
+
+class SlowThread:
+    """Hilo MQI cuya consulta asíncrona tarda `polls` sondeos en responder."""
+
+    def __init__(self, polls=None, hung=False):
+        self.polls = polls
+        self.hung = hung
+        self.cancelled = False
+
+    def query(self, goal, query_timeout_seconds=None):
+        if self.hung:
+            raise socket.timeout("timed out")
+        return True
+
+    def query_async(self, goal, find_all=True, query_timeout_seconds=None):
+        self.results = [[{"X": 1}], None]
+
+    def query_async_result(self, wait_timeout_seconds=None):
+        if self.cancelled:
+            raise PrologQueryCancelledError({"functor": "exception", "args": ["cancel_goal"]})
+        if self.polls is None or self.polls > 0:
+            if self.polls:
+                self.polls -= 1
+            raise PrologResultNotAvailableError({"functor": "exception", "args": ["result_not_available"]})
+        return self.results.pop(0)
+
+    def cancel_query_async(self):
+        self.cancelled = True
+
+
+def worker_with(thread):
+    from src.infrastructure.prolog_pool import PrologWorker
+    worker = PrologWorker.__new__(PrologWorker)
+    worker._thread = thread
+    worker.queries = 0
+    worker.last_used = 0.0
+    worker.stop = lambda: setattr(worker, "stopped", True)
+    return worker
+
+
+def test_cancel_event_cancels_the_running_goal():
+    cancel = threading.Event()
+    worker = worker_with(SlowThread(polls=None))
+    threading.Timer(0.1, cancel.set).start()
+    with pytest.raises(PrologQueryCancelledError):
+        worker.query("sleep(10)", cancel=cancel)
+    assert worker._thread.cancelled
+
+
+def test_cancellable_query_returns_the_answer():
+    worker = worker_with(SlowThread(polls=2))
+    assert worker.query("member(X, [1])", cancel=threading.Event()) == [{"X": 1}]
+
+
+class FakeProcess:
+    def __init__(self):
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+    def __exit__(self, *exc):
+        pass
+
+
+def hung_worker():
+    """Worker real cuyo proceso swipl no contesta nada por el socket."""
+    from swiplserver import PrologMQI, PrologThread
+    from src.infrastructure.prolog_pool import PrologWorker
+    worker = PrologWorker.__new__(PrologWorker)
+    worker._mqi = PrologMQI(launch_mqi=False)
+    worker._mqi._process = process = FakeProcess()
+    worker._thread = PrologThread(worker._mqi)
+    worker._thread._socket, worker.peer = socket.socketpair()
+    worker.queries = 0
+    worker.last_used = 0.0
+    return worker, process
+
+
+def test_unresponsive_worker_is_replaced(monkeypatch):
+    monkeypatch.setattr("src.infrastructure.prolog_pool.HUNG_WORKER_GRACE", 0.1)
+    hung, process = hung_worker()
+    workers = [hung]
+    pool = PrologWorkerPool(factory=lambda: workers.pop(0), size=1, health_check_interval=float("inf"))
+    errors = []
+
+    def run():
+        try:
+            with pool.acquire() as worker:
+                worker.query("repeat, fail", timeout=0.1)
+        except Exception as e:
+            errors.append(e)
+
+    # stop() no debe esperar la despedida del proceso colgado
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert [type(e) for e in errors] == [WorkerUnresponsiveError]
+    assert process.killed
+    assert hung._thread._socket is None
+    assert pool.recycled == 1
+    assert pool.stats()["alive"] == 0
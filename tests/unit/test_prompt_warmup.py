@@ -0,0 +1,43 @@
+from src.infrastructure.llm_cache import CachedLLM
+from src.infrastructure.prompt_warmup import static_prefix, warm_up
+
+
+def test_static_prefix_stops_at_the_first_field():
+    template = 'Plantilla {{"intention": "..."}}\nReglas fijas\nIntención anterior: {last_intention}\n{context}'
+    assert static_prefix(template) == 'Plantilla {"intention": "..."}\nReglas fijas\nIntención anterior: '
+    assert static_prefix("sin campos {{}}") == "sin campos {}"
+
+
+class StreamingLLM:
+    error_response = "error"
+
+    def __init__(self, chunks):
+        self.llm = type("Client", (), {"model": "gemma3:4b", "temperature": 0.1})()
+        self.chunks = chunks
+        self.prompts = []
+        self.consumed = 0
+
+    def generate(self, prompt, history=None):
+        return "".join(self.chunks)
+
+    def generate_stream(self, prompt, history=None):
+        self.prompts.append(prompt)
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+
+def test_warm_up_evaluates_each_prefix_past_the_cache():
+    llm = StreamingLLM(["Vale", ",", " entendido"])
+    cached = CachedLLM(llm)
+    timings = warm_up(cached, ["prefijo A", "prefijo B"])
+    assert llm.prompts == ["prefijo A", "prefijo B"]
+    assert llm.consumed == 2
+    assert list(timings) == ["prefijo A", "prefijo B"]
+    assert cached.stats()["misses"] == 0
+
+
+def test_warm_up_gives_up_when_ollama_is_down():
+    llm = StreamingLLM(["error"])
+    assert warm_up(llm, ["prefijo A", "prefijo B"]) == {}
+    assert llm.prompts == ["prefijo A"]
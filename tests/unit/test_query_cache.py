@@ -0,0 +1,151 @@
+import pytest
+
+from src.domain.entities import FilterCriteria
+from src.infrastructure import query_cache
+from src.infrastructure.query_cache import CachedScholarshipRepository, LRUCache
+
+
+class CountingRepository:
+    def __init__(self):
+        self.calls = []
+
+    def get_criteria(self, criterion):
+        self.calls.append(("get_criteria", criterion))
+        return [f"{criterion}_a", f"{criterion}_b"]
+
+    def get_criteria_many(self, criteria):
+        self.calls.append(("get_criteria_many", tuple(criteria)))
+        return {c: [f"{c}_a"] for c in criteria}
+
+    def get_all_scholarship_names(self):
+        self.calls.append(("get_all_scholarship_names",))
+        return ["beca_a", "beca_b"]
+
+    def find_by_filters(self, criteria):
+        self.calls.append(("find_by_filters", criteria.area))
+        return []
+
+    def find_by_name(self, name):
+        return []
+
+
+@pytest.fixture
+def kb_version():
+    return {"value": "v1"}
+
+
+@pytest.fixture
+def repo(kb_version):
+    return CachedScholarshipRepository(CountingRepository(), maxsize=8, version=lambda: kb_version["value"])
+
+
+def test_repeated_lookups_hit_the_cache(repo):
+    assert repo.get_criteria("nivel") == repo.get_criteria("nivel")
+    repo.get_all_scholarship_names()
+    repo.get_all_scholarship_names()
+    assert len(repo.repository.calls) == 2
+    assert repo.stats()["hits"] == 2
+    assert repo.stats()["misses"] == 2
+
+
+def test_equivalent_filters_share_an_entry(repo):
+    repo.find_by_filters(FilterCriteria(area="salud", location="cualquiera"))
+    repo.find_by_filters(FilterCriteria(area="salud"))
+    assert repo.repository.calls == [("find_by_filters", "salud")]
+
+
+def test_batched_criteria_only_fetch_missing_ones(repo):
+    repo.get_criteria("nivel")
+    values = repo.get_criteria_many(["nivel", "organismo"])
+    assert values == {"nivel": ["nivel_a", "nivel_b"], "organismo": ["organismo_a"]}
+    assert repo.repository.calls[-1] == ("get_criteria_many", ("organismo",))
+
+
+def test_kb_change_invalidates_entries(repo, kb_version):
+    repo.get_criteria("nivel")
+    kb_version["value"] = "v2"
+    repo.get_criteria("nivel")
+    assert len(repo.repository.calls) == 2
+    assert repo.stats()["invalidations"] == 1
+    assert repo.stats()["size"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_discard_removes_a_single_key():
+    cache = LRUCache(maxsize=3)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.discard("a") is True
+    assert cache.discard("a") is False
+    assert cache.get("a") is None and cache.get("b") == 2
+    assert len(cache) == 1
+
+
+class ReloadingRepository(CountingRepository):
+    """Repositorio que avisa de las recargas, como PrologConnector."""
+
+    def __init__(self):
+        super().__init__()
+        self.service = type("Service", (), {"version": "v1"})()
+        self.listeners = []
+
+    def add_reload_listener(self, listener):
+        self.listeners.append(listener)
+
+    def reload(self, version, changed):
+        old, self.service.version = self.service.version, version
+        for listener in self.listeners:
+            listener(old, version, changed)
+
+
+def test_reload_keeps_entries_of_unchanged_predicates():
+    repository = ReloadingRepository()
+    repo = CachedScholarshipRepository(repository, maxsize=8)
+    repo.get_criteria("nivel")
+    repo.get_criteria("ubicacion")
+    repo.get_all_scholarship_names()
+    repo.find_by_filters(FilterCriteria(area="salud"))
+
+    repository.reload("v2", {"ubicacion"})
+    calls = len(repository.calls)
+    repo.get_criteria("nivel")
+    repo.get_all_scholarship_names()
+    assert len(repository.calls) == calls
+    repo.get_criteria("ubicacion")
+    repo.find_by_filters(FilterCriteria(area="salud"))
+    assert len(repository.calls) == calls + 2
+    assert repo.stats()["rebased"] == 2
+
+
+def test_reload_with_unknown_changes_drops_everything():
+    repository = ReloadingRepository()
+    repo = CachedScholarshipRepository(repository, maxsize=8)
+    repo.get_criteria("nivel")
+    repository.reload("v2", None)
+    assert repo.stats()["size"] == 0
+
+
+def test_timeout_serves_last_known_answer(repo, kb_version):
+    # La misma clase que captura la caché (importada como src.infrastructure.*)
+    PrologTimeoutError = query_cache.PrologTimeoutError
+    assert repo.get_criteria("nivel") == ["nivel_a", "nivel_b"]
+    kb_version["value"] = "v2"
+
+    def timeout(criterion):
+        raise PrologTimeoutError("Prolog timeout")
+
+    repo.repository.get_criteria = timeout
+    assert repo.get_criteria("nivel") == ["nivel_a", "nivel_b"]
+    assert repo.stats()["stale_served"] == 1
+    with pytest.raises(PrologTimeoutError):
+        repo.get_criteria("ubicacion")
@@ -0,0 +1,55 @@
+import pytest
+
+from src.infrastructure.rule_classifier import RuleBasedClassifier, strip_fillers
+
+
+@pytest.fixture
+def classifier():
+    return RuleBasedClassifier.from_config()
+
+
+def test_strip_fillers():
+    assert strip_fillers("Pues para Ingeniería, por favor") == "ingenieria"
+    assert strip_fillers("un máster gracias") == "master"
+    assert strip_fillers("para") == "para"
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Sí", "yes"), ("vale", "yes"), ("de acuerdo", "yes"), ("ok!", "yes"),
+    ("no", "no"), ("para nada", "no"),
+])
+def test_confirmations(classifier, message, expected):
+    assert classifier.classify(message, awaiting_confirmation=True) == {"confirmation": expected}
+
+
+def test_confirmation_words_need_a_pending_confirmation(classifier):
+    assert classifier.classify("vale", pending_field="nivel") is None
+
+
+@pytest.mark.parametrize("message, field, value", [
+    ("posgrado", "nivel", "posgrado"),
+    ("un máster", "nivel", "posgrado"),
+    ("para ingeniería", "campo_estudio", "ciencias_tecnicas"),
+    ("ciencias técnicas", "campo_estudio", "ciencias_tecnicas"),
+    ("me da igual", "ubicacion", "cualquiera"),
+    ("cualquiera", "organismo", "cualquiera"),
+    ("España", "ubicacion", "espana"),
+])
+def test_options_of_the_pending_field(classifier, message, field, value):
+    assert classifier.classify(message, pending_field=field) == {
+        "criterion": {"action": "select", "field": field, "value": value}
+    }
+
+
+def test_navigation_and_unresolved_turns(classifier):
+    assert classifier.classify("atrás", pending_field="nivel") == {"navigation": "atras"}
+    assert classifier.classify("sáltate esta pregunta") is None
+    assert classifier.classify("salta esta pregunta") == {"navigation": "saltar_omitir"}
+    # Opción de otro campo o frase libre: decide el LLM
+    assert classifier.classify("posgrado", pending_field="ubicacion") is None
+    assert classifier.classify("no, mejor para medicina", pending_field="campo_estudio") is None
+
+    stats = classifier.stats()
+    assert stats["hits"]["navigation"] == 2
+    assert stats["misses"] == 3
+    assert stats["hit_rate"] == pytest.approx(2 / 5)
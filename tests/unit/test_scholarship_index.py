@@ -0,0 +1,181 @@
+import copy
+import time
+
+import pytest
+
+from src.domain.entities import FilterCriteria
+from src.infrastructure.scholarship_index import CRITERIA, INDEX_GOALS, ScholarshipIndex
+
+
+def pair(beca, value):
+    return {"functor": "-", "args": [beca, value]}
+
+
+class FakeService:
+    """Devuelve los hechos como los serializa swiplserver dentro de un findall/3."""
+
+    ROWS = {
+        "findall(B, beca(B), Becas)": {"Becas": ["mec", "upv", "erasmus", "sin_info"]},
+        "findall(B-V, organismo(B,V), Pairs)": {"Pairs": [
+            pair("mec", "publico_estatal"), pair("upv", "publico_local"),
+            pair("erasmus", "internacional"), pair("sin_info", "publico_local"),
+        ]},
+        "findall(B-V, campo_estudio(B,V), Pairs)": {"Pairs": [
+            pair("mec", "ciencias_sociales"), pair("upv", "ciencias_tecnicas"), pair("erasmus", "otros"),
+        ]},
+        "findall(B-V, financiamiento(B,V), Pairs)": {"Pairs": [
+            pair("mec", "completa"), pair("upv", "parcial"), pair("erasmus", "completa"),
+        ]},
+        "findall(B-V, nivel(B,V), Pairs)": {"Pairs": [
+            pair("mec", "grado"), pair("mec", "posgrado"), pair("upv", "grado"),
+            pair("erasmus", "posgrado"), pair("fantasma", "otro"),
+        ]},
+        "findall(B-V, ubicacion(B,V), Pairs)": {"Pairs": [
+            pair("mec", "espana"), pair("upv", "valencia"), pair("erasmus", "europa"),
+        ]},
+        "findall(B-I, info(B,I), Pairs)": {"Pairs": [
+            pair("mec", "Beca MEC"), pair("upv", "Beca UPV"), pair("erasmus", "Beca Erasmus"),
+        ]},
+        "findall(r(B,T,D), requisito(B,T,D), Reqs)": {"Reqs": [
+            {"functor": "r", "args": ["mec", "nota_media", "5.0"]},
+        ]},
+    }
+
+    def query_many(self, goals):
+        return [FakeResult([self.ROWS[goal]]) for goal, _ in goals]
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def unwrap(self):
+        return self.rows
+
+
+@pytest.fixture
+def index():
+    return ScholarshipIndex.from_service(FakeService())
+
+
+def test_no_filters_returns_every_scholarship_with_info(index):
+    # sin_info no tiene info/2 y buscar_beca/7 nunca la devolvería
+    assert index.search({}) == ["mec", "upv", "erasmus"]
+
+
+def test_cualquiera_does_not_filter(index):
+    criteria = FilterCriteria(area="cualquiera", education_level="grado")
+    assert [s.code for s in index.find(criteria)] == ["mec", "upv"]
+
+
+def test_filters_are_intersected(index):
+    criteria = FilterCriteria(education_level="posgrado", financing="completa", location="europa")
+    assert [s.code for s in index.find(criteria)] == ["erasmus"]
+
+
+def test_unknown_value_returns_nothing(index):
+    assert index.find(FilterCriteria(location="marte")) == []
+
+
+def test_facts_of_undeclared_scholarships_are_ignored(index):
+    assert index.search({"nivel": "otro"}) == []
+
+
+def test_scholarship_details(index):
+    [mec] = index.find(FilterCriteria(organization="publico_estatal"))
+    assert mec.code == "mec"
+    assert mec.title == "Beca MEC"
+    assert mec.financing == "completa"
+    assert mec.requirements == {"nota_media": "5.0"}
+
+
+def edited_results(edit):
+    """Filas de INDEX_GOALS tras aplicar `edit` a una copia de los hechos."""
+    rows = copy.deepcopy(FakeService.ROWS)
+    edit(rows)
+    return [[rows[goal]] for goal, _ in INDEX_GOALS]
+
+
+def assert_same_searches(updated, rebuilt):
+    assert updated.search({}) == rebuilt.search({})
+    for criterion in CRITERIA:
+        assert updated.values(criterion) == rebuilt.values(criterion)
+        for value in rebuilt.values(criterion):
+            assert updated.search({criterion: value}) == rebuilt.search({criterion: value})
+
+
+def test_update_without_changes_keeps_the_index(index):
+    updated, changed = index.updated(edited_results(lambda rows: None))
+    assert updated is index
+    assert changed == set()
+
+
+def test_update_applies_added_and_removed_scholarships(index):
+    def edit(rows):
+        rows["findall(B, beca(B), Becas)"]["Becas"] = ["mec", "erasmus", "sin_info", "fantasma"]
+        rows["findall(B-I, info(B,I), Pairs)"]["Pairs"].append(pair("fantasma", "Beca fantasma"))
+        rows["findall(B-V, nivel(B,V), Pairs)"]["Pairs"].append(pair("erasmus", "grado"))
+
+    results = edited_results(edit)
+    updated, changed = index.updated(results)
+    assert changed == {"beca", "info", "nivel"}
+    assert updated.search({}) == ["mec", "erasmus", "fantasma"]
+    assert updated.search({"nivel": "otro"}) == ["fantasma"]
+    assert_same_searches(updated, ScholarshipIndex.from_results(results))
+    # El índice anterior sigue intacto para las búsquedas en curso
+    assert index.search({}) == ["mec", "upv", "erasmus"]
+    assert index.search({"nivel": "grado"}) == ["mec", "upv"]
+
+
+def test_update_shares_unchanged_criteria(index):
+    def edit(rows):
+        rows["findall(B-V, ubicacion(B,V), Pairs)"]["Pairs"][0] = pair("mec", "madrid")
+
+    updated, changed = index.updated(edited_results(edit))
+    assert changed == {"ubicacion"}
+    assert updated._postings["nivel"] is index._postings["nivel"]
+    assert updated.search({"ubicacion": "madrid"}) == ["mec"]
+    assert "espana" not in updated.values("ubicacion")
+
+
+def test_reordered_scholarships_rebuild_the_index(index):
+    def edit(rows):
+        rows["findall(B, beca(B), Becas)"]["Becas"] = ["erasmus", "mec", "upv", "sin_info"]
+
+    updated, changed = index.updated(edited_results(edit))
+    assert changed == {"beca"}
+    assert updated.search({}) == ["erasmus", "mec", "upv"]
+
+
+def generated_results(n):
+    """Filas de INDEX_GOALS para una KB de `n` becas generadas."""
+    ids = [f"beca_{i}" for i in range(n)]
+    rows = {goal: {vars[0]: []} for goal, vars in INDEX_GOALS}
+    rows["findall(B, beca(B), Becas)"]["Becas"] = ids
+    rows["findall(B-I, info(B,I), Pairs)"]["Pairs"] = [pair(beca, beca) for beca in ids]
+    rows["findall(B-V, nivel(B,V), Pairs)"]["Pairs"] = [pair(beca, "grado") for beca in ids]
+    return [[rows[goal]] for goal, _ in INDEX_GOALS]
+
+
+def test_update_of_a_large_kb_is_not_quadratic():
+    # Con 20k becas, comprobar el orden en O(N²) tardaba ~30 s; en O(N), décimas
+    index = ScholarshipIndex.from_results(generated_results(20000))
+    results = generated_results(20001)
+    start = time.perf_counter()
+    updated, changed = index.updated(results)
+    assert time.perf_counter() - start < 2
+    assert "beca" in changed
+    assert len(updated) == 20001
+
+
+def test_facets_count_remaining_criteria(index):
+    facets = index.facets({"nivel": "grado"})
+    assert "nivel" not in facets
+    assert facets["ubicacion"] == {"espana": 1, "valencia": 1}
+    assert facets["organismo"] == {"publico_estatal": 1, "publico_local": 1}
+
+
+def test_facets_ignore_the_criterion_own_filter(index):
+    facets = index.facets({"nivel": "grado", "ubicacion": "valencia"}, ["nivel"])
+    # Con ubicacion=valencia solo queda upv, que es de grado
+    assert facets == {"nivel": {"grado": 1}}
@@ -0,0 +1,99 @@
+import pytest
+
+from src.infrastructure import structured_output
+from src.infrastructure.structured_output import NULLS, StructuredOutput, parse, validate
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"enum": ["select", "modify", *NULLS]},
+        "value": {"type": ["string", "null"]},
+    },
+    "required": ["action", "value"],
+}
+
+
+class ScriptedLLM:
+    error_response = "error"
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate(self, prompt, history=None):
+        self.prompts.append(prompt)
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+@pytest.mark.parametrize("data, error", [
+    ({"action": "select", "value": "grado"}, None),
+    ({"action": "null", "value": None}, None),
+    ({"action": "select"}, "falta la clave 'value'"),
+    ({"action": "borrar", "value": None}, "'action' vale 'borrar' y debe ser uno de: select | modify | null"),
+    ({"action": "select", "value": True}, "'value' debe ser de tipo string | null"),
+    (["select"], "se esperaba un objeto JSON, no list"),
+])
+def test_validate(data, error):
+    assert validate(data, SCHEMA) == error
+
+
+def test_parse_reports_why_it_failed():
+    assert parse('```json\n{"action": "select"}\n```') == ({"action": "select"}, None)
+    assert parse('{"action": "sel') == (None, "no contiene un objeto JSON completo")
+    assert parse("{'action': 'select'}")[1].startswith("JSON mal formado")
+
+
+def test_invalid_answer_is_repaired_with_a_short_prompt():
+    llm = ScriptedLLM('{"action": "elegir", "value": "grado"}', '{"action": "select", "value": "grado"}')
+    output = StructuredOutput(llm)
+    assert output.generate("criterio", "prompt largo", SCHEMA) == {"action": "select", "value": "grado"}
+    repair = llm.prompts[1]
+    assert "'action' vale 'elegir'" in repair and "- action: select | modify | null" in repair
+    assert "prompt largo" not in repair
+    assert output.stats()["criterio"] == {
+        "calls": 1, "parse_failures": 0, "invalid": 1, "repairs": 1, "repaired": 1, "failed": 0,
+        "parse_failure_rate": 1.0, "failure_rate": 0.0,
+    }
+
+
+def test_repairs_are_bounded_by_count_and_latency_budget(monkeypatch):
+    llm = ScriptedLLM("no sé")
+    output = StructuredOutput(llm, max_repairs=2)
+    assert output.generate("criterio", "prompt", SCHEMA) is None
+    assert len(llm.prompts) == 3
+    assert output.stats()["criterio"]["failed"] == 1
+
+    now = [0.0]
+    monkeypatch.setattr(structured_output.time, "perf_counter", lambda: now[0])
+
+    def slow_generate(prompt, history=None):
+        llm.prompts.append(prompt)
+        now[0] += 3
+        return "no sé"
+
+    llm.generate = slow_generate
+    llm.prompts.clear()
+    output = StructuredOutput(llm, max_repairs=5, latency_budget=4.0)
+    assert output.generate("criterio", "prompt", SCHEMA) is None
+    # 3 s la primera, 6 s tras la primera reparación: ya no hay presupuesto para otra
+    assert len(llm.prompts) == 2
+    assert output.stats()["criterio"]["parse_failure_rate"] == 1.0
+
+
+class CutStreamLLM(ScriptedLLM):
+    """La primera respuesta se corta a mitad; las siguientes llegan enteras."""
+
+    def generate_stream(self, prompt, history=None):
+        if not self.prompts:
+            self.prompts.append(prompt)
+            yield '{"action": "sel'
+            raise structured_output.LLMStreamError("Generación interrumpida")
+        yield self.generate(prompt, history)
+
+
+def test_answer_cut_mid_stream_is_repaired():
+    llm = CutStreamLLM('{"action": "select", "value": "grado"}')
+    output = StructuredOutput(llm)
+    assert output.generate("criterio", "prompt", SCHEMA) == {"action": "select", "value": "grado"}
+    assert "(vacía)" in llm.prompts[1]
+    assert output.stats()["criterio"]["parse_failures"] == 1